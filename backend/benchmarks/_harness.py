@@ -0,0 +1,74 @@
+"""
+Shared setup for the benchmark scripts.
+
+Each script is run directly from the backend directory, e.g.
+
+    python benchmarks/bench_async_views.py
+
+and works against a throwaway test database, never db.sqlite3.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+
+@contextmanager
+def test_database(name=None):
+    """
+    Create a test database for the duration of the benchmark. SQLite test
+    databases are in memory unless a file name is given.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_user(username='BenchUser'):
+    from users.models import User
+    return User.objects.create_user(
+        username=username,
+        email=f'{username.lower()}@example.com',
+        password='BenchPass@123'
+    )
+
+
+def access_token_for(user):
+    from rest_framework_simplejwt.tokens import RefreshToken
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def timed(func, *args, **kwargs):
+    """Run func once and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    line = '  '.join(f'{{:<{width}}}' for width in widths)
+    print(line.format(*headers))
+    print(line.format(*('-' * width for width in widths)))
+    for row in rows:
+        print(line.format(*row))
@@ -0,0 +1,73 @@
+"""
+Compare the sync DRF room endpoints with their async-native versions.
+
+Both paths are driven through Django's ASGI handler with the same number of
+concurrent in-flight requests, so the sync views pay the thread hop exactly
+as they would under Daphne.
+
+    python benchmarks/bench_async_views.py [--rooms 200] [--requests 500] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import time
+
+from _harness import access_token_for, create_user, print_table, test_database
+
+from django.test import AsyncClient
+from django.urls import reverse
+
+
+async def run_load(url, headers, total, concurrency):
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return total / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    with test_database():
+        from rooms.models import Room
+
+        user = create_user()
+        Room.objects.bulk_create(
+            Room(host=user, title=f'Bench Room {i}') for i in range(args.rooms)
+        )
+        room = Room.objects.first()
+        headers = {'Authorization': f'Bearer {access_token_for(user)}'}
+
+        endpoints = [
+            ('list', reverse('room-list'), reverse('room-list-async')),
+            ('detail', reverse('room-detail', kwargs={'id': room.id}),
+             reverse('room-detail-async', kwargs={'id': room.id})),
+        ]
+
+        rows = []
+        for name, sync_url, async_url in endpoints:
+            for label, url in (('sync', sync_url), ('async', async_url)):
+                rps, p50, p99 = asyncio.run(run_load(url, headers, args.requests, args.concurrency))
+                rows.append((name, label, f'{rps:.0f}', f'{p50:.1f}', f'{p99:.1f}'))
+
+        print(f'{args.rooms} rooms, {args.requests} requests, concurrency {args.concurrency}')
+        print_table(('endpoint', 'path', 'req/s', 'p50 ms', 'p99 ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Chat search latency: the text index in rooms/search.py against an icontains
+scan, over a table of generated messages spread across rooms.
+
+    python benchmarks/bench_chat_search.py [--messages 200000] [--rooms 50] [--repeat 20]
+"""
+import argparse
+import random
+
+from _harness import create_user, print_table, test_database, timed
+
+WORDS = (
+    'agenda budget call deadline deploy design draft meeting notes plan '
+    'release review roadmap schedule slides standup sync ticket update video'
+).split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=200_000)
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        from django.db import transaction
+
+        from rooms import search
+        from rooms.models import ChatMessage, Room
+
+        host = create_user()
+        rooms = Room.objects.bulk_create(Room(host=host, title=f'Bench {i}') for i in range(args.rooms))
+        rng = random.Random(7)
+        per_room = args.messages // args.rooms
+        with transaction.atomic():
+            for room in rooms:
+                ChatMessage.objects.bulk_create(
+                    (
+                        ChatMessage(
+                            room=room, seq=seq, sender='bench', username='Bench',
+                            message=' '.join(rng.choices(WORDS, k=8)) + f' ref{rng.randrange(100_000)}',
+                        )
+                        for seq in range(1, per_room + 1)
+                    ),
+                    batch_size=5000,
+                )
+        indexed, index_seconds = timed(search.index_pending, batch_size=5000)
+        search.optimize()
+
+        room = rooms[len(rooms) // 2]
+        queries = ('deadline', 'release notes', 'ref4242', 'nothing')
+
+        def scan(query):
+            messages = ChatMessage.objects.filter(room=room)
+            for term in query.split():
+                messages = messages.filter(message__icontains=term)
+            return list(messages.order_by('-seq')[:50])
+
+        rows = []
+        for query in queries:
+            _, indexed_time = timed(lambda: [search.search(room.id, query) for _ in range(args.repeat)])
+            _, scan_time = timed(lambda: [scan(query) for _ in range(args.repeat)])
+            rows.append((
+                query,
+                f'{indexed_time / args.repeat * 1000:.2f}',
+                f'{scan_time / args.repeat * 1000:.2f}',
+            ))
+
+    print(f'{indexed} messages indexed in {index_seconds:.1f}s')
+    print_table(('query', 'index ms', 'icontains ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
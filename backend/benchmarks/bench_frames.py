@@ -0,0 +1,63 @@
+"""
+Cost of accepting and rejecting WebSocket frames in rooms/frames.py, next to
+a plain json.loads of the same frame (what receive() used to do).
+
+    python benchmarks/bench_frames.py [--repeat 2000]
+"""
+import argparse
+import json
+
+from _harness import print_table, timed
+
+from rooms import frames
+
+SDP = 'v=0\r\n' + 'a=candidate:1 1 udp 2122260223 10.0.0.1 5000 typ host\r\n' * 150
+
+CASES = [
+    ('valid offer', json.dumps({'type': 'offer', 'offer': {'type': 'offer', 'sdp': SDP}, 'targetUserId': 'abc'})),
+    ('valid ice', json.dumps({'type': 'ice_candidate', 'candidate': {'candidate': 'candidate:1 1 udp 1 10.0.0.1 5000 typ host'}, 'targetUserId': 'abc'})),
+    ('unknown type', json.dumps({'type': 'shout', 'payload': 'x' * 1000})),
+    ('ice over type limit', json.dumps({'type': 'ice_candidate', 'candidate': 'x' * 50_000, 'targetUserId': 'abc'})),
+    ('1 MB offer', json.dumps({'type': 'offer', 'offer': {'type': 'offer', 'sdp': 'x' * 1_000_000}, 'targetUserId': 'abc'})),
+    ('garbage at limit', '{"a":' + '1,' * 30_000),
+    ('deep nesting', '{"type":"chat_message","message":' + '[' * 10_000 + ']' * 10_000 + '}'),
+]
+
+
+def run(func, text, repeat):
+    def loop():
+        for _ in range(repeat):
+            try:
+                func(text)
+            except Exception:
+                pass
+    _, elapsed = timed(loop)
+    return elapsed / repeat * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = []
+    for name, text in CASES:
+        try:
+            frames.decode(text)
+            outcome = 'ok'
+        except frames.FrameError as e:
+            outcome = e.code
+        rows.append((
+            name,
+            f'{len(text):,}',
+            outcome,
+            f'{run(frames.decode, text, args.repeat):.1f}',
+            f'{run(json.loads, text, args.repeat):.1f}',
+        ))
+
+    print(f'{args.repeat} runs per case')
+    print_table(('frame', 'chars', 'result', 'decode() us', 'json.loads us'), rows)
+
+
+if __name__ == '__main__':
+    main()
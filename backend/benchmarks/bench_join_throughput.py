@@ -0,0 +1,153 @@
+"""
+Room join throughput per database profile.
+
+Each profile runs in its own process (settings are read once per process):
+SQLite with default settings, SQLite with the WAL profile from
+config/databases.py, and PostgreSQL when POSTGRES_HOST is set. Threads join
+distinct users into a handful of rooms through membership.join, each thread
+on its own connection, the way sync_to_async workers would.
+
+    python benchmarks/bench_join_throughput.py [--users 400] [--rooms 4] [--threads 8]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROFILES = (
+    # label, DATABASE_PROFILE, tuned
+    ('sqlite default', 'sqlite', False),
+    ('sqlite wal', 'sqlite', True),
+    ('postgres', 'postgres', True),
+)
+
+
+def run_worker(args):
+    from _harness import test_database
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.db import OperationalError, connection
+
+    # Measure the database, not the Redis round trip of the join broadcast
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+    if not args.tuned:
+        connection.settings_dict['OPTIONS'] = {}
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+
+    test_name = None
+    if connection.vendor == 'sqlite':
+        # WAL needs a file; an in-memory test database would hide the locking
+        test_name = str(Path(tempfile.mkdtemp()) / 'bench_join.sqlite3')
+
+    with test_database(test_name):
+        from rooms import membership
+        from rooms.models import Room
+        from users.models import User
+
+        password = make_password('BenchPass@123')
+        users = User.objects.bulk_create(
+            User(username=f'Joiner{i}', email=f'joiner{i}@example.com', password=password)
+            for i in range(args.users)
+        )
+        host = users[0]
+        rooms = Room.objects.bulk_create(
+            Room(host=host, title=f'Bench Room {i}', max_participants=args.users)
+            for i in range(args.rooms)
+        )
+        connection.close()
+
+        barrier = threading.Barrier(args.threads)
+        latencies = []
+        errors = []
+
+        def joiner(offset):
+            from django.db import connection as thread_connection
+            barrier.wait()
+            for index in range(offset, len(users), args.threads):
+                start = time.perf_counter()
+                try:
+                    membership.join(rooms[index % len(rooms)].id, users[index])
+                except OperationalError:
+                    errors.append(index)
+                    continue
+                latencies.append(time.perf_counter() - start)
+            thread_connection.close()
+
+        threads = [threading.Thread(target=joiner, args=(offset,)) for offset in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        result = {
+            'joins_per_second': len(latencies) / elapsed,
+            'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+            'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+            'errors': len(errors),
+        }
+    print(json.dumps(result))
+
+
+def run_profile(label, profile, tuned, args):
+    env = dict(os.environ, DATABASE_PROFILE=profile)
+    command = [
+        sys.executable, __file__, '--worker',
+        '--users', str(args.users), '--rooms', str(args.rooms), '--threads', str(args.threads),
+    ]
+    if tuned:
+        command.append('--tuned')
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(f'{label}: failed\n{completed.stderr}', file=sys.stderr)
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--rooms', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--tuned', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    from _harness import print_table
+
+    rows = []
+    for label, profile, tuned in PROFILES:
+        if profile == 'postgres' and 'POSTGRES_HOST' not in os.environ:
+            rows.append((label, 'skipped (set POSTGRES_HOST)', '', '', ''))
+            continue
+        result = run_profile(label, profile, tuned, args)
+        if result is None:
+            rows.append((label, 'failed', '', '', ''))
+            continue
+        rows.append((
+            label,
+            f"{result['joins_per_second']:.0f}",
+            f"{result['p50_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+            result['errors'],
+        ))
+
+    print(f'{args.users} joins into {args.rooms} rooms from {args.threads} threads')
+    print_table(('profile', 'joins/s', 'p50 ms', 'p99 ms', 'errors'), rows)
+
+
+if __name__ == '__main__':
+    main()
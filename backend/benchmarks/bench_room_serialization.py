@@ -0,0 +1,53 @@
+"""
+Per-row cost of encoding rooms with RoomSerializer versus the values() fast path.
+
+    python benchmarks/bench_room_serialization.py [--sizes 1000 10000] [--repeat 3]
+
+Both columns include the queries each path issues, since the serializer's
+per-instance host / participant lookups are a large part of its cost.
+"""
+import argparse
+
+from _harness import create_user, print_table, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with test_database():
+        from rooms import fastpath
+        from rooms.models import Room
+        from rooms.serializers import RoomSerializer
+
+        user = create_user()
+        rows = []
+        created = 0
+        for size in sorted(args.sizes):
+            Room.objects.bulk_create(
+                (Room(host=user, title=f'Bench Room {i}') for i in range(created, size)),
+                batch_size=1000
+            )
+            created = size
+            queryset = Room.objects.filter(is_active=True)
+
+            serializer_time = min(
+                timed(lambda: RoomSerializer(queryset, many=True).data)[1] for _ in range(args.repeat)
+            )
+            fast_time = min(
+                timed(fastpath.encode_rooms, queryset)[1] for _ in range(args.repeat)
+            )
+            rows.append((
+                size,
+                f'{serializer_time / size * 1e6:.1f}',
+                f'{fast_time / size * 1e6:.1f}',
+                f'{serializer_time / fast_time:.1f}x',
+            ))
+
+        print_table(('rooms', 'serializer us/row', 'fast path us/row', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
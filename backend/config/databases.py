@@ -0,0 +1,100 @@
+"""
+Database profiles, picked with the DATABASE_PROFILE environment variable.
+
+sqlite (default)
+    Single node and development. Every new connection runs the PRAGMAs in
+    SQLITE_PRAGMAS: WAL so readers don't block the writer, synchronous=NORMAL
+    (durable at each checkpoint rather than each commit, safe with WAL) and a
+    busy timeout so a locked database waits instead of failing. Writes open
+    with BEGIN IMMEDIATE so two transactions never deadlock upgrading a read
+    lock. Connections persist per thread for CONN_MAX_AGE seconds.
+
+postgres
+    Production. Connections come from a psycopg pool (needs the psycopg and
+    psycopg-pool packages) sized with POSTGRES_POOL_MIN / POSTGRES_POOL_MAX.
+    Django does not combine its own pool with CONN_MAX_AGE, so set
+    POSTGRES_POOL_MAX=0 to use persistent connections with health checks
+    instead (e.g. behind PgBouncer).
+
+Read replicas (see config/replicas.py) are added as extra aliases:
+POSTGRES_REPLICA_HOSTS=host1,host2 for postgres, or SQLITE_REPLICAS=n for n
+query-only connections to the same SQLite file, to exercise the routing
+locally. Replicas mirror 'default' in tests.
+"""
+import os
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA foreign_keys=ON',
+)
+
+
+def sqlite(name, tuned=True):
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+    if tuned:
+        database['OPTIONS'] = {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        }
+        database['CONN_MAX_AGE'] = 60
+        database['CONN_HEALTH_CHECKS'] = True
+    return database
+
+
+def postgres(environ=os.environ):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': environ.get('POSTGRES_DB', 'chatconnect'),
+        'USER': environ.get('POSTGRES_USER', 'chatconnect'),
+        'PASSWORD': environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': environ.get('POSTGRES_PORT', '5432'),
+        'OPTIONS': {},
+    }
+    pool_max = int(environ.get('POSTGRES_POOL_MAX', 20))
+    if pool_max:
+        database['OPTIONS']['pool'] = {
+            'min_size': int(environ.get('POSTGRES_POOL_MIN', 2)),
+            'max_size': pool_max,
+            # Seconds to wait for a free connection before raising
+            'timeout': int(environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(environ.get('POSTGRES_CONN_MAX_AGE', 60))
+        database['CONN_HEALTH_CHECKS'] = True
+    return database
+
+
+def sqlite_replica(primary):
+    replica = dict(primary, OPTIONS=dict(primary.get('OPTIONS', {})))
+    pragmas = replica['OPTIONS'].get('init_command', '')
+    replica['OPTIONS']['init_command'] = ';'.join(filter(None, [pragmas, 'PRAGMA query_only=ON']))
+    return replica
+
+
+def replicas_from_environment(primary, environ=os.environ):
+    """Replica aliases ('replica_1', ...) for the primary built by from_environment"""
+    if primary['ENGINE'].endswith('sqlite3'):
+        replicas = [sqlite_replica(primary) for _ in range(int(environ.get('SQLITE_REPLICAS', 0)))]
+    else:
+        hosts = [host.strip() for host in environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()]
+        replicas = [dict(primary, HOST=host) for host in hosts]
+
+    return {
+        f'replica_{number}': dict(replica, TEST={'MIRROR': 'default'})
+        for number, replica in enumerate(replicas, start=1)
+    }
+
+
+def from_environment(base_dir, environ=os.environ):
+    profile = environ.get('DATABASE_PROFILE', 'sqlite')
+    if profile == 'sqlite':
+        return sqlite(environ.get('SQLITE_PATH', base_dir / 'db.sqlite3'))
+    if profile == 'postgres':
+        return postgres(environ)
+    raise ValueError(f"Unknown DATABASE_PROFILE {profile!r}, expected 'sqlite' or 'postgres'")
@@ -0,0 +1,95 @@
+"""
+Minimal in-process latency histograms.
+
+    from config import metrics
+    with metrics.histogram('auth.hash_seconds').time():
+        ...
+
+snapshot() returns every registered histogram as plain data for debug views
+or an exporter.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+class Histogram:
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self):
+        return self._count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (inf if past the last)"""
+        with self._lock:
+            counts, total = list(self._counts), self._count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def snapshot(self):
+        with self._lock:
+            counts, total, value_sum = list(self._counts), self._count, self._sum
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            'count': total,
+            'sum': value_sum,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': buckets,
+        }
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name, buckets=DEFAULT_BUCKETS):
+    """Return the histogram registered under name, creating it on first use"""
+    found = _registry.get(name)
+    if found is None:
+        with _registry_lock:
+            found = _registry.setdefault(name, Histogram(name, buckets))
+    return found
+
+
+def snapshot(prefix=''):
+    return {name: h.snapshot() for name, h in sorted(_registry.items()) if name.startswith(prefix)}
@@ -0,0 +1,151 @@
+"""
+Read replicas for room reads.
+
+PrimaryReplicaRouter sends reads of the APPS models to a random replica
+alias and everything else, and every write, to 'default'. Reads stay on the
+primary when a replica could be behind what the caller expects to see:
+
+- inside a transaction on the primary,
+- later in the same request, once that request has written anything,
+- for PIN_SECONDS after a user's own write (create, join, leave...), so the
+  room list and detail they load next show it. The pin is kept in the cache,
+  which must be shared between workers for it to hold across processes.
+
+Requests get their own routing state from ReplicaRoutingMiddleware; views
+say who the user is with use_user() once authentication has run and
+pin_if_wrote() before responding (ReplicaPinMixin does both for DRF views).
+Outside a request there is no pinning beyond the transaction rule.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    # None: every alias in DATABASES other than 'default'
+    'ALIASES': None,
+    'APPS': ('rooms',),
+    'PIN_SECONDS': 5,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_REPLICAS', {}).get(name, DEFAULTS[name])
+
+
+def replica_aliases():
+    aliases = get_setting('ALIASES')
+    if aliases is None:
+        aliases = [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+    return aliases
+
+
+def pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+class RoutingState:
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self):
+        self.pinned = False
+        self.wrote = False
+
+
+_state = ContextVar('replica_routing_state', default=None)
+
+
+def pin(user_id):
+    """Keep this user's reads on the primary for PIN_SECONDS"""
+    cache.set(pin_key(user_id), 1, get_setting('PIN_SECONDS'))
+
+
+def use_user(user):
+    """Route the rest of this request by user's pin"""
+    state = _state.get()
+    if state is None or not getattr(user, 'is_authenticated', False):
+        return
+    if cache.get(pin_key(user.id)) is not None:
+        state.pinned = True
+
+
+def pin_if_wrote(user):
+    """After a request that wrote, pin its user"""
+    state = _state.get()
+    if state is not None and state.wrote and getattr(user, 'is_authenticated', False):
+        pin(user.id)
+
+
+def reads_from_replica(model):
+    """Whether reads of model go to a replica at this point of the request"""
+    if model._meta.app_label not in get_setting('APPS'):
+        return False
+    if not replica_aliases() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return False
+    state = _state.get()
+    return state is None or not (state.pinned or state.wrote)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in get_setting('APPS'):
+            return None
+        if not reads_from_replica(model):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replica_aliases())
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Give each request its own routing state"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _state.set(RoutingState())
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(RoutingState())
+        try:
+            return await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+
+class ReplicaPinMixin:
+    """DRF view mixin: apply the user's pin after authentication, set it after writes"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_user(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        pin_if_wrote(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 
+from . import databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -52,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'config.replicas.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -63,13 +66,19 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
 
+# Per-process cache of authenticated users (see users/authentication.py)
+USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,  # seconds; bounds staleness across worker processes
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -117,6 +126,16 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Bloom filter in front of refresh token blacklist checks (see users/blacklist.py)
+TOKEN_BLACKLIST_FILTER = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.01,
+    'SYNC_INTERVAL': 5,  # seconds
+    # The filter is skipped unless the cache is shared between processes;
+    # None decides from the backend (LocMem and Dummy are not)
+    'SHARED_CACHE': None,
+}
+
 # Channel layers (using Redis)
 # Channel layers (using Redis)
 CHANNEL_LAYERS = {
@@ -127,18 +146,95 @@ CHANNEL_LAYERS = {
         },
     },
 }
+
+# Graceful drain for rolling deploys (see rooms/drain.py)
+ROOM_DRAIN = {
+    'SIGNAL': 'SIGUSR1',
+    'BATCH_SIZE': 50,
+    'BATCH_INTERVAL': 1.0,  # seconds between close batches
+    'RECONNECT_DELAY_MIN': 1.0,  # seconds
+    'RECONNECT_DELAY_MAX': 10.0,
+    'CLOSE_CODE': 4503,
+}
+
+# Live lobby feed (see rooms/lobby.py)
+ROOM_LOBBY = {
+    'TICK_INTERVAL': 0.5,  # seconds between coalesced delta flushes
+}
+
+# Stale room reaper and archival (see rooms/reaper.py, manage.py reap_rooms)
+ROOM_REAPER = {
+    'IDLE_SECONDS': 3600,  # close rooms with no activity for this long
+    'ARCHIVE_AFTER_SECONDS': 7 * 24 * 3600,  # archive closed rooms after this
+    'BATCH_SIZE': 500,  # rooms per transaction
+    'INTERVAL': 300,  # seconds between passes with --loop
+    'TOUCH_INTERVAL': 60,  # seconds between socket heartbeats per worker
+}
+
+# Per-room analytics event log (see rooms/events.py, manage.py rollup_room_events)
+ROOM_EVENTS = {
+    'ENABLED': True,
+    'BACKEND': 'file',  # or 'redis' for one capped stream per room
+    'DIR': BASE_DIR / 'var' / 'room_events',
+    'SEGMENT_BYTES': 1024 * 1024,
+    'MAX_SEGMENTS': 8,  # per room; older segments are deleted
+    'REDIS_URL': 'redis://127.0.0.1:6379/1',
+    'MAX_LEN': 10000,  # approximate events kept per room stream
+    'QUEUE_SIZE': 10000,  # events buffered before record() starts dropping
+}
+
+# Files shared in room chat (see rooms/files.py). Content is stored once per
+# SHA-256 under DIR; set SENDFILE to let nginx/Apache send downloads
+ROOM_FILES = {
+    'DIR': BASE_DIR / 'var' / 'room_files',
+    'MAX_BYTES': 512 * 1024 * 1024,
+    'MAX_CHUNK_BYTES': 16 * 1024 * 1024,  # per PATCH request
+    'UPLOAD_TTL_SECONDS': 24 * 3600,  # unfinished uploads are removed after this
+    'SENDFILE': None,  # 'X-Accel-Redirect' or 'X-Sendfile'
+    'SENDFILE_URL': '/protected/room_files/',  # nginx internal location aliased to DIR
+}
+
+# Cache
+# Room ETag versions live here (rooms/versioning.py). With more than one
+# worker process this must be a shared backend such as Redis, otherwise
+# each process keeps its own versions.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DATABASE_PROFILE=sqlite (default) or postgres, see config/databases.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': databases.from_environment(BASE_DIR),
+}
+DATABASES.update(databases.replicas_from_environment(DATABASES['default']))
+
+# Room reads go to the replica aliases above, if any (config/replicas.py)
+DATABASE_ROUTERS = ['config.replicas.PrimaryReplicaRouter']
+
+DATABASE_REPLICAS = {
+    'APPS': ('rooms',),
+    # Seconds a user's reads stay on the primary after they write
+    'PIN_SECONDS': 5,
 }
 
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'users.backends.PooledModelBackend',
+]
+
+# Bounded pool for password hashing (see users/hashing.py)
+PASSWORD_HASHING = {
+    'WORKERS': 4,
+    'QUEUE_DEPTH': 16,  # hashes allowed to wait; beyond this requests get 503
+    'RETRY_AFTER': 2,  # seconds
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def room_events_dir(settings, tmp_path):
+    """Keep the room event log of socket tests out of the source tree"""
+    settings.ROOM_EVENTS = {**settings.ROOM_EVENTS, 'DIR': tmp_path / 'room_events'}
@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Room
+from .models import ArchivedRoom, Room, RoomMembership
 
 admin.site.register(Room)
+admin.site.register(RoomMembership)
+admin.site.register(ArchivedRoom)
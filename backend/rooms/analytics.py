@@ -0,0 +1,129 @@
+"""
+Batch rollup of the room event log (rooms/events.py) into analytics tables.
+
+For each room the log is read from the position saved in
+RoomEventCheckpoint, and each batch of events updates:
+
+RoomSessionDuration   one row per socket session (connect -> disconnect)
+RoomTimeToConnect     seconds from a socket connecting to the first answer
+                      it sent or received
+RoomPeakConcurrency   most sockets connected at once, per room and hour
+
+Sessions still open at the end of a batch are carried in the checkpoint's
+state, which is saved in the same transaction as the rows, so a rollup can
+be stopped and rerun at any point. Product analytics reads these tables
+rather than the live room tables.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+from . import events
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _datetime(ts):
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc)
+
+
+def _hour(ts):
+    return _datetime(ts).replace(minute=0, second=0, microsecond=0)
+
+
+def fold(batch, state):
+    """
+    Apply a batch of events to state ({'open': {...}, 'concurrency': n}).
+    Returns (sessions, connects, peaks) for the batch, ready to store.
+    """
+    open_sessions = state.setdefault('open', {})
+    concurrency = state.get('concurrency', 0)
+    sessions = []
+    connects = []
+    peaks = {}
+
+    for event in batch:
+        kind = event.get('type')
+        session = event.get('session')
+        ts = event['ts']
+
+        if kind == 'connect':
+            if session not in open_sessions:
+                concurrency += 1
+            open_sessions[session] = {'start': ts, 'connected': False}
+        elif kind == 'disconnect':
+            opened = open_sessions.pop(session, None)
+            if opened is not None:
+                concurrency = max(0, concurrency - 1)
+                sessions.append((session, opened['start'], ts))
+        elif kind == 'answer':
+            for party in (session, event.get('peer')):
+                opened = open_sessions.get(party)
+                if opened is not None and not opened['connected']:
+                    opened['connected'] = True
+                    connects.append((party, opened['start'], ts))
+
+        hour = _hour(ts)
+        peaks[hour] = max(peaks.get(hour, 0), concurrency)
+
+    state['concurrency'] = concurrency
+    return sessions, connects, peaks
+
+
+def store(room_id, sessions, connects, peaks):
+    from .models import RoomPeakConcurrency, RoomSessionDuration, RoomTimeToConnect
+
+    RoomSessionDuration.objects.bulk_create([
+        RoomSessionDuration(
+            room_id=room_id,
+            session=session,
+            started_at=_datetime(start),
+            ended_at=_datetime(end),
+            seconds=end - start,
+        )
+        for session, start, end in sessions
+    ], ignore_conflicts=True)
+
+    RoomTimeToConnect.objects.bulk_create([
+        RoomTimeToConnect(
+            room_id=room_id,
+            session=session,
+            connected_at=_datetime(start),
+            seconds=answered - start,
+        )
+        for session, start, answered in connects
+    ], ignore_conflicts=True)
+
+    for hour, peak in peaks.items():
+        row, created = RoomPeakConcurrency.objects.get_or_create(
+            room_id=room_id, hour=hour, defaults={'peak': peak}
+        )
+        if not created and row.peak < peak:
+            RoomPeakConcurrency.objects.filter(pk=row.pk, peak__lt=peak).update(peak=peak)
+
+
+def rollup_room(room_id, backend=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Roll up everything new in one room's log; returns the number of events read"""
+    from .models import RoomEventCheckpoint
+
+    backend = backend or events.get_backend()
+    total = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = RoomEventCheckpoint.objects.select_for_update().get_or_create(room_id=room_id)
+            batch, position = backend.read(room_id, checkpoint.position or None, batch_size)
+            if not batch:
+                break
+            store(room_id, *fold(batch, checkpoint.state))
+            checkpoint.position = position
+            checkpoint.save()
+        total += len(batch)
+        if len(batch) < batch_size:
+            break
+    return total
+
+
+def rollup(backend=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Roll up every room with a log; returns {room_id: events read}"""
+    backend = backend or events.get_backend()
+    return {room_id: rollup_room(room_id, backend, batch_size) for room_id in backend.rooms()}
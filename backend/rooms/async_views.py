@@ -0,0 +1,125 @@
+"""
+Async-native versions of the room endpoints.
+
+The DRF views in views.py are synchronous, so under ASGI every request hops
+onto a sync worker thread. These views run on the event loop end to end:
+JWT auth, permission checks and the ORM calls all use the async APIs, and the
+response payloads match RoomSerializer / RoomJoinView field for field
+(room payloads come from fastpath.py).
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from config import replicas
+from users.authentication import AsyncJWTAuthentication
+from . import fastpath, lobby, membership
+from .models import Room
+from .serializers import RoomCreateSerializer
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRoomView(View):
+    """Base view: authenticates the JWT and requires a logged in user"""
+    authentication_class = AsyncJWTAuthentication
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authentication_class()
+        try:
+            result = await authenticator.aauthenticate(request)
+        except APIException as exc:
+            return self.error_response(exc.detail, exc.status_code, authenticator)
+
+        if result is None:
+            return self.error_response(
+                "Authentication credentials were not provided.",
+                status.HTTP_401_UNAUTHORIZED,
+                authenticator
+            )
+
+        request.user, request.auth = result
+        replicas.use_user(request.user)
+        response = await super().dispatch(request, *args, **kwargs)
+        replicas.pin_if_wrote(request.user)
+        return response
+
+    def error_response(self, detail, status_code, authenticator):
+        if not isinstance(detail, dict):
+            detail = {"detail": detail}
+        response = JsonResponse(detail, status=status_code)
+        if status_code == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = authenticator.authenticate_header(self.request)
+        return response
+
+    def parse_body(self, request):
+        if request.content_type == 'application/json':
+            return json.loads(request.body or b'{}')
+        return request.POST
+
+
+class AsyncRoomCreateView(AsyncRoomView):
+
+    async def post(self, request):
+        try:
+            data = self.parse_body(request)
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error"}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RoomCreateSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        room = await Room.objects.acreate(host=request.user, **serializer.validated_data)
+        data = await fastpath.aencode_room(Room.objects.filter(id=room.id))
+        lobby.note_room_created(data)
+        return JsonResponse(data, status=status.HTTP_201_CREATED)
+
+
+class AsyncRoomListView(AsyncRoomView):
+
+    async def get(self, request):
+        rooms = await fastpath.aencode_rooms(Room.objects.filter(is_active=True))
+        return JsonResponse(rooms, safe=False)
+
+
+class AsyncRoomDetailView(AsyncRoomView):
+
+    async def get(self, request, id):
+        data = await fastpath.aencode_room(Room.objects.filter(id=id))
+        if data is None:
+            return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return JsonResponse(data)
+
+
+class AsyncRoomJoinView(AsyncRoomView):
+
+    async def post(self, request, room_id):
+        outcome, room = await sync_to_async(membership.join)(room_id, request.user)
+
+        if outcome == membership.NOT_FOUND:
+            return JsonResponse(
+                {"error": "Room not found or inactive"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if outcome == membership.ALREADY_JOINED:
+            return JsonResponse({"message": "Already in room", "room_id": str(room_id)})
+        if outcome == membership.ROOM_FULL:
+            return JsonResponse(
+                {"error": "Room is full"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return JsonResponse({
+            "message": "Joined room successfully",
+            "room_id": str(room.id),
+            "room_title": room.title,
+            "host_name": room.host_name,
+            "participant_count": room.participant_count,
+            "max_participants": room.max_participants
+        })
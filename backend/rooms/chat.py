@@ -0,0 +1,131 @@
+"""
+Room chat: sequencing, dedup and catch-up.
+
+Every message gets the room's next sequence number from one atomic
+increment of Room.chat_seq (UPDATE ... RETURNING), so numbers are dense and
+ordered per room. The increment also serialises posts to a room, which
+makes the client_id dedup check race-free: a message whose client_id was
+already used in the room within DEDUP_SECONDS is not stored again, and the
+sender gets the original's seq back.
+
+Delivery to a socket (VideoRoomConsumer) is tracked with two numbers: the
+last seq sent and the last seq the client acknowledged (cumulative,
+"everything up to n"). A jump in the seq being sent means the socket missed
+group messages, and the gap is filled from the table. Clients that ack get
+at most MAX_UNACKED messages ahead of their ack before pushes pause; they
+catch up with a chat_sync, as does a reconnecting client, which only asks
+for what came after the last seq it has.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import dialects, search
+
+DEFAULTS = {
+    'DEDUP_SECONDS': 3600,
+    'HISTORY_LIMIT': 200,
+    'MAX_UNACKED': 100,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_CHAT', {}).get(name, DEFAULTS[name])
+
+
+def _next_seq_sql(returning):
+    from .models import Room
+
+    qn = connection.ops.quote_name
+    sql = f"""
+        UPDATE {qn(Room._meta.db_table)}
+           SET {qn('chat_seq')} = {qn('chat_seq')} + 1
+         WHERE {qn('id')} = %s
+    """
+    if returning:
+        sql += f" RETURNING {qn('chat_seq')}"
+    return sql
+
+
+def _next_seq(room_id):
+    """Take the room's next chat seq; None if there is no such room"""
+    from .models import Room
+
+    params = [Room._meta.pk.get_db_prep_value(room_id, connection)]
+    with connection.cursor() as cursor:
+        if dialects.can_update_returning(connection):
+            cursor.execute(_next_seq_sql(returning=True), params)
+            row = cursor.fetchone()
+            return row[0] if row else None
+        cursor.execute(_next_seq_sql(returning=False), params)
+        if not cursor.rowcount:
+            return None
+    return Room.objects.filter(pk=room_id).values_list('chat_seq', flat=True).first()
+
+
+def post(room_id, sender, text, username='', client_id=''):
+    """
+    Store a message under the room's next seq.
+
+    Returns (message, created). A client_id seen in the room within
+    DEDUP_SECONDS returns the stored message with created False; message is
+    None if the room does not exist.
+    """
+    from .models import ChatMessage
+
+    now = timezone.now()
+    with transaction.atomic():
+        seq = _next_seq(room_id)
+        if seq is None:
+            return None, False
+        if client_id:
+            # Checked after the increment, which holds the room row until commit
+            existing = (
+                ChatMessage.objects
+                .filter(room_id=room_id, client_id=client_id,
+                        created_at__gte=now - timedelta(seconds=get_setting('DEDUP_SECONDS')))
+                .first()
+            )
+            if existing is not None:
+                transaction.set_rollback(True)
+                return existing, False
+        message = ChatMessage.objects.create(
+            room_id=room_id,
+            seq=seq,
+            client_id=client_id,
+            sender=sender,
+            username=username,
+            message=text,
+            created_at=now,
+        )
+        transaction.on_commit(search.message_stored)
+    return message, True
+
+
+def history(room_id, after, before=None, limit=None):
+    """
+    Messages with after < seq (< before), oldest first, at most limit of
+    them; returns (messages, more)
+    """
+    from .models import ChatMessage
+
+    limit = limit or get_setting('HISTORY_LIMIT')
+    messages = ChatMessage.objects.filter(room_id=room_id, seq__gt=after)
+    if before is not None:
+        messages = messages.filter(seq__lt=before)
+    messages = list(messages.order_by('seq')[:limit + 1])
+    return messages[:limit], len(messages) > limit
+
+
+def encode(message):
+    """The wire form of a message, as in chat_message frames"""
+    return {
+        'seq': message.seq,
+        'clientId': message.client_id,
+        'message': message.message,
+        'username': message.username,
+        'userId': message.sender,
+        'sent_at': message.created_at.isoformat(),
+    }
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TickCoalescer:
+    """
+    Collects keyed updates and flushes only the latest value per key, at most
+    once per tick. Used for high-frequency, last-writer-wins notifications so
+    their cost scales with ticks rather than with events.
+    """
+
+    def __init__(self, flush, interval, merge=None):
+        self.flush = flush  # async callable taking {key: value}
+        self.interval = interval  # seconds, or a callable returning seconds
+        self.merge = merge  # optional (old, new) -> value
+        self._pending = {}
+        self._task = None
+
+    def put(self, key, value):
+        """Queue a value for key; must be called from the event loop"""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._task.get_loop() is not loop:
+            # Updates queued on a loop that has since gone away can't be flushed
+            self._pending = {}
+            self._task = None
+        if self.merge is not None and key in self._pending:
+            value = self.merge(self._pending[key], value)
+        self._pending[key] = value
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def pending(self):
+        return len(self._pending)
+
+    async def _run(self):
+        while self._pending:
+            interval = self.interval() if callable(self.interval) else self.interval
+            await asyncio.sleep(interval)
+            batch, self._pending = self._pending, {}
+            try:
+                await self.flush(batch)
+            except Exception:
+                logger.exception("Coalesced flush of %d keys failed", len(batch))
@@ -1,280 +1,446 @@
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 import uuid
+from urllib.parse import parse_qs
+
+from . import chat, drain, ephemeral, events, frames, lobby, presence, reaper, spotlight, tickets, tracing
 
 logger = logging.getLogger(__name__)
 
+
+def ticket_user_id(scope):
+    """User id from an optional ?ticket= (rooms/tickets.py); the socket is anonymous otherwise"""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    ticket = query.get('ticket', [None])[0]
+    return tickets.redeem(ticket) if ticket else None
+
+
 class VideoRoomConsumer(AsyncWebsocketConsumer):
-    # Class-level storage for active users per room
-    active_users = {}  # {room_id: set(user_ids)}
+    # Per-socket defaults live on the class, so a socket only stores the
+    # fields it changes. Which sockets are in a room: rooms/presence.py
+    # Active-speaker state when the room uses the spotlight topology
+    spotlight = None
+    is_host = False
+    # Chat delivery to this socket (rooms/chat.py): last seq sent, last seq
+    # the client acked (None until it acks), and whether pushes are paused
+    chat_delivered = 0
+    chat_acked = None
+    chat_paused = False
+    # Traces of offers this socket has received and not yet answered, by sender
+    offer_traces = None
 
     async def connect(self):
         """Handle WebSocket connection for video rooms"""
         try:
-            from .models import Room
+            drain.install_signal_handler()
+            reaper.start_heartbeat()
+            if drain.is_draining():
+                # This node is going away; let the client reconnect elsewhere
+                await self.close(code=drain.get_setting('CLOSE_CODE'))
+                return
         
-            self.room_id = self.scope['url_route']['kwargs']['room_id']
-            self.room_group_name = f'room_{self.room_id}'
+            self.room_id = presence.room_key(self.scope['url_route']['kwargs']['room_id'])
+            self.room_group_name = presence.group_name(self.room_id)
             self.user_id = str(uuid.uuid4())
         
             print(f"WebSocket connection attempt for room: {self.room_id}, user: {self.user_id}")
         
             # Check if room exists
-            try:
-                room = await sync_to_async(Room.objects.get)(id=self.room_id)
-                print(f"Room found: {room.id}")
-            except Exception as e:
-                print(f"Room {self.room_id} does not exist or error: {e}")
+            room = await self.find_room()
+            if room is None:
                 await self.close(code=4004)
                 return
-
-            # Join room group
-            await self.channel_layer.group_add(
-                self.room_group_name,
-                self.channel_name
-            )
+            self.is_host = await database_sync_to_async(ticket_user_id)(self.scope) == str(room.host_id)
         
             # Accept the connection
             await self.accept()
-            print(f"WebSocket connected successfully to room: {self.room_id}")
-        
-            # Update participant count
-            try:
-                room.participant_count += 1
-                await sync_to_async(room.save)()
-                
-                # Add user to active users list
-                if self.room_id not in self.active_users:
-                    self.active_users[self.room_id] = set()
-                
-                # Get existing users before adding new one
-                existing_users = list(self.active_users[self.room_id])
-                print(f"Existing users in room: {existing_users}")
-                
-                self.active_users[self.room_id].add(self.user_id)
-                
-                print(f"Updated participant count for room {self.room_id}: {room.participant_count}")
-                
-                # Send connection confirmation WITH USER ID and EXISTING USERS
-                await self.send(text_data=json.dumps({
-                    'type': 'connection_established',
-                    'message': 'Connected to room successfully',
-                    'room_id': self.room_id,
-                    'userId': self.user_id,
-                    'participant_count': room.participant_count,
-                    'existing_users': existing_users  # Send list of existing users
-                }))
-                
-                # Notify ALL clients (including sender) about participant update
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'participant_update',
-                        'participant_count': room.participant_count,
-                        'message': f'Total participants: {room.participant_count}'
-                    }
-                )
-                
-                # Notify OTHER clients that a new user joined
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'user_joined_notification',
-                        'userId': self.user_id,
-                        'username': f'User_{self.user_id[:8]}',
-                        'participant_count': room.participant_count,
-                        'sender_channel': self.channel_name
-                    }
-                )
-                
-            except Exception as e:
-                print(f"Error updating participant count: {str(e)}")
+            drain.register(self)
+            await self.enter_room(room)
 
         except Exception as e:
             print(f"Unexpected error in connect: {str(e)}")
             await self.close(code=4000)
 
-    async def disconnect(self, close_code):
-        """Handle WebSocket disconnection"""
+    async def find_room(self):
+        """The room for self.room_id, or None if there is no such room"""
+        from .models import Room
+
+        try:
+            try:
+                room = await database_sync_to_async(Room.objects.get)(id=self.room_id)
+            except Room.DoesNotExist:
+                # A room created a moment ago may not have reached the
+                # read replica yet; the primary has the final word
+                room = await database_sync_to_async(Room.objects.using('default').get)(id=self.room_id)
+            print(f"Room found: {room.id}")
+            return room
+        except Exception as e:
+            print(f"Room {self.room_id} does not exist or error: {e}")
+            return None
+
+    async def enter_room(self, room):
+        """Join the room group and introduce this socket to the others"""
+        if room.topology == spotlight.SPOTLIGHT:
+            self.spotlight = spotlight.get(self.room_id)
+        self.chat_delivered = room.chat_seq
+
+        # Join room group
+        await self.channel_layer.group_add(
+            self.room_group_name,
+            self.channel_name
+        )
+        events.record(self.room_id, 'connect', self.user_id)
+        await database_sync_to_async(reaper.touch)([self.room_id])
+        print(f"WebSocket connected successfully to room: {self.room_id}")
+        
+        # participant_count is maintained by join/leave (membership.py)
         try:
-            from .models import Room
+            # Add user to the room's sockets, getting the ones already there
+            existing_users = presence.add(self.room_id, self.user_id)
+            print(f"Existing users in room: {existing_users}")
+
+            seated = False
+            if self.spotlight is not None:
+                # Only pairs with an active speaker get a peer connection
+                seated = self.spotlight.add(self.user_id)
+                existing_users = [
+                    peer for peer in existing_users
+                    if self.spotlight.pair_allowed(self.user_id, peer)
+                ]
             
-            print(f"WebSocket disconnecting from room: {self.room_id}, close code: {close_code}")
+            print(f"Participant count for room {self.room_id}: {room.participant_count}")
             
-            # Remove user from active users
-            if self.room_id in self.active_users:
-                self.active_users[self.room_id].discard(self.user_id)
-                if not self.active_users[self.room_id]:
-                    del self.active_users[self.room_id]
+            # Send connection confirmation WITH USER ID and EXISTING USERS
+            await self.send(text_data=json.dumps({
+                'type': 'connection_established',
+                'message': 'Connected to room successfully',
+                'room_id': self.room_id,
+                'userId': self.user_id,
+                'participant_count': room.participant_count,
+                'existing_users': existing_users,  # Send list of existing users
+                'topology': room.topology,
+                'chat_seq': room.chat_seq,  # chat_sync from your last seq to catch up
+                'active': list(self.spotlight.active) if self.spotlight is not None else None
+            }))
             
-            # Notify others BEFORE leaving the group
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'user_left_notification',
-                    'userId': self.user_id,
-                    'sender_channel': self.channel_name
-                }
-            )
+            # Notify ALL clients (including sender) about participant update
+            await self.room_send({
+                'type': 'participant_update',
+                'participant_count': room.participant_count,
+                'message': f'Total participants: {room.participant_count}'
+            })
             
-            # Update participant count
-            try:
-                room = await sync_to_async(Room.objects.get)(id=self.room_id)
-                if room.participant_count > 0:
-                    room.participant_count -= 1
-                    await sync_to_async(room.save)()
-                    print(f"Updated participant count for room {self.room_id}: {room.participant_count}")
-                    
-                    # Notify all clients about updated participant count
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            'type': 'participant_update',
-                            'participant_count': room.participant_count,
-                            'message': f'User left room. Total participants: {room.participant_count}'
-                        }
-                    )
-            except Exception as e:
-                print(f"Error updating participant count during disconnect: {str(e)}")
-
-            # Leave room group
-            await self.channel_layer.group_discard(
-                self.room_group_name,
-                self.channel_name
-            )
+            # Notify OTHER clients that a new user joined
+            await self.room_send({
+                'type': 'user_joined_notification',
+                'userId': self.user_id,
+                'username': f'User_{self.user_id[:8]}',
+                'participant_count': room.participant_count,
+                'sender_channel': self.channel_name
+            })
+
+            if seated:
+                await self.announce_spotlight([
+                    peer for peer in self.spotlight.active if peer != self.user_id
+                ], exclude=self.user_id)
+            
+        except Exception as e:
+            print(f"Error updating participant count: {str(e)}")
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection"""
+        try:
+            drain.unregister(self)
+            if not hasattr(self, 'room_group_name'):
+                # Rejected before joining a room (e.g. while draining)
+                return
+            await self.leave_room(close_code)
 
         except Exception as e:
             print(f"Unexpected error in disconnect: {str(e)}")
 
-    async def receive(self, text_data):
-        """Handle messages received from WebSocket"""
+    async def leave_room(self, close_code):
+        """Tell the others this socket is gone and leave the room group"""
+        print(f"WebSocket disconnecting from room: {self.room_id}, close code: {close_code}")
+        
+        # Remove user from the room's sockets
+        last = presence.remove(self.room_id, self.user_id)
+
+        if self.spotlight is not None:
+            previous = list(self.spotlight.active)
+            # A freed seat goes to the loudest remaining socket
+            if self.spotlight.remove(self.user_id, presence.members(self.room_id)):
+                await self.announce_spotlight(previous, exclude=self.user_id)
+            if last:
+                spotlight.discard(self.room_id)
+        
+        # Notify others BEFORE leaving the group
+        await self.room_send({
+            'type': 'user_left_notification',
+            'userId': self.user_id,
+            'sender_channel': self.channel_name
+        })
+        
+        events.record(self.room_id, 'disconnect', self.user_id, code=close_code)
+
+        # The room stays live for IDLE_SECONDS after its last socket leaves
+        await database_sync_to_async(reaper.touch)([self.room_id])
+
+        # Leave room group
+        await self.channel_layer.group_discard(
+            self.room_group_name,
+            self.channel_name
+        )
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Validate a client frame and dispatch it through frames.VIDEO_ROOM_FRAMES"""
+        try:
+            if text_data is None:
+                raise frames.FrameError(frames.BAD_JSON)
+            spec, data = frames.decode(text_data)
+        except frames.FrameError as e:
+            await self.send_error(e.code, e.field)
+            return
+
+        await self.dispatch_frame(spec, data)
+
+    async def dispatch_frame(self, spec, data):
+        """Run the handler for a decoded frame"""
         try:
-            data = json.loads(text_data)
-            message_type = data.get('type', '')
-            
-            print(f"Received message type '{message_type}' from user {self.user_id}")
-            
             # Add sender info
             data['senderUserId'] = self.user_id
             data['sender_channel'] = self.channel_name
-            
-            # Route message based on type
-            if message_type == 'offer':
-                await self.handle_offer(data)
-            elif message_type == 'answer':
-                await self.handle_answer(data)
-            elif message_type == 'ice_candidate':
-                await self.handle_ice_candidate(data)
-            elif message_type == 'chat_message':
-                await self.handle_chat_message(data)
-            else:
-                print(f"Unknown message type: {message_type}")
-
-        except json.JSONDecodeError:
-            print("Invalid JSON received")
-            await self.send(text_data=json.dumps({'error': 'Invalid JSON format'}))
+
+            if spec.event:
+                events.record(self.room_id, spec.event, self.user_id, peer=data.get('targetUserId'))
+
+            await getattr(self, spec.handler)(data)
+
         except Exception as e:
             print(f"Error processing received message: {str(e)}")
 
+    async def send_error(self, code, field=None):
+        await self.send(text_data=json.dumps(frames.FrameError(code, field).as_message(), separators=(',', ':')))
+
+    async def room_send(self, event):
+        """group_send to this room; room_id lets a multiplexed socket route the event"""
+        await self.channel_layer.group_send(self.room_group_name, {**event, 'room_id': self.room_id})
+
+    async def forward_signal(self, event, trace):
+        """room_send an offer, answer or ICE candidate with its trace, timing our hops"""
+        if trace is None:
+            await self.room_send(event)
+            return
+        tracing.forwarding(trace)
+        await self.room_send({**event, 'trace': trace})
+        tracing.forwarded(trace)
+
+    async def deliver_signal(self, frame, event):
+        """Send a signaling frame to this socket; returns its trace, if it has one"""
+        trace = event.get('trace')
+        if trace is not None:
+            trace = tracing.delivering(trace)
+            frame['trace'] = tracing.for_client(trace)
+        await self.send(text_data=json.dumps(frame))
+        if trace is not None:
+            tracing.delivered(trace)
+        return trace
+
+    def signaling_allowed(self, target_user_id):
+        return self.spotlight is None or self.spotlight.pair_allowed(self.user_id, target_user_id)
+
+    async def announce_spotlight(self, previous, exclude=None):
+        """
+        Tell every socket how the active set moved so it can renegotiate.
+        exclude is a socket joining or leaving, whose pairs are set up by
+        user_joined/user_left instead.
+        """
+        await self.room_send({
+            'type': 'spotlight_update',
+            'active': list(self.spotlight.active),
+            'previous': previous,
+            'exclude': exclude,
+        })
+
     async def handle_offer(self, data):
         """Handle WebRTC offer"""
+        trace = tracing.start(data)
         target_user_id = data.get('targetUserId')
         if not target_user_id:
             print("No target user ID in offer")
             return
+        if not self.signaling_allowed(target_user_id):
+            await self.send_error(frames.FORBIDDEN, 'targetUserId')
+            return
             
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'webrtc_offer',
-                'offer': data.get('offer'),
-                'sender_user_id': self.user_id,
-                'target_user_id': target_user_id,
-                'sender_channel': self.channel_name
-            }
-        )
+        await self.forward_signal({
+            'type': 'webrtc_offer',
+            'offer': data.get('offer'),
+            'sender_user_id': self.user_id,
+            'target_user_id': target_user_id,
+            'sender_channel': self.channel_name
+        }, trace)
 
     async def handle_answer(self, data):
         """Handle WebRTC answer"""
+        trace = tracing.start(data)
         target_user_id = data.get('targetUserId')
         if not target_user_id:
             print("No target user ID in answer")
             return
+        if not self.signaling_allowed(target_user_id):
+            await self.send_error(frames.FORBIDDEN, 'targetUserId')
+            return
             
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'webrtc_answer',
-                'answer': data.get('answer'),
-                'sender_user_id': self.user_id,
-                'target_user_id': target_user_id,
-                'sender_channel': self.channel_name
-            }
-        )
+        await self.forward_signal({
+            'type': 'webrtc_answer',
+            'answer': data.get('answer'),
+            'sender_user_id': self.user_id,
+            'target_user_id': target_user_id,
+            'sender_channel': self.channel_name,
+            # Goes back to the offerer, which records the whole negotiation
+            'offer_trace': self.offer_traces.pop(target_user_id, None) if self.offer_traces else None
+        }, trace)
 
     async def handle_ice_candidate(self, data):
         """Handle ICE candidate"""
+        trace = tracing.start(data)
         target_user_id = data.get('targetUserId')
         if not target_user_id:
             print("No target user ID in ICE candidate")
             return
+        if not self.signaling_allowed(target_user_id):
+            # Late candidates for a pair that was just hung up
+            return
             
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'webrtc_ice',
-                'candidate': data.get('candidate'),
-                'sender_user_id': self.user_id,
-                'target_user_id': target_user_id,
-                'sender_channel': self.channel_name
-            }
-        )
+        await self.forward_signal({
+            'type': 'webrtc_ice',
+            'candidate': data.get('candidate'),
+            'sender_user_id': self.user_id,
+            'target_user_id': target_user_id,
+            'sender_channel': self.channel_name
+        }, trace)
 
     async def handle_chat_message(self, data):
-        """Handle chat message"""
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message_broadcast',
-                'message': data.get('message', ''),
-                'username': data.get('username', 'Anonymous'),
-                'sender_channel': self.channel_name
-            }
+        """Store a chat message under the next seq and broadcast it"""
+        message, created = await database_sync_to_async(chat.post)(
+            self.room_id,
+            self.user_id,
+            data.get('message', ''),
+            username=data.get('username', 'Anonymous'),
+            client_id=data.get('clientId', ''),
         )
+        if message is None:
+            return
+        if not created:
+            # A resend of a message we already have: ack it, don't repeat it
+            await self.send(text_data=json.dumps({
+                'type': 'chat_ack',
+                'clientId': message.client_id,
+                'seq': message.seq
+            }))
+            return
+        # The sender's own copy of the broadcast doubles as its ack
+        await self.room_send({
+            'type': 'chat_message_broadcast',
+            **chat.encode(message),
+            'sender_channel': self.channel_name
+        })
+
+    async def handle_chat_ack(self, data):
+        """Cumulative ack; reopens pushes if they were paused"""
+        seq = min(data['seq'], self.chat_delivered)
+        if self.chat_acked is None or seq > self.chat_acked:
+            self.chat_acked = seq
+        if self.chat_paused and self.chat_delivered - self.chat_acked < chat.get_setting('MAX_UNACKED'):
+            self.chat_paused = False
+
+    async def handle_chat_sync(self, data):
+        """Send the messages after seq `after`, a page at a time"""
+        messages, more = await database_sync_to_async(chat.history)(self.room_id, data['after'])
+        if messages:
+            self.chat_delivered = max(self.chat_delivered, messages[-1].seq)
+        await self.send(text_data=json.dumps({
+            'type': 'chat_history',
+            'messages': [chat.encode(message) for message in messages],
+            'more': more
+        }))
+
+    async def handle_audio_level(self, data):
+        """Fold in this socket's microphone level (spotlight rooms)"""
+        if self.spotlight is None:
+            return
+        previous = list(self.spotlight.active)
+        if self.spotlight.report(self.user_id, data['level']):
+            await self.announce_spotlight(previous)
+
+    async def handle_pin(self, data):
+        """Host pins or unpins a socket into the active set (spotlight rooms)"""
+        if self.spotlight is None or not self.is_host:
+            await self.send_error(frames.FORBIDDEN)
+            return
+        if data['userId'] not in presence.members(self.room_id):
+            await self.send_error(frames.BAD_FIELD, 'userId')
+            return
+        previous = list(self.spotlight.active)
+        self.spotlight.pin(data['userId'], data['pinned'])
+        if self.spotlight.active != previous:
+            await self.announce_spotlight(previous)
+
+    async def handle_ephemeral(self, data):
+        """Typing, reactions and the like: coalesced per tick, never stored"""
+        if data['kind'] not in ephemeral.get_setting('KINDS'):
+            await self.send_error(frames.BAD_FIELD, 'kind')
+            return
+        ephemeral.note(self.room_id, self.user_id, data['kind'], data.get('value'))
+
+    async def send_migrate(self, reconnect_after_ms):
+        """Ask the client to reconnect to another node after a delay"""
+        await self.send(text_data=json.dumps({
+            'type': 'migrate',
+            'reconnect_after_ms': reconnect_after_ms,
+            'message': 'Server is restarting, please reconnect'
+        }))
 
     # Group message handlers
     async def webrtc_offer(self, event):
         """Send offer to specific target user"""
         if self.user_id == event['target_user_id']:
-            await self.send(text_data=json.dumps({
+            trace = await self.deliver_signal({
                 'type': 'offer',
                 'offer': event['offer'],
                 'userId': event['sender_user_id']
-            }))
+            }, event)
+            if trace is not None:
+                if self.offer_traces is None:
+                    self.offer_traces = {}
+                self.offer_traces[event['sender_user_id']] = trace
 
     async def webrtc_answer(self, event):
         """Send answer to specific target user"""
         if self.user_id == event['target_user_id']:
-            await self.send(text_data=json.dumps({
+            trace = await self.deliver_signal({
                 'type': 'answer',
                 'answer': event['answer'],
                 'userId': event['sender_user_id']
-            }))
+            }, event)
+            if trace is not None and event.get('offer_trace'):
+                tracing.negotiated(self.room_id, self.user_id, event['sender_user_id'], event['offer_trace'], trace)
 
     async def webrtc_ice(self, event):
         """Send ICE candidate to specific target user"""
         if self.user_id == event['target_user_id']:
-            await self.send(text_data=json.dumps({
+            await self.deliver_signal({
                 'type': 'ice_candidate',
                 'candidate': event['candidate'],
                 'userId': event['sender_user_id']
-            }))
+            }, event)
 
     async def user_joined_notification(self, event):
         """Notify about new user (exclude sender)"""
-        if event['sender_channel'] != self.channel_name:
+        if event['sender_channel'] != self.channel_name and self.signaling_allowed(event['userId']):
             await self.send(text_data=json.dumps({
                 'type': 'user_joined',
                 'userId': event['userId'],
@@ -284,12 +450,28 @@ class VideoRoomConsumer(AsyncWebsocketConsumer):
 
     async def user_left_notification(self, event):
         """Notify about user leaving (exclude sender)"""
+        if self.offer_traces:
+            self.offer_traces.pop(event['userId'], None)
         if event['sender_channel'] != self.channel_name:
             await self.send(text_data=json.dumps({
                 'type': 'user_left',
                 'userId': event['userId']
             }))
 
+    async def spotlight_update(self, event):
+        """Send the new active set with the peers to offer to and hang up on"""
+        peers = [
+            peer for peer in presence.members(self.room_id)
+            if peer not in (self.user_id, event['exclude'])
+        ]
+        connect, disconnect = spotlight.changes(self.user_id, peers, event['previous'], event['active'])
+        await self.send(text_data=json.dumps({
+            'type': 'spotlight',
+            'active': event['active'],
+            'connect': connect,
+            'disconnect': disconnect
+        }))
+
     async def participant_update(self, event):
         """Send participant count update to all"""
         await self.send(text_data=json.dumps({
@@ -299,9 +481,82 @@ class VideoRoomConsumer(AsyncWebsocketConsumer):
         }))
 
     async def chat_message_broadcast(self, event):
-        """Broadcast chat message to all"""
+        """Broadcast chat message to all, filling any gap this socket missed"""
+        seq = event['seq']
+        if seq <= self.chat_delivered:
+            return  # already sent by a gap fill or chat_sync
+        if self.chat_acked is not None and self.chat_delivered - self.chat_acked >= chat.get_setting('MAX_UNACKED'):
+            if not self.chat_paused:
+                self.chat_paused = True
+                await self.send(text_data=json.dumps({'type': 'chat_pending', 'latest': seq}))
+            return
+
+        missed = []
+        if seq > self.chat_delivered + 1:
+            missed, more = await database_sync_to_async(chat.history)(self.room_id, self.chat_delivered, before=seq)
+            if more:
+                # Too far behind to fill here; the client pages with chat_sync
+                await self.send(text_data=json.dumps({'type': 'chat_pending', 'latest': seq}))
+                return
+        for message in [chat.encode(message) for message in missed] + [event]:
+            await self.send(text_data=json.dumps({
+                'type': 'chat_message',
+                'seq': message['seq'],
+                'clientId': message['clientId'],
+                'message': message['message'],
+                'username': message['username'],
+                'userId': message['userId'],
+                'sent_at': message['sent_at']
+            }))
+        self.chat_delivered = seq
+
+    async def ephemeral_signals(self, event):
+        """One tick's worth of other sockets' ephemeral signals, unless it is stale"""
+        if not ephemeral.fresh(event):
+            return
+        signals = [signal for signal in event['signals'] if signal['userId'] != self.user_id]
+        if signals:
+            await self.send(text_data=json.dumps({
+                'type': 'ephemeral',
+                'signals': signals
+            }))
+
+    async def file_shared(self, event):
+        """A file finished uploading: send its reference, never its bytes"""
         await self.send(text_data=json.dumps({
-            'type': 'chat_message',
-            'message': event['message'],
-            'username': event['username']
-        }))
\ No newline at end of file
+            'type': 'file_shared',
+            'file': event['file']
+        }))
+
+
+class LobbyConsumer(AsyncWebsocketConsumer):
+    """Pushes a room snapshot on connect, then room created/closed/count deltas"""
+
+    async def connect(self):
+        from .fastpath import aencode_rooms
+        from .models import Room
+
+        if drain.is_draining():
+            await self.close(code=drain.get_setting('CLOSE_CODE'))
+            return
+
+        # Join the group before reading the snapshot so no delta is missed;
+        # deltas carry absolute values, so overlap with the snapshot is harmless
+        await self.channel_layer.group_add(lobby.LOBBY_GROUP, self.channel_name)
+        await self.accept()
+
+        rooms = await aencode_rooms(Room.objects.filter(is_active=True))
+        await self.send(text_data=json.dumps({
+            'type': 'lobby_snapshot',
+            'rooms': rooms
+        }))
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(lobby.LOBBY_GROUP, self.channel_name)
+
+    async def lobby_deltas(self, event):
+        """Forward one coalesced batch of room deltas"""
+        await self.send(text_data=json.dumps({
+            'type': 'lobby_delta',
+            'deltas': event['deltas']
+        }))
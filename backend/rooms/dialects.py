@@ -0,0 +1,19 @@
+"""
+Backend checks for the hand-written conditional UPDATEs in membership.py
+and chat.py.
+"""
+import sqlite3
+
+
+def can_update_returning(connection):
+    """
+    Whether the backend runs UPDATE ... RETURNING: PostgreSQL, and SQLite
+    from 3.35. Django has no feature flag for this one;
+    can_return_columns_from_insert is about INSERT, and MariaDB has
+    INSERT ... RETURNING without the UPDATE form.
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 35)
+    return False
@@ -0,0 +1,129 @@
+"""
+Graceful drain for rolling deploys.
+
+Sending the drain signal (SIGUSR1 by default) to a worker, or calling
+``start_drain()``, makes it refuse new sockets, send every connected client
+a ``migrate`` frame with a randomized reconnect delay, and close the sockets
+in paced batches so reconnects spread across the remaining nodes.
+"""
+import asyncio
+import logging
+import random
+import signal
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SIGNAL': 'SIGUSR1',
+    'BATCH_SIZE': 50,
+    'BATCH_INTERVAL': 1.0,
+    'RECONNECT_DELAY_MIN': 1.0,
+    'RECONNECT_DELAY_MAX': 10.0,
+    'CLOSE_CODE': 4503,
+}
+
+_connections = weakref.WeakSet()
+_draining = False
+_drain_task = None
+_signal_loops = weakref.WeakSet()
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_DRAIN', {}).get(name, DEFAULTS[name])
+
+
+def is_draining():
+    return _draining
+
+
+def register(consumer):
+    """Track a connected consumer so it can be migrated on drain"""
+    _connections.add(consumer)
+
+
+def unregister(consumer):
+    _connections.discard(consumer)
+
+
+def connection_count():
+    return len(_connections)
+
+
+def connected():
+    """The consumers currently connected to this process"""
+    return list(_connections)
+
+
+async def drain():
+    """Stop accepting sockets and migrate the connected ones in batches"""
+    global _draining
+    _draining = True
+
+    batch_size = max(1, int(get_setting('BATCH_SIZE')))
+    interval = get_setting('BATCH_INTERVAL')
+    delay_min = get_setting('RECONNECT_DELAY_MIN')
+    delay_max = get_setting('RECONNECT_DELAY_MAX')
+    close_code = get_setting('CLOSE_CODE')
+
+    pending = list(_connections)
+    random.shuffle(pending)
+    logger.info("Draining %d sockets in batches of %d", len(pending), batch_size)
+
+    for start in range(0, len(pending), batch_size):
+        if not _draining:
+            logger.info("Drain cancelled with %d sockets left", len(pending) - start)
+            return
+        batch = pending[start:start + batch_size]
+        await asyncio.gather(
+            *(_migrate(consumer, random.uniform(delay_min, delay_max), close_code) for consumer in batch),
+            return_exceptions=True
+        )
+        if start + batch_size < len(pending) and interval:
+            await asyncio.sleep(interval)
+
+    logger.info("Drain complete")
+
+
+async def _migrate(consumer, delay, close_code):
+    unregister(consumer)
+    try:
+        await consumer.send_migrate(int(delay * 1000))
+    finally:
+        await consumer.close(code=close_code)
+
+
+def start_drain():
+    """Schedule a drain on the running event loop (safe to call repeatedly)"""
+    global _drain_task
+    if _drain_task is not None and not _drain_task.done():
+        return _drain_task
+    _drain_task = asyncio.get_running_loop().create_task(drain())
+    return _drain_task
+
+
+def cancel_drain():
+    """Abort an in-progress drain and accept sockets again"""
+    global _draining, _drain_task
+    _draining = False
+    if _drain_task is not None and not _drain_task.done():
+        _drain_task.cancel()
+    _drain_task = None
+
+
+def install_signal_handler():
+    """Hook the drain signal into the current event loop once per loop"""
+    loop = asyncio.get_running_loop()
+    if loop in _signal_loops:
+        return
+    _signal_loops.add(loop)
+    signum = getattr(signal, get_setting('SIGNAL'), None)
+    if signum is None:
+        return
+    try:
+        loop.add_signal_handler(signum, start_drain)
+    except (NotImplementedError, RuntimeError, ValueError):
+        # Not supported on this platform or not on the main thread
+        logger.debug("Drain signal handler not installed")
@@ -0,0 +1,59 @@
+"""
+Ephemeral room signals: typing indicators, reactions and the like.
+
+These are lossy by design. Each worker keeps only the latest value per
+(room, socket, kind) and flushes what changed once per TICK_INTERVAL, one
+group message per room, so a burst of keystrokes costs one frame per tick
+instead of one broadcast each. Nothing is stored, sequenced, acked or
+written to the event log, and a batch that reaches a socket more than
+MAX_AGE seconds after it was flushed (stuck behind other traffic) is
+dropped rather than delivered late. Clients treat the latest value as
+state and expire it themselves (a typing indicator that stops updating).
+
+The coalescing is per process: with several workers a room may get one
+batch per tick from each worker that has sockets in it.
+"""
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .coalesce import TickCoalescer
+
+DEFAULTS = {
+    'TICK_INTERVAL': 0.2,
+    'MAX_AGE': 1.0,  # seconds
+    'KINDS': ('typing', 'reaction'),
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_EPHEMERAL', {}).get(name, DEFAULTS[name])
+
+
+async def _flush(batch):
+    rooms = {}
+    for (room_id, user_id, kind), value in batch.items():
+        rooms.setdefault(room_id, []).append({'userId': user_id, 'kind': kind, 'value': value})
+    layer = get_channel_layer()
+    sent_at = time.time()  # wall clock: the receiving worker may be another process
+    for room_id, signals in rooms.items():
+        await layer.group_send(f'room_{room_id}', {
+            'type': 'ephemeral_signals',
+            'room_id': room_id,
+            'signals': signals,
+            'sent_at': sent_at,
+        })
+
+
+_coalescer = TickCoalescer(_flush, lambda: get_setting('TICK_INTERVAL'))
+
+
+def note(room_id, user_id, kind, value):
+    """Queue a signal, replacing any not yet flushed (call from the event loop)"""
+    _coalescer.put((str(room_id), user_id, kind), value)
+
+
+def fresh(event):
+    """False for a batch too old to be worth showing"""
+    return time.time() - event['sent_at'] <= get_setting('MAX_AGE')
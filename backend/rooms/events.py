@@ -0,0 +1,238 @@
+"""
+Append-only, per-room event log for analytics.
+
+The video consumer calls record() for every socket event (connect,
+disconnect, offer, answer, ice, chat). record() only puts the event on a
+bounded in-memory queue and never blocks; when the queue is full the event is
+dropped and counted. A daemon thread drains the queue in batches into the
+configured backend:
+
+file   Local segmented log: DIR/<room_id>/<segment>.jsonl, a new segment every
+       SEGMENT_BYTES, only the newest MAX_SEGMENTS kept. A stand-in for a
+       single node; several workers appending to one DIR can interleave
+       segment rotation.
+redis  One Redis stream per room (XADD with an approximate MAXLEN).
+
+Events carry no message bodies or SDP, only who did what and when. They are
+rolled up into tables by rooms/analytics.py (``manage.py rollup_room_events``).
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'file',
+    'DIR': 'room_events',
+    'SEGMENT_BYTES': 1024 * 1024,
+    'MAX_SEGMENTS': 8,
+    'REDIS_URL': 'redis://127.0.0.1:6379/1',
+    'MAX_LEN': 10000,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_EVENTS', {}).get(name, DEFAULTS[name])
+
+
+class FileEventLog:
+    """Segmented JSON-lines files per room; positions are 'segment:offset'"""
+
+    def __init__(self, directory, segment_bytes, max_segments):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+
+    def _room_dir(self, room_id):
+        return self.directory / str(room_id)
+
+    def _segments(self, room_dir):
+        try:
+            return sorted(int(path.stem) for path in room_dir.glob('*.jsonl'))
+        except FileNotFoundError:
+            return []
+
+    def _segment_path(self, room_dir, number):
+        return room_dir / f'{number:010d}.jsonl'
+
+    def append_many(self, room_id, events):
+        room_dir = self._room_dir(room_id)
+        room_dir.mkdir(parents=True, exist_ok=True)
+        segments = self._segments(room_dir) or [0]
+        current = self._segment_path(room_dir, segments[-1])
+        if current.exists() and current.stat().st_size >= self.segment_bytes:
+            segments.append(segments[-1] + 1)
+            current = self._segment_path(room_dir, segments[-1])
+
+        data = ''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in events)
+        with open(current, 'a', encoding='utf-8') as log:
+            log.write(data)
+
+        for number in segments[:-self.max_segments]:
+            try:
+                os.remove(self._segment_path(room_dir, number))
+            except FileNotFoundError:
+                pass
+
+    def rooms(self):
+        if not self.directory.exists():
+            return []
+        return sorted(path.name for path in self.directory.iterdir() if path.is_dir())
+
+    def read(self, room_id, position=None, limit=1000):
+        """Events after position, and the position to resume from"""
+        room_dir = self._room_dir(room_id)
+        segments = self._segments(room_dir)
+        if not segments:
+            return [], position
+
+        segment, offset = (int(part) for part in position.split(':')) if position else (segments[0], 0)
+        if segment < segments[0]:
+            logger.warning("Room %s events before segment %d were dropped by the cap", room_id, segments[0])
+            segment, offset = segments[0], 0
+
+        events = []
+        for number in segments:
+            if number < segment:
+                continue
+            if number > segment:
+                segment, offset = number, 0
+            with open(self._segment_path(room_dir, number), 'rb') as log:
+                log.seek(offset)
+                for line in log:
+                    if not line.endswith(b'\n'):
+                        # Partially written tail; pick it up next time
+                        break
+                    offset += len(line)
+                    events.append(json.loads(line))
+                    if len(events) >= limit:
+                        return events, f'{segment}:{offset}'
+        return events, f'{segment}:{offset}'
+
+
+class RedisEventLog:
+    """One capped stream per room; positions are stream ids"""
+    ROOMS_KEY = 'room-events:rooms'
+
+    def __init__(self, url, max_len):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.max_len = max_len
+
+    def _key(self, room_id):
+        return f'room-events:{room_id}'
+
+    def append_many(self, room_id, events):
+        pipeline = self.client.pipeline(transaction=False)
+        for event in events:
+            pipeline.xadd(self._key(room_id), {'e': json.dumps(event, separators=(',', ':'))},
+                          maxlen=self.max_len, approximate=True)
+        pipeline.sadd(self.ROOMS_KEY, str(room_id))
+        pipeline.execute()
+
+    def rooms(self):
+        return sorted(room_id.decode() for room_id in self.client.smembers(self.ROOMS_KEY))
+
+    def read(self, room_id, position=None, limit=1000):
+        start = f'({position}' if position else '-'
+        entries = self.client.xrange(self._key(room_id), min=start, count=limit)
+        if not entries:
+            return [], position
+        events = [json.loads(fields[b'e']) for _, fields in entries]
+        return events, entries[-1][0].decode()
+
+
+_backends = {}
+
+
+def get_backend():
+    """The configured backend, built once per configuration"""
+    if get_setting('BACKEND') == 'redis':
+        key = ('redis', get_setting('REDIS_URL'), get_setting('MAX_LEN'))
+        if key not in _backends:
+            _backends[key] = RedisEventLog(*key[1:])
+        return _backends[key]
+
+    directory = Path(get_setting('DIR'))
+    if not directory.is_absolute():
+        directory = Path(settings.BASE_DIR) / directory
+    key = ('file', directory, get_setting('SEGMENT_BYTES'), get_setting('MAX_SEGMENTS'))
+    if key not in _backends:
+        _backends[key] = FileEventLog(*key[1:])
+    return _backends[key]
+
+
+class EventWriter:
+    """Bounded queue plus a background thread writing batches to the backend"""
+
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=get_setting('QUEUE_SIZE'))
+                self._thread = threading.Thread(target=self._run, name='room-events', daemon=True)
+                self._thread.start()
+
+    def put(self, room_id, event):
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put_nowait((room_id, event))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until everything queued so far is written (tests, shutdown)"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _run(self):
+        events_queue = self._queue
+        while True:
+            batch = [events_queue.get()]
+            batch_size = get_setting('BATCH_SIZE')
+            while len(batch) < batch_size:
+                try:
+                    batch.append(events_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.warning("Dropped %d room events: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    events_queue.task_done()
+
+    def _write(self, batch):
+        by_room = {}
+        for room_id, event in batch:
+            by_room.setdefault(room_id, []).append(event)
+        backend = get_backend()
+        for room_id, events in by_room.items():
+            backend.append_many(room_id, events)
+
+
+writer = EventWriter()
+
+
+def record(room_id, event_type, session, **fields):
+    """Queue one event for room_id; never blocks the caller"""
+    if not get_setting('ENABLED'):
+        return
+    writer.put(str(room_id), {'ts': time.time(), 'type': event_type, 'session': session, **fields})
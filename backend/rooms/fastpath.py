@@ -0,0 +1,61 @@
+"""
+Serializer-free encoding for the hot room read endpoints.
+
+Rows are read as values_list() tuples in a single query (host name
+joined) and turned into plain dicts, skipping DRF's per-instance field
+machinery. The output must stay field-for-field identical to
+RoomSerializer; rooms/tests/test_fastpath.py holds the contract.
+"""
+from django.utils import timezone
+
+# RoomSerializer.Meta.fields, in order, and the column each one is read from
+FIELDS = ('id', 'host', 'host_name', 'title', 'participant_count', 'created_at', 'max_participants', 'topology')
+COLUMNS = ('id', 'host_id', 'host__username', 'title', 'participant_count', 'created_at', 'max_participants', 'topology')
+
+
+def room_rows(queryset):
+    """values_list() tuples for the rooms in queryset, in COLUMNS order"""
+    return queryset.values_list(*COLUMNS)
+
+
+def format_datetime(value):
+    # Same output as rest_framework.fields.DateTimeField.to_representation
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def encode_row(row):
+    room_id, host_id, host_name, title, participant_count, created_at, max_participants, topology = row
+    return {
+        'id': str(room_id),
+        'host': host_id,
+        'host_name': host_name,
+        'title': title,
+        'participant_count': participant_count,
+        'created_at': format_datetime(created_at),
+        'max_participants': max_participants,
+        'topology': topology,
+    }
+
+
+def encode_rooms(queryset):
+    return [encode_row(row) for row in room_rows(queryset)]
+
+
+def encode_room(queryset):
+    """Encode the single room in queryset, or return None if there is none"""
+    row = room_rows(queryset).first()
+    return encode_row(row) if row is not None else None
+
+
+async def aencode_rooms(queryset):
+    return [encode_row(row) async for row in room_rows(queryset)]
+
+
+async def aencode_room(queryset):
+    row = await room_rows(queryset).afirst()
+    return encode_row(row) if row is not None else None
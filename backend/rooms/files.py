@@ -0,0 +1,331 @@
+"""
+File sharing in room chat.
+
+Files never travel over the WebSocket. An upload is created with POST
+(name, size and, optionally, the SHA-256 of the content), then the bytes
+are sent in order with PATCH requests carrying an Upload-Offset header;
+each chunk is copied from the request stream to a .part file READ_BYTES at
+a time, so no request holds a whole file (or chunk) in memory. (Under
+ASGI, Django first spools the body to a temporary file, keeping at most
+FILE_UPLOAD_MAX_MEMORY_SIZE of it in memory.) A failed or interrupted
+upload resumes from the offset the server reports.
+
+Only one request at a time may write an upload: append() claims the row
+with a conditional UPDATE (offset matches, no live claim) before touching
+the file and releases it with the new offset afterwards.
+
+Stored content is addressed by its SHA-256 under DIR/blobs, so each
+distinct file is kept once however often it is shared. The hash is
+computed from the bytes received when the last chunk arrives (and checked
+against the one the client declared, if any); a file that turns out to be
+a duplicate is dropped in favour of the stored copy. Every upload sends
+its bytes: completing one from a declared hash alone would let anyone who
+knows a file's hash share it without having it.
+
+Completed files are announced to the room with a small file_shared frame
+(encode()); the bytes are downloaded over HTTP, with Range support, and can
+be handed to the web server with X-Accel-Redirect / X-Sendfile (SENDFILE).
+
+Blobs no longer referenced by any file are deleted when their rooms are
+archived, and uploads left unfinished for UPLOAD_TTL_SECONDS are removed by
+the reaper.
+"""
+import hashlib
+import logging
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'DIR': 'room_files',
+    'MAX_BYTES': 512 * 1024 * 1024,
+    'MAX_CHUNK_BYTES': 16 * 1024 * 1024,
+    'READ_BYTES': 64 * 1024,
+    'CLAIM_SECONDS': 300,  # a writer that has not finished by then is presumed dead
+    'UPLOAD_TTL_SECONDS': 24 * 3600,
+    'SENDFILE': None,  # 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd)
+    'SENDFILE_URL': '/protected/room_files/',  # internal location mapped to DIR, for X-Accel-Redirect
+}
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    """An upload request that cannot be applied; code is the HTTP status"""
+
+    def __init__(self, code, message, offset=None):
+        super().__init__(message)
+        self.code = code
+        self.offset = offset
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_FILES', {}).get(name, DEFAULTS[name])
+
+
+def root():
+    directory = Path(get_setting('DIR'))
+    if not directory.is_absolute():
+        directory = Path(settings.BASE_DIR) / directory
+    return directory
+
+
+def blob_path(sha256):
+    return root() / 'blobs' / sha256[:2] / sha256
+
+
+def part_path(file_id):
+    return root() / 'uploads' / f'{file_id}.part'
+
+
+def valid_sha256(value):
+    return bool(_SHA256_RE.match(value))
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    read_bytes = get_setting('READ_BYTES')
+    with open(path, 'rb') as source:
+        while chunk := source.read(read_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def start(room_id, user, name, size, sha256='', content_type=''):
+    """Create an upload; returns the RoomFile, with nothing received yet"""
+    from .models import RoomFile
+
+    if size > get_setting('MAX_BYTES'):
+        raise UploadError(413, f"Files are limited to {get_setting('MAX_BYTES')} bytes")
+    return RoomFile.objects.create(
+        room_id=room_id, uploaded_by=user, name=name, size=size,
+        sha256=sha256, content_type=content_type,
+    )
+
+
+def _release_claim(file_id, received):
+    from .models import RoomFile
+
+    RoomFile.objects.filter(pk=file_id).update(received=received, writing_until=None)
+
+
+def append(file, offset, stream, length):
+    """
+    Write length bytes from stream at offset; returns the new offset. The
+    upload is finished when the offset reaches the file size.
+    """
+    from .models import RoomFile
+
+    if file.completed_at:
+        raise UploadError(409, "Upload already complete", offset=file.size)
+    if offset + length > file.size:
+        raise UploadError(413, "Chunk goes past the declared size", offset=file.received)
+    if length > get_setting('MAX_CHUNK_BYTES'):
+        raise UploadError(413, f"Chunks are limited to {get_setting('MAX_CHUNK_BYTES')} bytes")
+
+    now = timezone.now()
+    claimed = RoomFile.objects.filter(
+        Q(writing_until__isnull=True) | Q(writing_until__lt=now),
+        pk=file.pk, received=offset, completed_at__isnull=True,
+    ).update(writing_until=now + timedelta(seconds=get_setting('CLAIM_SECONDS')))
+    if not claimed:
+        file.refresh_from_db(fields=['received'])
+        raise UploadError(409, "Offset does not match the upload, or another request is writing it",
+                          offset=file.received)
+
+    path = part_path(file.pk)
+    written = 0
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        read_bytes = get_setting('READ_BYTES')
+        with open(path, 'r+b' if path.exists() else 'wb') as part:
+            # Drop whatever an interrupted request left past the offset
+            part.truncate(offset)
+            part.seek(offset)
+            while written < length:
+                chunk = stream.read(min(read_bytes, length - written))
+                if not chunk:
+                    break
+                part.write(chunk)
+                written += len(chunk)
+            part.flush()
+            os.fsync(part.fileno())
+    except BaseException:
+        _release_claim(file.pk, offset)
+        raise
+    if written < length:
+        # The client went away mid-chunk; keep what arrived
+        _release_claim(file.pk, offset + written)
+        raise UploadError(400, "Request body shorter than Content-Length", offset=offset + written)
+
+    file.received = offset + written
+    if file.received < file.size:
+        _release_claim(file.pk, file.received)
+        return file.received
+
+    try:
+        _finish(file, path)
+    except UploadError:
+        _release_claim(file.pk, 0)
+        raise
+    except BaseException:
+        _release_claim(file.pk, file.received)
+        raise
+    return file.received
+
+
+def _finish(file, path):
+    from .models import RoomFile
+
+    sha256 = _hash_file(path)
+    if file.sha256 and file.sha256 != sha256:
+        path.unlink(missing_ok=True)
+        raise UploadError(422, "Content does not match the declared SHA-256", offset=0)
+
+    blob = blob_path(sha256)
+    if blob.exists():
+        path.unlink()
+    else:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, blob)
+
+    file.sha256 = sha256
+    file.completed_at = timezone.now()
+    file.writing_until = None
+    with transaction.atomic():
+        RoomFile.objects.filter(pk=file.pk).update(
+            sha256=sha256, received=file.received, completed_at=file.completed_at, writing_until=None,
+        )
+        transaction.on_commit(lambda: shared(file))
+
+
+def encode(file):
+    """The wire form of a shared file, as in file_shared frames"""
+    return {
+        'id': str(file.pk),
+        'name': file.name,
+        'size': file.size,
+        'contentType': file.content_type,
+        'sha256': file.sha256,
+        'userId': str(file.uploaded_by_id) if file.uploaded_by_id else None,
+        'url': reverse('room-file-download', kwargs={'room_id': file.room_id, 'file_id': file.pk}),
+        'shared_at': file.completed_at.isoformat(),
+    }
+
+
+def shared(file):
+    """Announce a completed file to the room (a reference, not the bytes)"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(f'room_{file.room_id}', {
+            'type': 'file_shared',
+            'room_id': str(file.room_id),
+            'file': encode(file),
+        })
+    except Exception as e:
+        logger.warning("Failed to announce file %s in room %s: %s", file.pk, file.room_id, e)
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single "bytes=" range, None to send the
+    whole file; raises UploadError(416) for ranges outside it.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or not any(match.groups()):
+        # Absent, malformed or multi-range: the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise UploadError(416, "Empty suffix range")
+        return max(size - length, 0), size - 1
+    start, end = int(first), int(last) if last else size - 1
+    if start >= size or end < start:
+        raise UploadError(416, "Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+class FileSlice:
+    """Reads the bytes [start, end] of a file, for partial responses"""
+
+    def __init__(self, path, start, end):
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def forget_rooms(room_ids):
+    """
+    Before rooms are deleted: once that commits, remove their unfinished
+    uploads' data and any stored content no other room refers to
+    """
+    from .models import RoomFile
+
+    rows = list(RoomFile.objects.filter(room_id__in=room_ids).values_list('pk', 'sha256', 'completed_at'))
+    hashes = {sha256 for _, sha256, completed_at in rows if completed_at}
+    uploads = [file_id for file_id, _, completed_at in rows if not completed_at]
+
+    def remove():
+        for file_id in uploads:
+            part_path(file_id).unlink(missing_ok=True)
+        release_blobs(hashes)
+
+    transaction.on_commit(remove)
+
+
+def release_blobs(hashes):
+    """Delete blobs that no file refers to any more (after their rooms are deleted)"""
+    from .models import RoomFile
+
+    hashes = {sha256 for sha256 in hashes if sha256}
+    if not hashes:
+        return 0
+    in_use = set(RoomFile.objects.filter(sha256__in=hashes).values_list('sha256', flat=True))
+    removed = 0
+    for sha256 in hashes - in_use:
+        try:
+            blob_path(sha256).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def expire_uploads(now=None):
+    """Delete uploads unfinished for UPLOAD_TTL_SECONDS, with their partial data"""
+    from .models import RoomFile
+
+    now = now or timezone.now()
+    stale = RoomFile.objects.filter(
+        Q(writing_until__isnull=True) | Q(writing_until__lt=now),
+        completed_at__isnull=True,
+        created_at__lt=now - timedelta(seconds=get_setting('UPLOAD_TTL_SECONDS')),
+    )
+    ids = list(stale.values_list('pk', flat=True))
+    RoomFile.objects.filter(pk__in=ids, completed_at__isnull=True).delete()
+    for file_id in ids:
+        part_path(file_id).unlink(missing_ok=True)
+    return len(ids)
@@ -0,0 +1,208 @@
+"""
+Validation and dispatch table for client WebSocket frames.
+
+decode() rejects a frame as early as it can, so a bad frame costs at most
+the frame-size limit's worth of work and usually far less:
+
+1. Before decoding: frames longer than MAX_FRAME_CHARS are refused on their
+   length alone. The "type" is then read from the first few characters
+   (clients send it first); an unknown type, or a frame longer than that
+   type's own limit, is refused without parsing.
+2. While decoding: objects with more than MAX_KEYS keys abort the parse,
+   and nesting is bounded by the size limit.
+3. After decoding: the payload is checked against the type's schema (field
+   types, required fields, string lengths).
+
+Failures are reported to the client as ``{"type": "error", "code": ...}``
+with one of the short codes below.
+"""
+import json
+import re
+from collections import namedtuple
+
+from django.conf import settings
+
+# Error codes sent back to the client
+TOO_LARGE = 'too_large'
+BAD_JSON = 'bad_json'
+BAD_TYPE = 'bad_type'
+BAD_FIELD = 'bad_field'
+FORBIDDEN = 'forbidden'
+NOT_FOUND = 'not_found'
+NOT_SUBSCRIBED = 'not_subscribed'
+TOO_MANY_ROOMS = 'too_many_rooms'
+
+DEFAULTS = {
+    'MAX_FRAME_CHARS': 64 * 1024,
+    'MAX_KEYS': 32,
+}
+
+TYPE_PREFIX_CHARS = 64
+_TYPE_RE = re.compile(r'\s*\{\s*"type"\s*:\s*"([A-Za-z_]{1,32})"')
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_FRAMES', {}).get(name, DEFAULTS[name])
+
+
+# kinds: tuple of accepted Python types; max_len applies to str values
+Field = namedtuple('Field', ['kinds', 'required', 'max_len'], defaults=(True, None))
+
+# handler: consumer method name; event: name in the room event log, if recorded
+FrameSpec = namedtuple('FrameSpec', ['handler', 'max_chars', 'fields', 'event'], defaults=(None,))
+
+SESSION_DESCRIPTION = {
+    'type': Field((str,), max_len=16),
+    'sdp': Field((str,), max_len=48 * 1024),
+}
+
+ICE_CANDIDATE = {
+    'candidate': Field((str,), max_len=1024),
+    'sdpMid': Field((str, type(None)), required=False, max_len=64),
+    'sdpMLineIndex': Field((int, type(None)), required=False),
+    'usernameFragment': Field((str, type(None)), required=False, max_len=256),
+}
+
+TARGET = Field((str,), max_len=64)
+
+# Optional on signaling frames (rooms/tracing.py): the client's trace id
+# and its send time in ms since the epoch
+TRACE = {
+    'traceId': Field((str,), required=False, max_len=64),
+    'sentAt': Field((int, float), required=False),
+}
+
+VIDEO_ROOM_FRAMES = {
+    'offer': FrameSpec('handle_offer', 56 * 1024, {
+        'targetUserId': TARGET,
+        'offer': Field((dict,)),
+        **TRACE,
+    }, event='offer'),
+    'answer': FrameSpec('handle_answer', 56 * 1024, {
+        'targetUserId': TARGET,
+        'answer': Field((dict,)),
+        **TRACE,
+    }, event='answer'),
+    'ice_candidate': FrameSpec('handle_ice_candidate', 2 * 1024, {
+        'targetUserId': TARGET,
+        'candidate': Field((dict, type(None))),
+        **TRACE,
+    }, event='ice'),
+    'chat_message': FrameSpec('handle_chat_message', 8 * 1024, {
+        'message': Field((str,), max_len=2000),
+        'username': Field((str,), required=False, max_len=64),
+        'clientId': Field((str,), required=False, max_len=64),
+    }, event='chat'),
+    # Cumulative: the client has every message up to seq
+    'chat_ack': FrameSpec('handle_chat_ack', 128, {
+        'seq': Field((int,)),
+    }),
+    'chat_sync': FrameSpec('handle_chat_sync', 128, {
+        'after': Field((int,)),
+    }),
+    # Spotlight rooms only (rooms/spotlight.py)
+    'audio_level': FrameSpec('handle_audio_level', 256, {
+        'level': Field((int, float)),
+    }),
+    'pin': FrameSpec('handle_pin', 256, {
+        'userId': TARGET,
+        'pinned': Field((bool,)),
+    }),
+    # Lossy and coalesced per tick, never stored (rooms/ephemeral.py)
+    'ephemeral': FrameSpec('handle_ephemeral', 256, {
+        'kind': Field((str,), max_len=16),
+        'value': Field((bool, str, type(None)), required=False, max_len=32),
+    }),
+}
+
+ROOM = Field((str,), max_len=64)
+
+# The multiplexed socket (rooms/multiplex.py): every room frame also names
+# its room, and subscribe/unsubscribe manage the rooms being watched
+MULTIPLEX_FRAMES = {
+    **{
+        name: spec._replace(fields={**spec.fields, 'room': ROOM})
+        for name, spec in VIDEO_ROOM_FRAMES.items()
+    },
+    'subscribe': FrameSpec('subscribe', 256, {'room': ROOM}),
+    'unsubscribe': FrameSpec('unsubscribe', 256, {'room': ROOM}),
+}
+
+# Nested objects validated after the top level
+NESTED = {
+    'offer': SESSION_DESCRIPTION,
+    'answer': SESSION_DESCRIPTION,
+    'candidate': ICE_CANDIDATE,
+}
+
+
+class FrameError(Exception):
+
+    def __init__(self, code, field=None):
+        super().__init__(code)
+        self.code = code
+        self.field = field
+
+    def as_message(self):
+        message = {'type': 'error', 'code': self.code}
+        if self.field:
+            message['field'] = self.field
+        return message
+
+
+def _limited_object(max_keys):
+    def hook(pairs):
+        if len(pairs) > max_keys:
+            raise FrameError(TOO_LARGE)
+        return dict(pairs)
+    return hook
+
+
+def check_fields(payload, fields, prefix=''):
+    for name, field in fields.items():
+        if name not in payload:
+            if field.required:
+                raise FrameError(BAD_FIELD, prefix + name)
+            continue
+        value = payload[name]
+        # bool is an int subclass; never accept it for a number
+        if not isinstance(value, field.kinds) or (isinstance(value, bool) and bool not in field.kinds):
+            raise FrameError(BAD_FIELD, prefix + name)
+        if field.max_len is not None and isinstance(value, str) and len(value) > field.max_len:
+            raise FrameError(BAD_FIELD, prefix + name)
+        if isinstance(value, dict) and name in NESTED:
+            check_fields(value, NESTED[name], prefix=f'{prefix}{name}.')
+
+
+def decode(text_data, table=VIDEO_ROOM_FRAMES):
+    """Return (spec, payload) for a valid frame or raise FrameError"""
+    if not isinstance(text_data, str) or len(text_data) > get_setting('MAX_FRAME_CHARS'):
+        raise FrameError(TOO_LARGE)
+
+    match = _TYPE_RE.match(text_data, 0, TYPE_PREFIX_CHARS)
+    if match is not None:
+        spec = table.get(match.group(1))
+        if spec is None:
+            raise FrameError(BAD_TYPE)
+        if len(text_data) > spec.max_chars:
+            raise FrameError(TOO_LARGE)
+
+    try:
+        payload = json.loads(text_data, object_pairs_hook=_limited_object(get_setting('MAX_KEYS')))
+    except FrameError:
+        raise
+    except (ValueError, RecursionError):
+        raise FrameError(BAD_JSON)
+
+    if not isinstance(payload, dict):
+        raise FrameError(BAD_JSON)
+    frame_type = payload.get('type')
+    spec = table.get(frame_type) if isinstance(frame_type, str) else None
+    if spec is None or (match is not None and frame_type != match.group(1)):
+        # A repeated "type" key must not dodge the limit checked above
+        raise FrameError(BAD_TYPE)
+    if match is None and len(text_data) > spec.max_chars:
+        raise FrameError(TOO_LARGE)
+
+    check_fields(payload, spec.fields)
+    return spec, payload
@@ -0,0 +1,92 @@
+"""
+Live lobby feed.
+
+Lobby sockets get one snapshot of the active rooms on connect, then only
+deltas: room created, room closed and participant count changed. Count
+changes coming from VideoRoomConsumer are coalesced per room and flushed to
+the lobby group once per tick, so lobby traffic scales with changes rather
+than with viewers x rooms.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .coalesce import TickCoalescer
+
+logger = logging.getLogger(__name__)
+
+LOBBY_GROUP = 'lobby'
+
+DEFAULTS = {
+    'TICK_INTERVAL': 0.5,
+}
+
+# Delta precedence when several events for one room land in the same tick
+_PRECEDENCE = {'count': 0, 'created': 1, 'closed': 2}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_LOBBY', {}).get(name, DEFAULTS[name])
+
+
+def _merge(old, new):
+    if _PRECEDENCE[new['event']] >= _PRECEDENCE[old['event']]:
+        merged = {**old, **new} if new['event'] != 'closed' else new
+    else:
+        merged = {**old, 'participant_count': new['participant_count']}
+        if 'room' in merged:
+            merged['room'] = {**merged['room'], 'participant_count': new['participant_count']}
+    return merged
+
+
+async def _flush(batch):
+    await get_channel_layer().group_send(LOBBY_GROUP, {
+        'type': 'lobby_deltas',
+        'deltas': list(batch.values()),
+    })
+
+
+_coalescer = TickCoalescer(_flush, lambda: get_setting('TICK_INTERVAL'), merge=_merge)
+
+
+def created_delta(room_payload):
+    return {
+        'event': 'created',
+        'room_id': room_payload['id'],
+        'participant_count': room_payload['participant_count'],
+        'room': room_payload,
+    }
+
+
+def closed_delta(room_id):
+    return {'event': 'closed', 'room_id': str(room_id)}
+
+
+def count_delta(room_id, participant_count):
+    return {'event': 'count', 'room_id': str(room_id), 'participant_count': participant_count}
+
+
+def note_count_changed(room_id, participant_count):
+    """Queue a participant count delta (call from the event loop)"""
+    delta = count_delta(room_id, participant_count)
+    _coalescer.put(delta['room_id'], delta)
+
+
+def note_room_created(room_payload):
+    """Queue a room created delta (call from the event loop)"""
+    delta = created_delta(room_payload)
+    _coalescer.put(delta['room_id'], delta)
+
+
+def publish(deltas):
+    """Send deltas to the lobby straight away, from synchronous code"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(LOBBY_GROUP, {
+            'type': 'lobby_deltas',
+            'deltas': deltas,
+        })
+    except Exception as e:
+        # The lobby is best effort; never fail the write that triggered it
+        logger.warning("Failed to publish lobby deltas: %s", e)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from rooms import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Add chat messages not yet in the full-text index. New messages are indexed "
+        "as they are written; this backfills existing ones or catches up after a failure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.get_setting('INDEX_BATCH'))
+        parser.add_argument('--optimize', action='store_true', help="Merge the index afterwards (SQLite)")
+
+    def handle(self, *args, **options):
+        added = search.index_pending(batch_size=options['batch_size'])
+        if options['optimize']:
+            search.optimize()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {added} chat messages"))
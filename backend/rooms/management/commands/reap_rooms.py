@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rooms import reaper
+
+
+class Command(BaseCommand):
+    help = (
+        "Close rooms that have been idle for ROOM_REAPER['IDLE_SECONDS'] and archive "
+        "closed ones older than ROOM_REAPER['ARCHIVE_AFTER_SECONDS']. Run it on a "
+        "schedule, or keep it running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--no-archive', action='store_true', help="Only close idle rooms")
+        parser.add_argument('--loop', action='store_true', help="Repeat every ROOM_REAPER['INTERVAL'] seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            closed, archived = reaper.reap(batch_size=options['batch_size'], archive=not options['no_archive'])
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} idle rooms, archived {archived}"))
+            if not options['loop']:
+                break
+            time.sleep(reaper.get_setting('INTERVAL'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from rooms import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the room event log up into session duration, time-to-connect and "
+        "peak concurrency tables. Safe to run repeatedly (e.g. every few minutes from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=analytics.DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        counts = analytics.rollup(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {sum(counts.values())} events from {len(counts)} rooms"
+        ))
@@ -0,0 +1,174 @@
+"""
+Joining and leaving rooms.
+
+A join takes a seat with one conditional UPDATE (active, under capacity, not
+already a member) that returns the room payload, then INSERTs the membership
+in the same transaction; nothing is read first and no row is locked up front,
+so capacity holds under concurrent joiners. A leave is one UPDATE setting
+left_at plus an F() decrement. Count changes are announced after commit to
+the room's sockets, the lobby and the ETag versions.
+"""
+import logging
+from collections import namedtuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from . import dialects, lobby, versioning
+from .models import Room, RoomMembership, User
+
+logger = logging.getLogger(__name__)
+
+
+def active_members(room_id):
+    """Users in the room right now (unique_active_membership index)"""
+    return User.objects.filter(
+        room_memberships__room_id=room_id,
+        room_memberships__left_at__isnull=True,
+    )
+
+
+def rooms_for_user(user):
+    """Rooms the user is in right now (active_membership_user_idx)"""
+    return Room.objects.filter(
+        memberships__user=user,
+        memberships__left_at__isnull=True,
+    )
+
+
+def is_member(room_id, user):
+    """Whether the user is in the room right now"""
+    return RoomMembership.objects.active().filter(room_id=room_id, user=user).exists()
+
+
+JOINED = 'joined'
+ALREADY_JOINED = 'already_joined'
+ROOM_FULL = 'room_full'
+NOT_FOUND = 'not_found'
+
+JoinedRoom = namedtuple('JoinedRoom', ['id', 'title', 'host_name', 'participant_count', 'max_participants'])
+
+
+def _take_seat_sql(returning):
+    qn = connection.ops.quote_name
+    room = Room._meta.db_table
+    membership = RoomMembership._meta.db_table
+    user = User._meta.db_table
+    sql = f"""
+        UPDATE {qn(room)}
+           SET {qn('participant_count')} = {qn('participant_count')} + 1,
+               {qn('last_activity_at')} = %s
+         WHERE {qn('id')} = %s
+           AND {qn('is_active')}
+           AND {qn('participant_count')} < {qn('max_participants')}
+           AND NOT EXISTS (
+               SELECT 1 FROM {qn(membership)} m
+                WHERE m.{qn('room_id')} = {qn(room)}.{qn('id')}
+                  AND m.{qn('user_id')} = %s
+                  AND m.{qn('left_at')} IS NULL
+           )
+    """
+    if returning:
+        sql += f"""
+        RETURNING {qn('title')},
+                  (SELECT u.{qn('username')} FROM {qn(user)} u WHERE u.{qn('id')} = {qn(room)}.{qn('host_id')}),
+                  {qn('participant_count')},
+                  {qn('max_participants')}
+        """
+    return sql
+
+
+def _take_seat(room_id, user):
+    """The conditional increment; returns the room row, or None if no seat was taken"""
+    room_id = Room._meta.pk.get_db_prep_value(room_id, connection)
+    now = Room._meta.get_field('last_activity_at').get_db_prep_value(timezone.now(), connection)
+    params = [now, room_id, user.pk]
+    with connection.cursor() as cursor:
+        if dialects.can_update_returning(connection):
+            cursor.execute(_take_seat_sql(returning=True), params)
+            row = cursor.fetchone()
+        else:
+            # No RETURNING on this backend: same guarded statement, then read
+            # the row back inside the same transaction
+            cursor.execute(_take_seat_sql(returning=False), params)
+            row = None
+            if cursor.rowcount:
+                row = Room.objects.filter(pk=room_id).values_list(
+                    'title', 'host__username', 'participant_count', 'max_participants'
+                ).first()
+    return row
+
+
+def _refusal(room_id, user):
+    """Why a seat was not taken; only read on the failure path"""
+    row = (
+        Room.objects
+        .filter(pk=room_id, is_active=True)
+        .annotate(is_member=Exists(
+            RoomMembership.objects.active().filter(room_id=OuterRef('pk'), user=user)
+        ))
+        .values_list('is_member', flat=True)
+        .first()
+    )
+    if row is None:
+        return NOT_FOUND
+    return ALREADY_JOINED if row else ROOM_FULL
+
+
+def join(room_id, user):
+    """
+    Take a seat and open a membership in one transaction.
+
+    Returns (outcome, JoinedRoom or None); outcome is JOINED, ALREADY_JOINED,
+    ROOM_FULL or NOT_FOUND.
+    """
+    try:
+        with transaction.atomic():
+            row = _take_seat(room_id, user)
+            if row is not None:
+                RoomMembership.objects.create(room_id=room_id, user=user)
+    except IntegrityError:
+        # A concurrent join by the same user won the active-membership slot;
+        # our increment was rolled back with it
+        return ALREADY_JOINED, None
+
+    if row is None:
+        return _refusal(room_id, user), None
+
+    room = JoinedRoom(room_id, *row)
+    transaction.on_commit(lambda: count_changed(room_id, room.participant_count))
+    return JOINED, room
+
+
+def leave(room_id, user):
+    """Close the user's active membership; returns False if there was none"""
+    now = timezone.now()
+    with transaction.atomic():
+        left = RoomMembership.objects.active().filter(room_id=room_id, user=user).update(left_at=now)
+        if not left:
+            return False
+        Room.objects.filter(pk=room_id).update(
+            participant_count=F('participant_count') - left,
+            last_activity_at=now,
+        )
+        count = Room.objects.filter(pk=room_id).values_list('participant_count', flat=True).first()
+    transaction.on_commit(lambda: count_changed(room_id, count))
+    return True
+
+
+def count_changed(room_id, participant_count):
+    """Tell everyone who caches or displays the participant count"""
+    versioning.bump_room(room_id)
+    lobby.publish([lobby.count_delta(room_id, participant_count)])
+    try:
+        async_to_sync(get_channel_layer().group_send)(f'room_{room_id}', {
+            'type': 'participant_update',
+            'room_id': str(room_id),
+            'participant_count': participant_count,
+            'message': f'Total participants: {participant_count}'
+        })
+    except Exception as e:
+        logger.warning("Failed to send participant update for room %s: %s", room_id, e)
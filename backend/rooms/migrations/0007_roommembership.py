@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copy_participants(apps, schema_editor):
+    """Turn every existing participants row into an active membership"""
+    Room = apps.get_model('rooms', 'Room')
+    RoomMembership = apps.get_model('rooms', 'RoomMembership')
+    Through = Room.participants.through
+    now = django.utils.timezone.now()
+
+    rows = Through.objects.using(schema_editor.connection.alias).values_list('room_id', 'user_id')
+    batch = []
+    for room_id, user_id in rows.iterator(chunk_size=2000):
+        # The old table has no join time; the migration time is the best we have
+        batch.append(RoomMembership(room_id=room_id, user_id=user_id, joined_at=now))
+        if len(batch) >= 2000:
+            RoomMembership.objects.using(schema_editor.connection.alias).bulk_create(batch)
+            batch = []
+    if batch:
+        RoomMembership.objects.using(schema_editor.connection.alias).bulk_create(batch)
+
+
+def copy_memberships_back(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomMembership = apps.get_model('rooms', 'RoomMembership')
+    Through = Room.participants.through
+    pairs = (
+        RoomMembership.objects.using(schema_editor.connection.alias)
+        .filter(left_at__isnull=True)
+        .values_list('room_id', 'user_id')
+        .distinct()
+    )
+    Through.objects.using(schema_editor.connection.alias).bulk_create(
+        [Through(room_id=room_id, user_id=user_id) for room_id, user_id in pairs]
+    )
+
+
+def recount_participants(apps, schema_editor):
+    Room = apps.get_model('rooms', 'Room')
+    RoomMembership = apps.get_model('rooms', 'RoomMembership')
+    counts = (
+        RoomMembership.objects.filter(room=models.OuterRef('pk'), left_at__isnull=True)
+        .values('room')
+        .annotate(total=models.Count('*'))
+        .values('total')
+    )
+    Room.objects.using(schema_editor.connection.alias).update(
+        participant_count=models.functions.Coalesce(models.Subquery(counts), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0006_room_participant_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('left_at', models.DateTimeField(blank=True, null=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='rooms.room')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('left_at__isnull', True)), fields=['user', 'room'], name='active_membership_user_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('left_at__isnull', True)), fields=('room', 'user'), name='unique_active_membership')],
+            },
+        ),
+        migrations.RunPython(copy_participants, copy_memberships_back),
+        migrations.RemoveField(
+            model_name='room',
+            name='participants',
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='participants',
+            field=models.ManyToManyField(blank=True, related_name='joined_rooms', through='rooms.RoomMembership', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(recount_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0008_room_activity_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomEventCheckpoint',
+            fields=[
+                ('room_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('position', models.CharField(blank=True, max_length=64)),
+                ('state', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RoomPeakConcurrency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.UUIDField()),
+                ('hour', models.DateTimeField()),
+                ('peak', models.IntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_id', 'hour'), name='unique_peak_concurrency')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomSessionDuration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.UUIDField()),
+                ('session', models.CharField(max_length=64)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField()),
+                ('seconds', models.FloatField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_id', 'session'), name='unique_session_duration')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RoomTimeToConnect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_id', models.UUIDField()),
+                ('session', models.CharField(max_length=64)),
+                ('connected_at', models.DateTimeField()),
+                ('seconds', models.FloatField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room_id', 'session'), name='unique_time_to_connect')],
+            },
+        ),
+    ]
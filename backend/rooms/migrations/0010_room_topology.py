@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0009_room_event_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='topology',
+            field=models.CharField(choices=[('mesh', 'Mesh'), ('spotlight', 'Active-speaker spotlight')], default='mesh', max_length=16),
+        ),
+    ]
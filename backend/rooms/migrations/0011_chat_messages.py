@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0010_room_topology'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='room',
+            name='chat_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ChatMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.BigIntegerField()),
+                ('client_id', models.CharField(blank=True, max_length=64)),
+                ('sender', models.CharField(max_length=64)),
+                ('username', models.CharField(blank=True, max_length=64)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_messages', to='rooms.room')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('client_id', ''), _negated=True), fields=['room', 'client_id'], name='chat_client_id_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'seq'), name='unique_chat_seq')],
+            },
+        ),
+    ]
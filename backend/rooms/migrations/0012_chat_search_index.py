@@ -0,0 +1,49 @@
+from django.db import migrations
+
+FTS_TABLE = 'rooms_chatmessage_fts'
+FTS_POSITION_TABLE = 'rooms_chatmessage_fts_position'
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "message, room, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"CREATE TABLE {FTS_POSITION_TABLE} ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), last_id INTEGER NOT NULL)"
+        )
+        # Existing messages are indexed by manage.py index_chat
+        schema_editor.execute(f"INSERT INTO {FTS_POSITION_TABLE} (id, last_id) VALUES (1, 0)")
+    elif vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE rooms_chatmessage ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX chat_search_idx ON rooms_chatmessage USING gin (search_vector)"
+        )
+        # Rows still to be indexed (rooms/search.py index_pending)
+        schema_editor.execute(
+            "CREATE INDEX chat_search_pending_idx ON rooms_chatmessage (id) "
+            "WHERE search_vector IS NULL"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_POSITION_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE rooms_chatmessage DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0011_chat_messages'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
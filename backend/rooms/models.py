@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import uuid
 
 User = get_user_model()
@@ -8,19 +11,202 @@ class Room(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hosted_rooms')
     title = models.CharField(max_length=255, blank=True)
-    participants = models.ManyToManyField(User, related_name='joined_rooms', blank=True)
+    participants = models.ManyToManyField(User, through='RoomMembership', related_name='joined_rooms', blank=True)
+    # Number of active memberships, kept in step by rooms/membership.py
     participant_count = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     max_participants = models.IntegerField(default=10)
+    # How sockets in the room are wired together (rooms/spotlight.py)
+    topology = models.CharField(
+        max_length=16,
+        choices=[('mesh', 'Mesh'), ('spotlight', 'Active-speaker spotlight')],
+        default='mesh',
+    )
+    # Last join, leave or connected socket; the reaper closes rooms idle
+    # for too long (rooms/reaper.py)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+    # Sequence number of the room's latest chat message (rooms/chat.py)
+    chat_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_active', 'last_activity_at'], name='room_activity_idx'),
+        ]
 
     def __str__(self):
         return f"Room {self.id} - Host: {self.host.username}"
-    
-    def save(self, *args, **kwargs):
-        # Update participant_count automatically
-        if self.pk:
-            self.participant_count = self.participants.count()
-        super().save(*args, **kwargs)
-
-        
\ No newline at end of file
+
+
+class RoomMembershipQuerySet(models.QuerySet):
+
+    def active(self):
+        return self.filter(left_at__isnull=True)
+
+
+class RoomMembership(models.Model):
+    """
+    One stay of a user in a room. Leaving sets left_at instead of deleting,
+    so a user has at most one active row per room plus any number of past ones.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='room_memberships')
+    joined_at = models.DateTimeField(default=timezone.now)
+    left_at = models.DateTimeField(null=True, blank=True)
+
+    objects = RoomMembershipQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Also serves "who is in this room now" (room_id prefix)
+            models.UniqueConstraint(
+                fields=['room', 'user'],
+                condition=Q(left_at__isnull=True),
+                name='unique_active_membership',
+            ),
+        ]
+        indexes = [
+            # "Rooms this user is in now"
+            models.Index(
+                fields=['user', 'room'],
+                condition=Q(left_at__isnull=True),
+                name='active_membership_user_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.room_id}"
+
+
+class ChatMessage(models.Model):
+    """
+    A chat message, numbered per room. client_id is chosen by the sending
+    client so a resend after a reconnect can be recognised (rooms/chat.py).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='chat_messages')
+    seq = models.BigIntegerField()
+    client_id = models.CharField(max_length=64, blank=True)
+    sender = models.CharField(max_length=64)  # socket user id
+    username = models.CharField(max_length=64, blank=True)
+    message = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also serves "messages after seq n" for gap fetches
+            models.UniqueConstraint(fields=['room', 'seq'], name='unique_chat_seq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['room', 'client_id'],
+                condition=~Q(client_id=''),
+                name='chat_client_id_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} in {self.room_id}"
+
+
+class RoomFile(models.Model):
+    """
+    A file shared in a room's chat, and its upload while it is in progress
+    (received < size). The content is stored once per sha256 (rooms/files.py).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='files')
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='room_files')
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)  # declared up front, or taken on completion
+    received = models.BigIntegerField(default=0)
+    writing_until = models.DateTimeField(null=True, blank=True)  # a request is writing the upload
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sha256'], name='room_file_sha256_idx'),
+            models.Index(fields=['room', '-completed_at'], name='room_file_shared_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} in {self.room_id}"
+
+
+class ArchivedRoom(models.Model):
+    """
+    A reaped room moved out of the hot tables. Memberships are kept in data
+    as [user_id, joined_at, left_at] lists; users are referenced by id only
+    since they may be deleted later.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    host_id = models.IntegerField()
+    title = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    last_activity_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Archived room {self.id}"
+
+
+class RoomSessionDuration(models.Model):
+    """One socket session in a room, rolled up from the event log (rooms/analytics.py)"""
+    room_id = models.UUIDField()
+    session = models.CharField(max_length=64)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField()
+    seconds = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_id', 'session'], name='unique_session_duration'),
+        ]
+
+
+class RoomTimeToConnect(models.Model):
+    """Seconds from a socket connecting to its first WebRTC answer"""
+    room_id = models.UUIDField()
+    session = models.CharField(max_length=64)
+    connected_at = models.DateTimeField()
+    seconds = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_id', 'session'], name='unique_time_to_connect'),
+        ]
+
+
+class RoomPeakConcurrency(models.Model):
+    """Most sockets connected to a room at once within an hour"""
+    room_id = models.UUIDField()
+    hour = models.DateTimeField()
+    peak = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_id', 'hour'], name='unique_peak_concurrency'),
+        ]
+
+
+class RoomEventCheckpoint(models.Model):
+    """How far the rollup has read a room's event log, and its open sessions"""
+    room_id = models.UUIDField(primary_key=True)
+    position = models.CharField(max_length=64, blank=True)
+    state = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+def active_count_subquery():
+    """participant_count recomputed from active memberships, for .update()"""
+    counts = (
+        RoomMembership.objects.active()
+        .filter(room=OuterRef('pk'))
+        .values('room')
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), 0)
@@ -0,0 +1,162 @@
+"""
+One authenticated WebSocket watching many rooms (ws/rooms/?ticket=...).
+
+Each subscription is a RoomStream: a VideoRoomConsumer that shares the
+socket's channel, so room frames run through the same handlers as on
+ws/room/<room_id>/. What a user pays per socket (the handshake, the ticket
+check, one channel and its receive loop) does not grow with the number of
+rooms they watch; a subscription only adds the room group membership.
+
+Framing is the single-room protocol plus a "room" key, both ways:
+
+    -> {"type": "subscribe", "room": "<id>"}
+    <- {"room": "<id>", "type": "connection_established", ...}
+    -> {"type": "chat_message", "room": "<id>", "message": "hi"}
+    <- {"room": "<id>", "type": "chat_message", ...}
+    -> {"type": "unsubscribe", "room": "<id>"}
+
+Room group events carry room_id (VideoRoomConsumer.room_send), which is how
+an event arriving on the shared channel finds its stream.
+"""
+import json
+import logging
+import uuid
+
+from channels.consumer import get_handler_name
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from . import drain, frames, presence, reaper
+from .consumers import VideoRoomConsumer, ticket_user_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_ROOMS': 25,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_MULTIPLEX', {}).get(name, DEFAULTS[name])
+
+
+class RoomStream(VideoRoomConsumer):
+    """One room on a MultiplexConsumer socket"""
+
+    def __init__(self, socket, room_id):
+        super().__init__()
+        self.socket = socket
+        self.scope = socket.scope
+        self.channel_layer = socket.channel_layer
+        self.channel_name = socket.channel_name
+        self.room_id = presence.room_key(room_id)
+        self.room_group_name = presence.group_name(self.room_id)
+        self.user_id = str(uuid.uuid4())
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        # Splice the room key into the already-encoded frame
+        await self.socket.send(text_data=f'{{"room":"{self.room_id}",{text_data[1:]}')
+
+
+class MultiplexConsumer(AsyncWebsocketConsumer):
+    # Set when the socket is accepted; None if connect() turned it away
+    streams = None
+
+    async def connect(self):
+        drain.install_signal_handler()
+        reaper.start_heartbeat()
+        if drain.is_draining():
+            await self.close(code=drain.get_setting('CLOSE_CODE'))
+            return
+
+        self.account_id = await database_sync_to_async(ticket_user_id)(self.scope)
+        if self.account_id is None:
+            await self.close(code=4001)
+            return
+
+        self.streams = {}
+        await self.accept()
+        drain.register(self)
+
+    async def disconnect(self, close_code):
+        drain.unregister(self)
+        for stream in list((self.streams or {}).values()):
+            try:
+                await stream.leave_room(close_code)
+            except Exception as e:
+                logger.warning("Error leaving room %s: %s", stream.room_id, e)
+        self.streams = {}
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            if text_data is None:
+                raise frames.FrameError(frames.BAD_JSON)
+            spec, data = frames.decode(text_data, frames.MULTIPLEX_FRAMES)
+        except frames.FrameError as e:
+            await self.send_error(e.code, e.field)
+            return
+
+        try:
+            room_id = str(uuid.UUID(data['room']))
+        except ValueError:
+            await self.send_error(frames.BAD_FIELD, 'room')
+            return
+
+        if spec.handler == 'subscribe':
+            await self.subscribe(room_id)
+        elif spec.handler == 'unsubscribe':
+            await self.unsubscribe(room_id)
+        elif room_id in self.streams:
+            await self.streams[room_id].dispatch_frame(spec, data)
+        else:
+            await self.send_error(frames.NOT_SUBSCRIBED, room=room_id)
+
+    async def subscribe(self, room_id):
+        if room_id in self.streams:
+            return
+        if len(self.streams) >= get_setting('MAX_ROOMS'):
+            await self.send_error(frames.TOO_MANY_ROOMS, room=room_id)
+            return
+
+        stream = RoomStream(self, room_id)
+        room = await stream.find_room()
+        if room is None:
+            await self.send_error(frames.NOT_FOUND, room=room_id)
+            return
+        stream.is_host = self.account_id == str(room.host_id)
+        self.streams[room_id] = stream
+        await stream.enter_room(room)
+
+    async def unsubscribe(self, room_id):
+        stream = self.streams.pop(room_id, None)
+        if stream is None:
+            await self.send_error(frames.NOT_SUBSCRIBED, room=room_id)
+            return
+        await stream.leave_room(1000)
+        await self.send(text_data=json.dumps({'type': 'unsubscribed', 'room': room_id}))
+
+    async def send_error(self, code, field=None, room=None):
+        message = frames.FrameError(code, field).as_message()
+        if room:
+            message['room'] = room
+        await self.send(text_data=json.dumps(message, separators=(',', ':')))
+
+    async def send_migrate(self, reconnect_after_ms):
+        """Ask the client to reconnect to another node after a delay"""
+        await self.send(text_data=json.dumps({
+            'type': 'migrate',
+            'reconnect_after_ms': reconnect_after_ms,
+            'message': 'Server is restarting, please reconnect'
+        }))
+
+    async def dispatch(self, message):
+        # Room group events go to the stream for their room; the rest
+        # (websocket.*) are this socket's own
+        room_id = message.get('room_id')
+        if room_id is None or message['type'].startswith('websocket.'):
+            await super().dispatch(message)
+            return
+        stream = self.streams.get(room_id)
+        if stream is not None:
+            await getattr(stream, get_handler_name(message))(message)
@@ -0,0 +1,76 @@
+"""
+Which sockets are in which room, in this worker process.
+
+Memory per connection is what limits sockets per node, so this is kept
+small (rooms/tests/test_footprint.py holds it to a budget):
+
+- One Roster per room with a socket here. Members are the keys of a dict
+  used as an ordered set: its compact layout costs about a third of a
+  set's at room sizes, and keeps join order for existing_users.
+- Room ids and group names are interned, so the sockets of a room share
+  one copy of each instead of formatting their own.
+
+Socket user ids stay uuid strings: they are the peer ids clients address
+in signaling frames, and must be unique across worker processes.
+
+Like the spotlight state this lives in the process, so a room's sockets
+must all be served by one worker for it to be complete.
+"""
+import sys
+
+
+class Roster:
+    """The sockets of one room on this worker"""
+    __slots__ = ('room_id', 'group', 'members')
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.group = sys.intern(f'room_{room_id}')
+        self.members = {}  # user id -> None, in join order
+
+
+_rosters = {}
+
+
+def room_key(room_id):
+    """The shared str for a room id"""
+    return sys.intern(str(room_id))
+
+
+def group_name(room_id):
+    """The shared channel layer group name of a room"""
+    roster = _rosters.get(room_id)
+    return roster.group if roster is not None else sys.intern(f'room_{room_id}')
+
+
+def members(room_id):
+    """User ids of the room's sockets on this worker, in join order"""
+    roster = _rosters.get(room_id)
+    return roster.members.keys() if roster is not None else ()
+
+
+def add(room_id, user_id):
+    """Add a socket; returns the user ids that were there before it"""
+    roster = _rosters.get(room_id)
+    if roster is None:
+        roster = _rosters[room_id] = Roster(room_id)
+    existing = list(roster.members)
+    roster.members[user_id] = None
+    return existing
+
+
+def remove(room_id, user_id):
+    """Remove a socket; returns True if that was the room's last one here"""
+    roster = _rosters.get(room_id)
+    if roster is None:
+        return True
+    roster.members.pop(user_id, None)
+    if not roster.members:
+        del _rosters[room_id]
+        return True
+    return False
+
+
+def rooms():
+    """Rooms with at least one socket on this worker"""
+    return list(_rosters)
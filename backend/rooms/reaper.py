@@ -0,0 +1,190 @@
+"""
+Stale room reaper and archival.
+
+A room is live while something happens in it: joins and leaves stamp
+Room.last_activity_at, and each worker re-stamps the rooms its sockets are
+connected to every TOUCH_INTERVAL seconds (heartbeat()). Rooms with no
+activity for IDLE_SECONDS are closed: is_active=False, open memberships
+ended, count zeroed, lobby and ETags told. Closed rooms idle for
+ARCHIVE_AFTER_SECONDS are copied into ArchivedRoom with their memberships
+and chat, and deleted, so the hot tables only hold recent rooms. Their
+shared files go with them (the stored content once nothing else refers to
+it), and each pass also removes abandoned uploads (rooms/files.py).
+
+Both passes work in batches of BATCH_SIZE rooms, one transaction per batch.
+Run them with ``manage.py reap_rooms`` (once, or with --loop).
+"""
+import asyncio
+import logging
+import weakref
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import files, lobby, presence, search, versioning
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'IDLE_SECONDS': 3600,
+    'ARCHIVE_AFTER_SECONDS': 7 * 24 * 3600,
+    'BATCH_SIZE': 500,
+    'INTERVAL': 300,
+    'TOUCH_INTERVAL': 60,
+}
+
+_heartbeat_loops = weakref.WeakSet()
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_REAPER', {}).get(name, DEFAULTS[name])
+
+
+def touch(room_ids):
+    """Mark rooms as active now"""
+    from .models import Room
+    return Room.objects.filter(pk__in=list(room_ids), is_active=True).update(last_activity_at=timezone.now())
+
+
+async def heartbeat():
+    """Keep the rooms with sockets on this worker from looking idle"""
+    from channels.db import database_sync_to_async
+
+    while True:
+        await asyncio.sleep(get_setting('TOUCH_INTERVAL'))
+        room_ids = presence.rooms()
+        if not room_ids:
+            continue
+        try:
+            await database_sync_to_async(touch)(room_ids)
+        except Exception as e:
+            logger.warning("Room heartbeat failed: %s", e)
+
+
+def start_heartbeat():
+    """Run heartbeat() on the current event loop once per loop"""
+    loop = asyncio.get_running_loop()
+    if loop in _heartbeat_loops:
+        return
+    _heartbeat_loops.add(loop)
+    loop.create_task(heartbeat())
+
+
+def close_idle_rooms(now=None, batch_size=None):
+    """Deactivate rooms idle for IDLE_SECONDS; returns how many were closed"""
+    from .models import Room, RoomMembership
+
+    now = now or timezone.now()
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    idle = Room.objects.filter(
+        is_active=True,
+        last_activity_at__lt=now - timedelta(seconds=get_setting('IDLE_SECONDS')),
+    )
+    total = 0
+
+    while True:
+        ids = list(idle.order_by('last_activity_at').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            # Re-read under lock: a room joined meanwhile is no longer idle
+            closed = list(
+                idle.filter(pk__in=ids).select_for_update().values_list('pk', flat=True)
+            )
+            RoomMembership.objects.active().filter(room_id__in=closed).update(left_at=now)
+            Room.objects.filter(pk__in=closed).update(is_active=False, participant_count=0)
+        transaction.on_commit(lambda closed=closed: _announce_closed(closed))
+        total += len(closed)
+        if len(ids) < batch_size:
+            break
+
+    return total
+
+
+def _announce_closed(room_ids):
+    for room_id in room_ids:
+        versioning.bump_room(room_id)
+    lobby.publish([lobby.closed_delta(room_id) for room_id in room_ids])
+
+
+def archive_closed_rooms(now=None, batch_size=None):
+    """Move rooms closed for ARCHIVE_AFTER_SECONDS into ArchivedRoom"""
+    from .models import ArchivedRoom, Room
+
+    now = now or timezone.now()
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    stale = Room.objects.filter(
+        is_active=False,
+        last_activity_at__lt=now - timedelta(seconds=get_setting('ARCHIVE_AFTER_SECONDS')),
+    )
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            rooms = list(stale.order_by('last_activity_at').select_for_update()[:batch_size])
+            if not rooms:
+                break
+            ArchivedRoom.objects.bulk_create(archive_rows(rooms), ignore_conflicts=True)
+            files.forget_rooms([room.pk for room in rooms])
+            Room.objects.filter(pk__in=[room.pk for room in rooms]).delete()
+            search.forget_rooms([room.pk for room in rooms])
+        total += len(rooms)
+        if len(rooms) < batch_size:
+            break
+
+    return total
+
+
+def archive_rows(rooms):
+    """ArchivedRoom rows for rooms, with their memberships and chat in one query each"""
+    from .models import ArchivedRoom, ChatMessage, RoomMembership
+
+    memberships = {room.pk: [] for room in rooms}
+    rows = (
+        RoomMembership.objects
+        .filter(room_id__in=memberships)
+        .order_by('joined_at')
+        .values_list('room_id', 'user_id', 'joined_at', 'left_at')
+    )
+    for room_id, user_id, joined_at, left_at in rows:
+        memberships[room_id].append([
+            user_id,
+            joined_at.isoformat(),
+            left_at.isoformat() if left_at else None,
+        ])
+
+    chat = {room.pk: [] for room in rooms}
+    rows = (
+        ChatMessage.objects
+        .filter(room_id__in=chat)
+        .order_by('room_id', 'seq')
+        .values_list('room_id', 'seq', 'username', 'message', 'created_at')
+    )
+    for room_id, seq, username, message, created_at in rows:
+        chat[room_id].append([seq, username, message, created_at.isoformat()])
+
+    return [
+        ArchivedRoom(
+            id=room.pk,
+            host_id=room.host_id,
+            title=room.title,
+            created_at=room.created_at,
+            last_activity_at=room.last_activity_at,
+            data={
+                'max_participants': room.max_participants,
+                'memberships': memberships[room.pk],
+                'chat': chat[room.pk],
+            },
+        )
+        for room in rooms
+    ]
+
+
+def reap(now=None, batch_size=None, archive=True):
+    """One reaper pass; returns (closed, archived)"""
+    closed = close_idle_rooms(now, batch_size)
+    archived = archive_closed_rooms(now, batch_size) if archive else 0
+    files.expire_uploads(now)
+    return closed, archived
@@ -1,6 +1,8 @@
 from django.urls import re_path
-from . import consumers
+from . import consumers, multiplex
 
 websocket_urlpatterns = [
     re_path(r'ws/room/(?P<room_id>[^/]+)/$', consumers.VideoRoomConsumer.as_asgi()),
+    re_path(r'ws/rooms/$', multiplex.MultiplexConsumer.as_asgi()),
+    re_path(r'ws/lobby/$', consumers.LobbyConsumer.as_asgi()),
 ]
\ No newline at end of file
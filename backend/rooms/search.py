@@ -0,0 +1,245 @@
+"""
+Full-text search over room chat.
+
+The index depends on the database (migration 0012 creates it):
+
+SQLite      an FTS5 table, rooms_chatmessage_fts(message, room), whose rowid
+            is the ChatMessage id. The room column holds the room id as one
+            token, so the room filter is part of the MATCH. A one-row table
+            keeps the highest id indexed so far.
+PostgreSQL  a tsvector column, rooms_chatmessage.search_vector, with a GIN
+            index, plus a partial index on the rows still to be indexed.
+
+Rows are indexed in batches rather than one at a time. chat.post() calls
+message_stored() after commit; every INDEX_BATCH messages, or once
+INDEX_SECONDS have passed, the writing thread indexes everything pending.
+search() indexes whatever is left before it queries, so results are never
+stale, and ``manage.py index_chat`` backfills existing messages.
+
+Search runs on the primary, which owns the index (it may index on the
+way in). Results are newest first and paged by seq (``before``). Message
+ids and seqs grow together within a room (both are taken under the room
+row lock in chat.post()), which lets SQLite page on the FTS rowid.
+
+SQLite has one writer at a time, so ids commit in order and "pending" is
+simply every id above the highest one indexed. PostgreSQL transactions
+can commit out of order; there a NULL search_vector marks a pending row.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+
+DEFAULTS = {
+    'INDEX_BATCH': 200,
+    'INDEX_SECONDS': 5.0,
+    'POSTGRES_CONFIG': 'simple',  # text search configuration; chat is multilingual
+    'MAX_TERMS': 8,
+}
+
+FTS_TABLE = 'rooms_chatmessage_fts'
+FTS_POSITION_TABLE = 'rooms_chatmessage_fts_position'  # one row: highest id indexed
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_CHAT_SEARCH', {}).get(name, DEFAULTS[name])
+
+
+def _room_token(room_id):
+    # UUIDField is stored as 32 hex characters on SQLite
+    from .models import ChatMessage
+
+    return ChatMessage._meta.get_field('room').get_db_prep_value(room_id, connection)
+
+
+def _index_batch_sqlite(batch_size):
+    from .models import ChatMessage
+
+    qn = connection.ops.quote_name
+    messages = qn(ChatMessage._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT last_id FROM {FTS_POSITION_TABLE}")
+        last_id = cursor.fetchone()[0]
+        cursor.execute(f"""
+            SELECT count(*), max({qn('id')}) FROM (
+                SELECT {qn('id')} FROM {messages}
+                 WHERE {qn('id')} > %s
+                 ORDER BY {qn('id')}
+                 LIMIT %s
+            )
+        """, [last_id, batch_size])
+        count, upto = cursor.fetchone()
+        if not count:
+            return 0
+        cursor.execute(f"""
+            INSERT INTO {FTS_TABLE} (rowid, message, room)
+            SELECT {qn('id')}, {qn('message')}, {qn('room_id')}
+              FROM {messages}
+             WHERE {qn('id')} > %s AND {qn('id')} <= %s
+        """, [last_id, upto])
+        cursor.execute(f"UPDATE {FTS_POSITION_TABLE} SET last_id = %s", [upto])
+        return count
+
+
+def _index_batch_postgres(batch_size):
+    from .models import ChatMessage
+
+    qn = connection.ops.quote_name
+    messages = qn(ChatMessage._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {messages}
+               SET search_vector = to_tsvector(%s::regconfig, {qn('message')})
+             WHERE {qn('id')} IN (
+                   SELECT {qn('id')} FROM {messages}
+                    WHERE search_vector IS NULL
+                    ORDER BY {qn('id')}
+                    LIMIT %s
+                      FOR UPDATE SKIP LOCKED
+             )
+        """, [get_setting('POSTGRES_CONFIG'), batch_size])
+        return cursor.rowcount
+
+
+def index_pending(batch_size=None):
+    """Index every message not yet in the index; returns how many were added"""
+    batch_size = batch_size or get_setting('INDEX_BATCH')
+    index_batch = _index_batch_postgres if connection.vendor == 'postgresql' else _index_batch_sqlite
+    total = 0
+    while True:
+        with transaction.atomic():
+            added = index_batch(batch_size)
+        total += added
+        if added < batch_size:
+            return total
+
+
+class _Pending:
+    """Messages stored since the last index run, per process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.since = time.monotonic()
+
+    def add(self):
+        """Count one message; True if this caller should run the batch"""
+        with self.lock:
+            self.count += 1
+            due = (
+                self.count >= get_setting('INDEX_BATCH')
+                or time.monotonic() - self.since >= get_setting('INDEX_SECONDS')
+            )
+            if due:
+                self.count = 0
+                self.since = time.monotonic()
+            return due
+
+
+_pending = _Pending()
+
+
+def message_stored():
+    """Called after a chat message commits; indexes a batch when one is due"""
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    if _pending.add():
+        index_pending()
+
+
+def optimize():
+    """Merge the SQLite index into one segment (after a large backfill)"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def forget_rooms(room_ids):
+    """Drop deleted rooms' messages from the index (SQLite; PostgreSQL needs nothing)"""
+    if connection.vendor != 'sqlite' or not room_ids:
+        return
+    with connection.cursor() as cursor:
+        for room_id in room_ids:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [f'room : "{_room_token(room_id)}"'],
+            )
+
+
+def _terms(query):
+    return _TERM_RE.findall(query)[:get_setting('MAX_TERMS')]
+
+
+def _search_sqlite(room_id, query, before, limit):
+    from .models import ChatMessage
+
+    terms = _terms(query)
+    if not terms:
+        return []
+    # Every term must match. No prefix terms: FTS5 reads the whole doclist
+    # of every term under a prefix, which does not stay fast at scale
+    match = ' AND '.join(
+        [f'room : "{_room_token(room_id)}"']
+        + [f'message : "{term}"' for term in terms]
+    )
+    sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+    params = [match]
+    if before is not None:
+        before_id = (
+            ChatMessage.objects.using(DEFAULT_DB_ALIAS).filter(room_id=room_id, seq__lt=before)
+            .order_by('-seq').values_list('id', flat=True).first()
+        )
+        if before_id is None:
+            return []
+        sql += " AND rowid <= %s"
+        params.append(before_id)
+    sql += " ORDER BY rowid DESC LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+    return list(ChatMessage.objects.using(DEFAULT_DB_ALIAS).filter(id__in=ids).order_by('-seq'))
+
+
+def _search_postgres(room_id, query, before, limit):
+    from django.db.models import BooleanField
+    from django.db.models.expressions import RawSQL
+
+    from .models import ChatMessage
+
+    if not _terms(query):
+        return []
+    matches = RawSQL(
+        "search_vector @@ websearch_to_tsquery(%s::regconfig, %s)",
+        (get_setting('POSTGRES_CONFIG'), query),
+        output_field=BooleanField(),
+    )
+    messages = ChatMessage.objects.using(DEFAULT_DB_ALIAS).filter(matches, room_id=room_id)
+    if before is not None:
+        messages = messages.filter(seq__lt=before)
+    return list(messages.order_by('-seq')[:limit])
+
+
+def search(room_id, query, before=None, limit=50):
+    """Messages in the room matching query, newest first, with seq < before"""
+    if connection.vendor == 'postgresql':
+        index_pending()
+        return _search_postgres(room_id, query, before, limit)
+    if connection.vendor == 'sqlite':
+        index_pending()
+        return _search_sqlite(room_id, query, before, limit)
+
+    # No text index on this backend
+    from .models import ChatMessage
+
+    messages = ChatMessage.objects.filter(room_id=room_id)
+    for term in _terms(query):
+        messages = messages.filter(message__icontains=term)
+    if before is not None:
+        messages = messages.filter(seq__lt=before)
+    return list(messages.order_by('-seq')[:limit])
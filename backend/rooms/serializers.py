@@ -8,13 +8,14 @@ class RoomSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Room
-        fields = ['id', 'host', 'host_name', 'title', 'participant_count', 'created_at', 'max_participants']
+        fields = ['id', 'host', 'host_name', 'title', 'participant_count', 'created_at', 'max_participants', 'topology']
         read_only_fields = ['id', 'host', 'created_at']
 
     def get_participant_count(self, obj):
-        return obj.participants.count()
+        # Denormalized count of active memberships
+        return obj.participant_count
 
 class RoomCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
-        fields = ['title', 'max_participants']
\ No newline at end of file
+        fields = ['title', 'max_participants', 'topology']
\ No newline at end of file
@@ -0,0 +1,29 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Room, active_count_subquery
+from .versioning import LIST_KEY, bump, bump_room
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def room_changed(sender, instance, **kwargs):
+    bump_room(instance.pk)
+
+
+@receiver(m2m_changed, sender=Room.participants.through)
+def participants_changed(sender, instance, action, pk_set, **kwargs):
+    # Direct participants.add()/remove() (admin, shell) bypass membership.py;
+    # recount so participant_count stays the number of active memberships
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Room):
+        Room.objects.filter(pk=instance.pk).update(participant_count=active_count_subquery())
+        bump_room(instance.pk)
+    else:
+        # Changed from the user side: recount every room touched
+        rooms = Room.objects.filter(pk__in=pk_set) if pk_set is not None else Room.objects.all()
+        rooms.update(participant_count=active_count_subquery())
+        for room_id in pk_set or ():
+            bump_room(room_id)
+        bump(LIST_KEY)
@@ -0,0 +1,158 @@
+"""
+Active-speaker "spotlight" topology for large rooms.
+
+In a mesh room every pair of sockets negotiates a peer connection. In a
+spotlight room the server keeps a small active set (at most SIZE sockets)
+and only pairs that include an active member are connected, so a listener
+holds O(SIZE) peer connections instead of O(N).
+
+The active set is filled by host pins first, then by the loudest speakers
+from client-reported audio levels (smoothed, with hysteresis: a challenger
+must be louder than the quietest active speaker by MARGIN, and a speaker
+keeps the seat for at least HOLD_SECONDS). Free seats go to whoever joins.
+
+Like room presence (rooms/presence.py) this state lives in the worker process,
+so all sockets of a spotlight room must be served by the same worker.
+"""
+import math
+import time
+
+from django.conf import settings
+
+MESH = 'mesh'
+SPOTLIGHT = 'spotlight'
+
+DEFAULTS = {
+    'SIZE': 4,
+    'SMOOTHING': 0.3,  # weight of a new level report in the running average
+    'MARGIN': 0.1,
+    'HOLD_SECONDS': 3.0,
+    'STALE_SECONDS': 2.0,  # a speaker with no recent report counts as silent
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_SPOTLIGHT', {}).get(name, DEFAULTS[name])
+
+
+class Spotlight:
+
+    def __init__(self, size=None):
+        self.size = size or get_setting('SIZE')
+        self.active = []  # seat order is join/promotion order
+        self.pinned = []
+        self._levels = {}  # user -> (smoothed level, reported at)
+        self._seated_at = {}
+
+    def pair_allowed(self, a, b):
+        return a in self.active or b in self.active
+
+    def level(self, user, now):
+        level, reported_at = self._levels.get(user, (0.0, 0.0))
+        return level if now - reported_at <= get_setting('STALE_SECONDS') else 0.0
+
+    def _seat(self, user, now):
+        self.active.append(user)
+        self._seated_at[user] = now
+
+    def _unseat(self, user):
+        self.active.remove(user)
+        self._seated_at.pop(user, None)
+
+    def add(self, user, now=None):
+        """A socket joined; it takes a free seat if there is one"""
+        now = now if now is not None else time.monotonic()
+        if user not in self.active and len(self.active) < self.size:
+            self._seat(user, now)
+            return True
+        return False
+
+    def remove(self, user, candidates=(), now=None):
+        """A socket left; its seat goes to the loudest of candidates"""
+        now = now if now is not None else time.monotonic()
+        self._levels.pop(user, None)
+        if user in self.pinned:
+            self.pinned.remove(user)
+        if user not in self.active:
+            return False
+        self._unseat(user)
+        waiting = [c for c in candidates if c not in self.active and c != user]
+        if waiting:
+            self._seat(max(waiting, key=lambda c: self.level(c, now)), now)
+        return True
+
+    def pin(self, user, pinned, now=None):
+        """Host pin: pinned users hold a seat regardless of audio"""
+        now = now if now is not None else time.monotonic()
+        if pinned and user not in self.pinned:
+            self.pinned = (self.pinned + [user])[-self.size:]
+            if user not in self.active:
+                if len(self.active) >= self.size:
+                    evictable = [u for u in self.active if u not in self.pinned]
+                    self._unseat(min(evictable, key=lambda u: self.level(u, now)))
+                self._seat(user, now)
+            return True
+        if not pinned and user in self.pinned:
+            self.pinned.remove(user)
+            return True
+        return False
+
+    def report(self, user, level, now=None):
+        """
+        Fold in an audio level (0..1) from user; returns True if the active
+        set changed as a result.
+        """
+        now = now if now is not None else time.monotonic()
+        level = float(level)
+        level = min(max(level, 0.0), 1.0) if math.isfinite(level) else 0.0
+        previous = self.level(user, now)
+        weight = get_setting('SMOOTHING')
+        smoothed = previous + weight * (level - previous)
+        self._levels[user] = (smoothed, now)
+
+        if user in self.active:
+            return False
+        if len(self.active) < self.size:
+            self._seat(user, now)
+            return True
+
+        hold = get_setting('HOLD_SECONDS')
+        evictable = [
+            u for u in self.active
+            if u not in self.pinned and now - self._seated_at.get(u, 0.0) >= hold
+        ]
+        if not evictable:
+            return False
+        quietest = min(evictable, key=lambda u: self.level(u, now))
+        if smoothed > self.level(quietest, now) + get_setting('MARGIN'):
+            self._unseat(quietest)
+            self._seat(user, now)
+            return True
+        return False
+
+
+_rooms = {}
+
+
+def get(room_id):
+    if room_id not in _rooms:
+        _rooms[room_id] = Spotlight()
+    return _rooms[room_id]
+
+
+def discard(room_id):
+    _rooms.pop(room_id, None)
+
+
+def changes(user, peers, before, after):
+    """
+    What user should do after the active set moved from before to after:
+    (peers to offer to, peers to hang up on). Only the lower id of a new
+    pair offers, so the two sides don't both start negotiating.
+    """
+    def allowed(active, peer):
+        return user in active or peer in active
+
+    connect = [p for p in peers if allowed(after, p) and not allowed(before, p) and user < p]
+    disconnect = [p for p in peers if allowed(before, p) and not allowed(after, p)]
+    return connect, disconnect
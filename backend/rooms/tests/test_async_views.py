@@ -0,0 +1,71 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import User
+from rooms.models import Room
+
+
+@pytest.mark.django_db
+class TestAsyncRoomViews:
+
+    def setup_method(self):
+        self.user = User.objects.create_user(
+            username='AsyncUser',
+            email='async@example.com',
+            password='AsyncPass@123'
+        )
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.client = AsyncClient()
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def test_unauthenticated_request_rejected(self):
+        """Async views require a JWT like the DRF ones"""
+        response = async_to_sync(AsyncClient().get)(reverse('room-list-async'))
+        assert response.status_code == 401
+        assert "detail" in response.json()
+
+    def test_create_room(self):
+        """Test async room creation"""
+        response = async_to_sync(self.client.post)(
+            reverse('room-create-async'),
+            {"title": "Async Room", "max_participants": 4},
+            content_type='application/json',
+            headers=self.headers
+        )
+        assert response.status_code == 201
+        assert Room.objects.filter(title="Async Room", host=self.user).exists()
+        assert "id" in response.json()
+
+    def test_list_matches_sync_view(self):
+        """Async list payload is identical to the DRF list payload"""
+        room = Room.objects.create(host=self.user, title="Listed Room")
+        room.participants.add(self.user)
+
+        async_data = async_to_sync(self.client.get)(reverse('room-list-async'), headers=self.headers).json()
+
+        sync_client = APIClient()
+        sync_client.force_authenticate(user=self.user)
+        sync_data = sync_client.get(reverse('room-list')).json()
+
+        assert async_data == sync_data
+
+    def test_detail_not_found(self):
+        """Unknown rooms return 404"""
+        url = reverse('room-detail-async', kwargs={'id': '00000000-0000-0000-0000-000000000000'})
+        response = async_to_sync(self.client.get)(url, headers=self.headers)
+        assert response.status_code == 404
+
+    def test_join_room(self):
+        """Test joining a room through the async view"""
+        room = Room.objects.create(host=self.user, title="Async Join", max_participants=2)
+        url = reverse('room-join-async', kwargs={'room_id': room.id})
+
+        response = async_to_sync(self.client.post)(url, headers=self.headers)
+        assert response.status_code == 200
+        assert response.json()["participant_count"] == 1
+
+        response = async_to_sync(self.client.post)(url, headers=self.headers)
+        assert response.json()["message"] == "Already in room"
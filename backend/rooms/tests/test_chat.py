@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import OperationalError, connection
+from users.models import User
+from rooms.models import ChatMessage, Room
+from rooms.routing import websocket_urlpatterns
+from rooms import chat
+
+
+def make_room(title):
+    host = User.objects.create_user(
+        username=f'{title}Host',
+        email=f'{title.lower()}host@example.com',
+        password='ChatPass@123'
+    )
+    return Room.objects.create(host=host, title=title)
+
+
+@pytest.mark.django_db
+class TestPost:
+
+    def test_sequence_and_dedup(self):
+        room = make_room("Chat")
+        first, created = chat.post(room.id, 'socket-a', 'one', client_id='c1')
+        assert created and first.seq == 1
+        assert chat.post(room.id, 'socket-b', 'two')[0].seq == 2
+
+        resent, created = chat.post(room.id, 'socket-a2', 'one', client_id='c1')
+        assert not created and resent.pk == first.pk
+        room.refresh_from_db()
+        assert room.chat_seq == 2  # the duplicate did not use up a number
+
+        assert chat.post(uuid.uuid4(), 'socket-a', 'nowhere') == (None, False)
+
+    def test_dedup_window(self, settings):
+        settings.ROOM_CHAT = {'DEDUP_SECONDS': 0}
+        room = make_room("Window")
+        chat.post(room.id, 'socket-a', 'one', client_id='c1')
+        time.sleep(0.01)
+        message, created = chat.post(room.id, 'socket-a', 'one again', client_id='c1')
+        assert created and message.seq == 2
+
+    def test_history_pages(self):
+        room = make_room("History")
+        for n in range(5):
+            chat.post(room.id, 'socket-a', f'm{n}')
+        page, more = chat.history(room.id, after=1, limit=2)
+        assert [m.seq for m in page] == [2, 3] and more
+        page, more = chat.history(room.id, after=3, limit=2)
+        assert [m.seq for m in page] == [4, 5] and not more
+        assert [m.seq for m in chat.history(room.id, after=1, before=4)[0]] == [2, 3]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_posts_get_dense_sequence():
+    """Concurrent posts each get their own seq, with no gaps or repeats"""
+    room = make_room("Busy")
+    barrier = threading.Barrier(8)
+
+    def post(n):
+        barrier.wait()
+        try:
+            while True:
+                try:
+                    return chat.post(room.id, f'socket-{n}', 'hi', client_id=f'c{n % 4}')
+                except OperationalError:
+                    # SQLite's shared-cache test database reports lock
+                    # contention instead of waiting; the post was rolled back
+                    time.sleep(0.005)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(post, range(8)))
+
+    assert sum(created for _, created in results) == 4
+    assert sorted(ChatMessage.objects.values_list('seq', flat=True)) == [1, 2, 3, 4]
+    assert Room.objects.get(pk=room.pk).chat_seq == 4
+
+
+@pytest.mark.django_db
+class TestChatConsumer:
+
+    @pytest.fixture(autouse=True)
+    def setup_room(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_CHAT = {'MAX_UNACKED': 2}
+        self.room = make_room("Socket")
+
+    async def join(self):
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.id}/")
+        await client.connect()
+        established = await client.receive_json_from()
+        await client.receive_json_from()  # participant_update
+        return client, established
+
+    def test_resend_acked_not_repeated(self):
+        async def scenario():
+            client, _ = await self.join()
+            frame = json.dumps({'type': 'chat_message', 'message': 'hi', 'clientId': 'm-1'})
+
+            await client.send_to(text_data=frame)
+            message = await client.receive_json_from()
+            assert (message['seq'], message['clientId']) == (1, 'm-1')
+
+            await client.send_to(text_data=frame)
+            assert await client.receive_json_from() == {'type': 'chat_ack', 'clientId': 'm-1', 'seq': 1}
+            assert await client.receive_nothing(timeout=0.1)
+            await client.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_reconnect_fetches_gap_and_acks_bound_pushes(self):
+        async def scenario():
+            reader, _ = await self.join()
+            writer, _ = await self.join()
+            await reader.receive_json_from()  # participant_update
+            await reader.receive_json_from()  # user_joined
+
+            await reader.send_to(text_data=json.dumps({'type': 'chat_ack', 'seq': 0}))
+            for n in range(4):
+                await writer.send_to(text_data=json.dumps({'type': 'chat_message', 'message': f'm{n}'}))
+                await writer.receive_json_from()
+
+            # Two unacked messages, then pushes pause
+            assert [(await reader.receive_json_from())['seq'] for _ in range(2)] == [1, 2]
+            assert await reader.receive_json_from() == {'type': 'chat_pending', 'latest': 3}
+            assert await reader.receive_nothing(timeout=0.1)
+
+            await reader.send_to(text_data=json.dumps({'type': 'chat_sync', 'after': 2}))
+            history = await reader.receive_json_from()
+            assert [m['seq'] for m in history['messages']] == [3, 4] and not history['more']
+            await reader.disconnect()
+
+            # A reconnecting client asks only for what it has not seen
+            again, established = await self.join()
+            assert established['chat_seq'] == 4
+            await again.send_to(text_data=json.dumps({'type': 'chat_sync', 'after': 3}))
+            assert [m['message'] for m in (await again.receive_json_from())['messages']] == ['m3']
+
+            await again.disconnect()
+            await writer.disconnect()
+
+        async_to_sync(scenario)()
@@ -0,0 +1,76 @@
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+from rooms import drain
+
+
+@pytest.mark.django_db
+class TestDrainMode:
+
+    @pytest.fixture(autouse=True)
+    def setup_drain(self, settings):
+        settings.CHANNEL_LAYERS = {
+            'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+        }
+        settings.ROOM_DRAIN = {
+            'BATCH_SIZE': 1,
+            'BATCH_INTERVAL': 0,
+            'RECONNECT_DELAY_MIN': 2.0,
+            'RECONNECT_DELAY_MAX': 4.0,
+        }
+        host = User.objects.create_user(
+            username='DrainHost',
+            email='drainhost@example.com',
+            password='DrainPass@123'
+        )
+        self.room = Room.objects.create(host=host, title="Drain Room")
+        yield
+        drain.cancel_drain()
+
+    def communicator(self):
+        return WebsocketCommunicator(
+            URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.id}/"
+        )
+
+    async def receive_until(self, communicator, message_type):
+        while True:
+            output = await communicator.receive_json_from(timeout=2)
+            if output.get('type') == message_type:
+                return output
+
+    def test_drain_migrates_and_closes_sockets(self):
+        """Connected clients get a migrate frame, then the socket closes"""
+        async def scenario():
+            clients = [self.communicator(), self.communicator()]
+            for client in clients:
+                connected, _ = await client.connect()
+                assert connected
+            assert drain.connection_count() == 2
+
+            await drain.drain()
+
+            for client in clients:
+                migrate = await self.receive_until(client, 'migrate')
+                assert 2000 <= migrate['reconnect_after_ms'] <= 4000
+                closed = await client.receive_output(timeout=2)
+                while closed['type'] != 'websocket.close':
+                    closed = await client.receive_output(timeout=2)
+                assert closed['code'] == drain.DEFAULTS['CLOSE_CODE']
+                await client.disconnect()
+            assert drain.connection_count() == 0
+
+        async_to_sync(scenario)()
+
+    def test_new_sockets_rejected_while_draining(self):
+        """A draining node refuses new connections"""
+        async def scenario():
+            await drain.drain()
+            client = self.communicator()
+            connected, code = await client.connect()
+            assert not connected
+
+        async_to_sync(scenario)()
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+
+
+@pytest.mark.django_db
+class TestEphemeralSignals:
+
+    @pytest.fixture(autouse=True)
+    def setup_room(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_EPHEMERAL = {'TICK_INTERVAL': 0.05, 'MAX_AGE': 1.0, 'KINDS': ('typing', 'reaction')}
+        host = User.objects.create_user(
+            username='EphemeralHost',
+            email='ephemeralhost@example.com',
+            password='EphemeralPass@123'
+        )
+        self.room = Room.objects.create(host=host, title="Ephemeral Room")
+
+    async def join(self):
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.id}/")
+        await client.connect()
+        established = await client.receive_json_from()
+        await client.receive_json_from()  # participant_update
+        return client, established['userId']
+
+    def test_coalesced_per_tick(self):
+        """A burst of signals reaches the others as one frame, latest value per kind"""
+        async def scenario():
+            watcher, _ = await self.join()
+            typist, typist_id = await self.join()
+            await watcher.receive_json_from()  # participant_update
+            await watcher.receive_json_from()  # user_joined
+
+            for value in (True, False, True):
+                await typist.send_to(text_data=json.dumps({'type': 'ephemeral', 'kind': 'typing', 'value': value}))
+            for emoji in ('👍', '🎉'):
+                await typist.send_to(text_data=json.dumps({'type': 'ephemeral', 'kind': 'reaction', 'value': emoji}))
+
+            frame = await watcher.receive_json_from(timeout=2)
+            assert frame == {'type': 'ephemeral', 'signals': [
+                {'userId': typist_id, 'kind': 'typing', 'value': True},
+                {'userId': typist_id, 'kind': 'reaction', 'value': '🎉'},
+            ]}
+            assert await watcher.receive_nothing(timeout=0.2)
+            assert await typist.receive_nothing(timeout=0)  # not echoed to the sender
+
+            await typist.send_to(text_data=json.dumps({'type': 'ephemeral', 'kind': 'shout', 'value': 'hi'}))
+            assert await typist.receive_json_from() == {'type': 'error', 'code': 'bad_field', 'field': 'kind'}
+
+            await typist.disconnect()
+            await watcher.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_stale_batches_dropped(self):
+        async def scenario():
+            watcher, _ = await self.join()
+            await get_channel_layer().group_send(f'room_{self.room.id}', {
+                'type': 'ephemeral_signals',
+                'room_id': str(self.room.id),
+                'signals': [{'userId': 'someone', 'kind': 'typing', 'value': True}],
+                'sent_at': 0,
+            })
+            assert await watcher.receive_nothing(timeout=0.2)
+            await watcher.disconnect()
+
+        async_to_sync(scenario)()
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='EtagUser',
+            email='etag@example.com',
+            password='EtagPass@123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.room = Room.objects.create(host=self.user, title="Etag Room")
+
+    def test_list_not_modified(self, django_assert_num_queries):
+        """A matching If-None-Match on the list is a 304 without queries"""
+        url = reverse('room-list')
+        etag = self.client.get(url)['ETag']
+
+        with django_assert_num_queries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_list_changes_after_room_created(self):
+        """Creating a room invalidates the list ETag"""
+        url = reverse('room-list')
+        etag = self.client.get(url)['ETag']
+
+        Room.objects.create(host=self.user, title="Another Room")
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_detail_changes_after_join(self):
+        """Joining a room invalidates its detail ETag"""
+        url = reverse('room-detail', kwargs={'id': self.room.id})
+        etag = self.client.get(url)['ETag']
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        self.room.participants.add(self.user)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.data["participant_count"] == 1
+
+    def test_wildcard_only_for_existing_rooms(self):
+        """If-None-Match: * is a 304 for a room that exists and a 404 otherwise"""
+        url = reverse('room-detail', kwargs={'id': self.room.id})
+        assert self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code == 304
+
+        missing = reverse('room-detail', kwargs={'id': uuid.uuid4()})
+        assert self.client.get(missing, HTTP_IF_NONE_MATCH='*').status_code == 404
@@ -0,0 +1,101 @@
+import queue
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room, RoomEventCheckpoint, RoomPeakConcurrency, RoomSessionDuration, RoomTimeToConnect
+from rooms.routing import websocket_urlpatterns
+from rooms import analytics, events
+
+
+class TestFileEventLog:
+
+    def test_segments_capped_and_read_in_order(self, tmp_path):
+        """Old segments are dropped by the cap; reads resume from a position"""
+        log = events.FileEventLog(tmp_path, segment_bytes=60, max_segments=2)
+        room_id = str(uuid.uuid4())
+        for n in range(10):
+            log.append_many(room_id, [{'ts': n, 'type': 'chat', 'session': 's'}])
+
+        assert len(list((tmp_path / room_id).glob('*.jsonl'))) == 2
+        assert log.rooms() == [room_id]
+
+        first, position = log.read(room_id, limit=2)
+        rest, position = log.read(room_id, position)
+        seen = [event['ts'] for event in first + rest]
+        assert seen == sorted(seen) and seen[-1] == 9 and len(seen) < 10
+
+        log.append_many(room_id, [{'ts': 10, 'type': 'chat', 'session': 's'}])
+        more, _ = log.read(room_id, position)
+        assert [event['ts'] for event in more] == [10]
+
+    def test_record_never_blocks(self, settings, tmp_path):
+        """A full queue drops events instead of waiting"""
+        settings.ROOM_EVENTS = {'DIR': tmp_path}
+        writer = events.EventWriter()
+        writer._thread = type('Alive', (), {'is_alive': lambda self: True})()
+        writer._queue = queue.Queue(maxsize=1)
+
+        writer.put('room', {'ts': 1})
+        writer.put('room', {'ts': 2})
+        assert writer.dropped == 1
+
+
+def event(ts, kind, session, peer=None):
+    return {'ts': ts, 'type': kind, 'session': session, 'peer': peer}
+
+
+@pytest.mark.django_db
+class TestRollup:
+
+    def test_fold_across_batches(self, tmp_path):
+        """Durations, time to connect and peaks, with sessions spanning batches"""
+        log = events.FileEventLog(tmp_path, segment_bytes=1024 * 1024, max_segments=4)
+        room_id = str(uuid.uuid4())
+        hour = 1_700_000_000 - 1_700_000_000 % 3600
+        log.append_many(room_id, [
+            event(hour + 0, 'connect', 'a'),
+            event(hour + 1, 'connect', 'b'),
+            event(hour + 3, 'offer', 'a', 'b'),
+            event(hour + 4, 'answer', 'b', 'a'),
+            event(hour + 10, 'disconnect', 'b'),
+            event(hour + 3600, 'connect', 'c'),
+            event(hour + 3620, 'disconnect', 'a'),
+        ])
+
+        assert analytics.rollup_room(room_id, log, batch_size=3) == 7
+
+        durations = dict(RoomSessionDuration.objects.values_list('session', 'seconds'))
+        assert durations == {'b': 9, 'a': 3620}
+        connects = dict(RoomTimeToConnect.objects.values_list('session', 'seconds'))
+        assert connects == {'a': 4, 'b': 3}
+        peaks = list(RoomPeakConcurrency.objects.order_by('hour').values_list('peak', flat=True))
+        assert peaks == [2, 2]
+        assert list(RoomEventCheckpoint.objects.get(room_id=room_id).state['open']) == ['c']
+
+        # Nothing new: a rerun reads nothing and changes nothing
+        assert analytics.rollup_room(room_id, log) == 0
+        assert RoomSessionDuration.objects.count() == 2
+
+    def test_consumer_events_reach_rollup(self, settings, tmp_path):
+        """Socket connect and disconnect land in the log and roll up into a session"""
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_EVENTS = {'DIR': tmp_path}
+        host = User.objects.create_user(username='EventsHost', email='eventshost@example.com', password='EventsPass@123')
+        room = Room.objects.create(host=host, title="Events Room")
+
+        async def scenario():
+            client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{room.id}/")
+            connected, _ = await client.connect()
+            assert connected
+            await client.receive_json_from()
+            await client.disconnect()
+
+        async_to_sync(scenario)()
+        events.writer.flush()
+
+        assert analytics.rollup() == {str(room.id): 2}
+        assert RoomSessionDuration.objects.filter(room_id=room.id).count() == 1
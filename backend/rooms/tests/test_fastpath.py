@@ -0,0 +1,50 @@
+import pytest
+from rooms import fastpath
+from rooms.models import Room
+from rooms.serializers import RoomSerializer
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestRoomFastPathContract:
+
+    def setup_method(self):
+        self.host = User.objects.create_user(
+            username='FastHost',
+            email='fasthost@example.com',
+            password='FastPass@123'
+        )
+        self.guest = User.objects.create_user(
+            username='FastGuest',
+            email='fastguest@example.com',
+            password='FastPass@123'
+        )
+        self.busy = Room.objects.create(host=self.host, title="Busy Room", max_participants=3)
+        self.busy.participants.add(self.host, self.guest)
+        self.empty = Room.objects.create(host=self.guest, title="")
+
+    def test_fields_match_serializer(self):
+        """The fast path emits exactly RoomSerializer's fields, in order"""
+        assert fastpath.FIELDS == tuple(RoomSerializer.Meta.fields)
+        assert tuple(fastpath.encode_room(Room.objects.filter(id=self.busy.id))) == fastpath.FIELDS
+
+    def test_list_payload_matches_serializer(self):
+        """Every row is identical to the serializer output"""
+        queryset = Room.objects.order_by('created_at')
+        expected = [dict(row) for row in RoomSerializer(queryset, many=True).data]
+        assert fastpath.encode_rooms(queryset) == expected
+
+    def test_detail_payload_matches_serializer(self):
+        """Single room payloads are identical too"""
+        for room in (self.busy, self.empty):
+            room.refresh_from_db()
+            assert fastpath.encode_room(Room.objects.filter(id=room.id)) == dict(RoomSerializer(room).data)
+
+    def test_list_runs_one_query(self, django_assert_num_queries):
+        """The list encodes in a single query regardless of room count"""
+        with django_assert_num_queries(1):
+            fastpath.encode_rooms(Room.objects.all())
+
+    def test_missing_room(self):
+        """Unknown rooms encode to None"""
+        assert fastpath.encode_room(Room.objects.filter(title="nope")) is None
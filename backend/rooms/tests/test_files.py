@@ -0,0 +1,202 @@
+import hashlib
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room, RoomFile
+from rooms.routing import websocket_urlpatterns
+from rooms import files, membership, reaper
+
+CONTENT = b'0123456789abcdefghij'
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.django_db
+class TestRoomFiles:
+
+    @pytest.fixture(autouse=True)
+    def setup_room(self, settings, tmp_path):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_FILES = {'DIR': tmp_path, 'MAX_CHUNK_BYTES': 8, 'READ_BYTES': 3}
+        self.host = User.objects.create_user(
+            username='FileHost',
+            email='filehost@example.com',
+            password='FilePass@123'
+        )
+        self.room = Room.objects.create(host=self.host, title="File Room")
+        membership.join(self.room.id, self.host)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.host)
+
+    def start(self, content=CONTENT, declare_hash=False, name='notes.txt'):
+        data = {'name': name, 'size': len(content), 'content_type': 'text/plain'}
+        if declare_hash:
+            data['sha256'] = sha(content)
+        return self.client.post(reverse('room-files', kwargs={'room_id': self.room.id}), data, format='json')
+
+    def patch(self, file_id, offset, data):
+        url = reverse('room-file-upload', kwargs={'room_id': self.room.id, 'file_id': file_id})
+        return self.client.patch(
+            url, data, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def upload(self, content=CONTENT, declare_hash=False):
+        response = self.start(content, declare_hash)
+        file_id, offset = response.data['id'], response.data['offset']
+        while offset < len(content):
+            response = self.patch(file_id, offset, content[offset:offset + 8])
+            assert response.status_code == status.HTTP_200_OK
+            offset = response.data['offset']
+        return RoomFile.objects.get(pk=file_id)
+
+    def test_resumable_upload(self, django_capture_on_commit_callbacks):
+        response = self.start(declare_hash=True)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert (response.data['offset'], response.data['complete']) == (0, False)
+        file_id = response.data['id']
+
+        assert self.patch(file_id, 8, CONTENT[8:16]).status_code == status.HTTP_409_CONFLICT
+        assert self.patch(file_id, 0, CONTENT[:9]).status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert self.patch(file_id, 0, CONTENT[:8]).data['offset'] == 8
+
+        # A client that lost track asks where to resume
+        url = reverse('room-file-upload', kwargs={'room_id': self.room.id, 'file_id': file_id})
+        assert self.client.head(url)['Upload-Offset'] == '8'
+
+        assert self.patch(file_id, 8, CONTENT[8:16]).data['offset'] == 16
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = self.patch(file_id, 16, CONTENT[16:])
+        assert response.data == {'offset': 20, 'complete': True}
+        assert len(callbacks) == 1  # the file_shared announcement
+
+        assert files.blob_path(sha(CONTENT)).read_bytes() == CONTENT
+        assert not files.part_path(file_id).exists()
+        assert self.patch(file_id, 20, b'x').status_code == status.HTTP_409_CONFLICT
+
+    def test_content_stored_once(self):
+        first = self.upload()
+        assert first.sha256 == sha(CONTENT)
+
+        # Knowing the hash is not enough: the bytes are still sent
+        response = self.start(declare_hash=True)
+        assert (response.data['offset'], response.data['complete']) == (0, False)
+
+        # Hash found on completion: the new copy is dropped
+        again = self.upload(declare_hash=True)
+        assert again.sha256 == first.sha256 and again.pk != first.pk
+        assert [path.name for path in (files.root() / 'blobs').rglob('*') if path.is_file()] == [sha(CONTENT)]
+
+    def test_hash_mismatch_restarts(self):
+        response = self.client.post(
+            reverse('room-files', kwargs={'room_id': self.room.id}),
+            {'name': 'x.bin', 'size': 4, 'sha256': sha(b'abcd')}, format='json',
+        )
+        response = self.patch(response.data['id'], 0, b'abce')
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.data['offset'] == 0
+        assert not (files.root() / 'blobs').exists()
+
+    def test_members_only(self):
+        file = self.upload()
+        other = User.objects.create_user(username='Outsider', email='out@example.com', password='FilePass@123')
+        self.client.force_authenticate(user=other)
+        assert self.start().status_code == status.HTTP_403_FORBIDDEN
+        assert self.client.get(reverse('room-files', kwargs={'room_id': self.room.id})).status_code == status.HTTP_403_FORBIDDEN
+        url = reverse('room-file-download', kwargs={'room_id': self.room.id, 'file_id': file.pk})
+        assert self.client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+        # Leaving the room ends access too
+        self.client.force_authenticate(user=self.host)
+        membership.leave(self.room.id, self.host)
+        assert self.client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_download_ranges(self, settings):
+        file = self.upload()
+        url = reverse('room-file-download', kwargs={'room_id': self.room.id, 'file_id': file.pk})
+
+        response = self.client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == CONTENT
+        assert response['Content-Disposition'] == 'attachment; filename="notes.txt"'
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert b''.join(response.streaming_content) == b'2345'
+        assert (response['Content-Range'], response['Content-Length']) == ('bytes 2-5/20', '4')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-3')
+        assert b''.join(response.streaming_content) == b'hij'
+        response = self.client.get(url, HTTP_RANGE='bytes=18-99')
+        assert b''.join(response.streaming_content) == b'ij'
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+        assert response.status_code == status.HTTP_200_OK
+
+        response = self.client.get(url, HTTP_RANGE='bytes=20-')
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == 'bytes */20'
+
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        settings.ROOM_FILES = {**settings.ROOM_FILES, 'SENDFILE': 'X-Accel-Redirect'}
+        response = self.client.get(url)
+        assert response['X-Accel-Redirect'] == f'/protected/room_files/blobs/{file.sha256[:2]}/{file.sha256}'
+        assert response.content == b''
+
+    def test_reaper_releases_content(self, django_capture_on_commit_callbacks):
+        closed = self.room
+        kept = Room.objects.create(host=self.host, title="Kept")
+        membership.join(kept.id, self.host)
+        shared = self.upload()
+        unique = self.upload(b'only in this room')
+        RoomFile.objects.create(
+            room=kept, uploaded_by=self.host, name='copy.txt', size=len(CONTENT),
+            sha256=shared.sha256, received=len(CONTENT), completed_at=timezone.now(),
+        )
+        interrupted = self.start(b'never finished').data['id']
+        self.patch(interrupted, 0, b'never')
+        self.room = kept
+        abandoned = self.start(b'abandoned').data['id']
+        self.patch(abandoned, 0, b'aban')
+
+        RoomFile.objects.filter(pk=abandoned).update(created_at=timezone.now() - timedelta(days=2))
+        Room.objects.filter(pk=closed.pk).update(is_active=False, last_activity_at=timezone.now() - timedelta(days=30))
+        with django_capture_on_commit_callbacks(execute=True):
+            reaper.reap()
+
+        assert files.blob_path(shared.sha256).exists()
+        assert not files.blob_path(unique.sha256).exists()
+        assert not files.part_path(interrupted).exists()
+        assert not files.part_path(abandoned).exists()
+        assert not RoomFile.objects.filter(pk=abandoned).exists()
+
+    def test_socket_gets_reference_only(self, django_capture_on_commit_callbacks):
+        def upload():
+            with django_capture_on_commit_callbacks(execute=True):
+                return self.upload()
+
+        async def scenario():
+            client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.id}/")
+            await client.connect()
+            await client.receive_json_from()  # connection_established
+            await client.receive_json_from()  # participant_update
+
+            file = await database_sync_to_async(upload)()
+            frame = await client.receive_from()
+            assert json.loads(frame) == {'type': 'file_shared', 'file': files.encode(file)}
+            assert CONTENT.decode() not in frame
+            await client.disconnect()
+
+        async_to_sync(scenario)()
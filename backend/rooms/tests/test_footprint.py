@@ -0,0 +1,93 @@
+import asyncio
+import gc
+import os
+import tracemalloc
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+import rooms
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+
+ROOMS_DIR = os.path.dirname(rooms.__file__)
+
+
+def retained_by_rooms_code(before, after):
+    """Bytes allocated between the snapshots, with rooms/ code on the stack, still alive"""
+    filters = [
+        tracemalloc.Filter(True, os.path.join(ROOMS_DIR, '*'), all_frames=True),
+        tracemalloc.Filter(False, os.path.join(ROOMS_DIR, 'tests', '*'), all_frames=True),
+        # The test transport's buffers, standing in for the server's
+        tracemalloc.Filter(False, asyncio.queues.__file__),
+    ]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'filename')
+    return sum(stat.size_diff for stat in stats)
+
+
+@pytest.mark.django_db
+class TestConnectionFootprint:
+    # Bytes our own code keeps per idle room socket: its fields on the
+    # consumer, room presence, the drain registry and the channel layer
+    # group entry. The ASGI server's and Channels' own per-connection
+    # objects are not counted
+    BUDGET = 1024
+    SOCKETS = 60
+
+    @pytest.fixture(autouse=True)
+    def setup_rooms(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_EVENTS = {'ENABLED': False}
+        host = User.objects.create_user(
+            username='FootprintHost',
+            email='footprinthost@example.com',
+            password='FootprintPass@123'
+        )
+        self.rooms = [
+            Room.objects.create(host=host, title=f"Footprint {n}", max_participants=100)
+            for n in range(3)
+        ]
+
+    def test_idle_connection_budget(self):
+        async def scenario():
+            app = URLRouter(websocket_urlpatterns)
+            sockets = []
+
+            async def settle():
+                # Deliver everything queued so only idle state remains
+                for socket in sockets:
+                    while not await socket.receive_nothing(timeout=0.01):
+                        await socket.receive_from()
+
+            async def open_socket(room):
+                socket = WebsocketCommunicator(app, f"/ws/room/{room.id}/")
+                connected, _ = await socket.connect(timeout=10)
+                assert connected
+                sockets.append(socket)
+
+            # The first socket in each room pays for per-room state
+            for room in self.rooms:
+                await open_socket(room)
+            await settle()
+
+            gc.collect()
+            tracemalloc.start(64)
+            try:
+                before = tracemalloc.take_snapshot()
+                for n in range(self.SOCKETS):
+                    await open_socket(self.rooms[n % len(self.rooms)])
+                await settle()
+                gc.collect()
+                after = tracemalloc.take_snapshot()
+            finally:
+                tracemalloc.stop()
+
+            per_socket = retained_by_rooms_code(before, after) / self.SOCKETS
+            assert per_socket < self.BUDGET, f"{per_socket:.0f} bytes per idle socket"
+
+            for socket in sockets:
+                await socket.disconnect()
+
+        async_to_sync(scenario)()
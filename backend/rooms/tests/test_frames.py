@@ -0,0 +1,131 @@
+import json
+import random
+import string
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+from rooms import frames
+
+OFFER = {
+    'type': 'offer',
+    'offer': {'type': 'offer', 'sdp': 'v=0\r\n' + 'a=x\r\n' * 200},
+    'targetUserId': 'a1b2c3',
+}
+ICE = {
+    'type': 'ice_candidate',
+    'candidate': {'candidate': 'candidate:1 1 udp 2122260223 10.0.0.1 5000 typ host', 'sdpMid': '0', 'sdpMLineIndex': 0},
+    'targetUserId': 'a1b2c3',
+}
+CHAT = {'type': 'chat_message', 'message': 'hello', 'username': 'Alice'}
+
+
+def code_of(text):
+    with pytest.raises(frames.FrameError) as caught:
+        frames.decode(text)
+    return caught.value.code
+
+
+class TestDecode:
+
+    @pytest.mark.parametrize('frame', [OFFER, ICE, CHAT])
+    def test_valid_frames(self, frame):
+        spec, payload = frames.decode(json.dumps(frame))
+        assert payload == frame
+        assert spec is frames.VIDEO_ROOM_FRAMES[frame['type']]
+
+    def test_oversized_rejected_without_parsing(self, monkeypatch):
+        """Size and type limits are applied before json.loads runs"""
+        def fail(*args, **kwargs):
+            raise AssertionError("parsed")
+        monkeypatch.setattr(frames.json, 'loads', fail)
+
+        assert code_of('x' * (frames.get_setting('MAX_FRAME_CHARS') + 1)) == frames.TOO_LARGE
+        assert code_of('{"type":"ice_candidate","candidate":"' + 'x' * 4000 + '"}') == frames.TOO_LARGE
+        assert code_of('{"type":"bogus","x":1}') == frames.BAD_TYPE
+
+    def test_rejections(self):
+        assert code_of('{"type": "offer",') == frames.BAD_JSON
+        assert code_of('[1, 2]') == frames.BAD_JSON
+        assert code_of('{"message": "no type"}') == frames.BAD_TYPE
+        assert code_of(json.dumps({'type': 'chat_message', 'message': 5})) == frames.BAD_FIELD
+        assert code_of(json.dumps({**CHAT, **{f'k{i}': i for i in range(40)}})) == frames.TOO_LARGE
+        # A second "type" key can't borrow the first one's size limit
+        assert code_of('{"type":"chat_message","type":"offer","offer":{},"targetUserId":"x"}') == frames.BAD_TYPE
+
+    def test_field_path_reported(self):
+        frame = dict(OFFER, offer={'type': 'offer', 'sdp': 7})
+        with pytest.raises(frames.FrameError) as caught:
+            frames.decode(json.dumps(frame))
+        assert caught.value.as_message() == {'type': 'error', 'code': frames.BAD_FIELD, 'field': 'offer.sdp'}
+
+    def test_fuzz(self):
+        """Random and mutated frames either decode or fail with a FrameError, nothing else"""
+        rng = random.Random(1234)
+        seeds = [json.dumps(frame) for frame in (OFFER, ICE, CHAT)]
+        alphabet = string.printable + '{}[]":,\\é中'
+        cases = []
+        for _ in range(1500):
+            seed = rng.choice(seeds)
+            mutation = rng.randrange(5)
+            if mutation == 0:
+                cases.append(''.join(rng.choice(alphabet) for _ in range(rng.randrange(200))))
+            elif mutation == 1:
+                cases.append(seed[:rng.randrange(len(seed))])
+            elif mutation == 2:
+                position = rng.randrange(len(seed))
+                cases.append(seed[:position] + rng.choice(alphabet) + seed[position + 1:])
+            elif mutation == 3:
+                depth = rng.randrange(1, 5000)
+                cases.append('{"type":"chat_message","message":' + '[' * depth + ']' * depth + '}')
+            else:
+                cases.append(bytes(rng.randrange(256) for _ in range(64)).decode('latin-1'))
+
+        for case in cases:
+            try:
+                frames.decode(case)
+            except frames.FrameError:
+                pass
+
+    def test_oversized_frames_rejected_unparsed(self, monkeypatch):
+        """Frames too large, overall or for their type, are rejected before the JSON parser runs"""
+        def parse(*args, **kwargs):
+            raise AssertionError("the body was parsed")
+        monkeypatch.setattr(frames.json, 'loads', parse)
+
+        for text in ('{"type":"offer","offer":"' + 'x' * 10_000_000 + '"}',
+                     '{"type":"ice_candidate","candidate":"' + 'x' * 60_000 + '"}'):
+            with pytest.raises(frames.FrameError) as rejected:
+                frames.decode(text)
+            assert rejected.value.code == frames.TOO_LARGE
+
+
+@pytest.mark.django_db
+def test_consumer_reports_error_codes(settings):
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    host = User.objects.create_user(username='FrameHost', email='framehost@example.com', password='FramePass@123')
+    room = Room.objects.create(host=host, title="Frame Room")
+
+    async def scenario():
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{room.id}/")
+        await client.connect()
+        await client.receive_json_from()
+        await client.receive_json_from()  # participant_update
+
+        await client.send_to(text_data='not json')
+        assert await client.receive_json_from() == {'type': 'error', 'code': frames.BAD_JSON}
+
+        await client.send_to(text_data='{"type":"shout"}')
+        assert await client.receive_json_from() == {'type': 'error', 'code': frames.BAD_TYPE}
+
+        await client.send_to(text_data=json.dumps(CHAT))
+        broadcast = await client.receive_json_from()
+        assert broadcast['type'] == 'chat_message' and broadcast['message'] == 'hello'
+
+        await client.disconnect()
+
+    async_to_sync(scenario)()
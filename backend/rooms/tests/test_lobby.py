@@ -0,0 +1,78 @@
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+from rooms import lobby, membership
+
+
+@pytest.mark.django_db
+class TestLobbyFeed:
+
+    @pytest.fixture(autouse=True)
+    def setup_lobby(self, settings):
+        settings.CHANNEL_LAYERS = {
+            'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+        }
+        settings.ROOM_LOBBY = {'TICK_INTERVAL': 0.05}
+        self.host = User.objects.create_user(
+            username='LobbyHost',
+            email='lobbyhost@example.com',
+            password='LobbyPass@123'
+        )
+        self.room = Room.objects.create(host=self.host, title="Lobby Room")
+
+    def communicator(self, path):
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+
+    def test_snapshot_then_count_delta(self, django_capture_on_commit_callbacks):
+        """Lobby gets a snapshot, then a delta when someone joins a room"""
+        async def scenario():
+            viewer = self.communicator("/ws/lobby/")
+            connected, _ = await viewer.connect()
+            assert connected
+
+            snapshot = await viewer.receive_json_from()
+            assert snapshot['type'] == 'lobby_snapshot'
+            assert [room['id'] for room in snapshot['rooms']] == [str(self.room.id)]
+
+            def join():
+                with django_capture_on_commit_callbacks(execute=True):
+                    membership.join(self.room.id, self.host)
+
+            await sync_to_async(join)()
+
+            delta = await viewer.receive_json_from(timeout=2)
+            assert delta['type'] == 'lobby_delta'
+            assert [(d['event'], d['room_id'], d['participant_count']) for d in delta['deltas']] == [
+                ('count', str(self.room.id), 1)
+            ]
+
+            await viewer.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_deltas_coalesced_per_tick(self):
+        """Several changes to one room within a tick produce a single delta"""
+        async def scenario():
+            viewer = self.communicator("/ws/lobby/")
+            await viewer.connect()
+            await viewer.receive_json_from()
+
+            payload = {'id': str(self.room.id), 'participant_count': 0}
+            lobby.note_room_created(payload)
+            lobby.note_count_changed(self.room.id, 1)
+            lobby.note_count_changed(self.room.id, 2)
+
+            delta = await viewer.receive_json_from(timeout=2)
+            assert len(delta['deltas']) == 1
+            assert delta['deltas'][0]['event'] == 'created'
+            assert delta['deltas'][0]['participant_count'] == 2
+            assert delta['deltas'][0]['room']['participant_count'] == 2
+            assert await viewer.receive_nothing(timeout=0.2)
+
+            await viewer.disconnect()
+
+        async_to_sync(scenario)()
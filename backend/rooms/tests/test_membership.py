@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room, RoomMembership
+from rooms import dialects, membership
+
+
+@pytest.mark.django_db
+class TestRoomMembership:
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.host = User.objects.create_user(
+            username='MemberHost',
+            email='memberhost@example.com',
+            password='MemberPass@123'
+        )
+        self.guest = User.objects.create_user(
+            username='MemberGuest',
+            email='memberguest@example.com',
+            password='MemberPass@123'
+        )
+        self.room = Room.objects.create(host=self.host, title="Member Room", max_participants=5)
+
+    def test_join_and_leave_endpoints(self):
+        """Join opens one membership, leave closes it and frees the seat"""
+        self.client.force_authenticate(user=self.guest)
+
+        response = self.client.post(reverse('room-join', kwargs={'room_id': self.room.id}))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["participant_count"] == 1
+
+        response = self.client.post(reverse('room-leave', kwargs={'room_id': self.room.id}))
+        assert response.status_code == status.HTTP_200_OK
+
+        self.room.refresh_from_db()
+        assert self.room.participant_count == 0
+        row = RoomMembership.objects.get(room=self.room, user=self.guest)
+        assert row.left_at is not None
+
+    def test_join_twice(self):
+        """A second join while active is reported and not counted"""
+        assert membership.join(self.room.id, self.guest)[0] == membership.JOINED
+        assert membership.join(self.room.id, self.guest) == (membership.ALREADY_JOINED, None)
+
+        self.room.refresh_from_db()
+        assert self.room.participant_count == 1
+        assert RoomMembership.objects.filter(room=self.room, user=self.guest).count() == 1
+
+    def test_rejoin_keeps_history(self):
+        """Rejoining after leaving adds a new row next to the closed one"""
+        membership.join(self.room.id, self.guest)
+        assert membership.leave(self.room.id, self.guest)
+        assert membership.join(self.room.id, self.guest)[0] == membership.JOINED
+
+        rows = RoomMembership.objects.filter(room=self.room, user=self.guest)
+        assert rows.count() == 2
+        assert rows.active().count() == 1
+
+    def test_leave_without_membership(self):
+        """Leaving a room you're not in is a 400 and changes nothing"""
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.post(reverse('room-leave', kwargs={'room_id': self.room.id}))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        self.room.refresh_from_db()
+        assert self.room.participant_count == 0
+
+    def test_active_lookups(self):
+        """Who is in a room, and which rooms a user is in, ignore past memberships"""
+        other = Room.objects.create(host=self.host, title="Other Room")
+        membership.join(self.room.id, self.guest)
+        membership.join(self.room.id, self.host)
+        membership.join(other.id, self.guest)
+        membership.leave(other.id, self.guest)
+
+        assert set(membership.active_members(self.room.id)) == {self.host, self.guest}
+        assert list(membership.rooms_for_user(self.guest)) == [self.room]
+
+        self.client.force_authenticate(user=self.guest)
+        response = self.client.get(reverse('room-mine'))
+        assert [room['id'] for room in response.data] == [str(self.room.id)]
+
+    def test_direct_add_recounts(self):
+        """participants.add() outside membership.py still keeps the count right"""
+        self.room.participants.add(self.guest, self.host)
+        self.room.refresh_from_db()
+        assert self.room.participant_count == 2
+
+    def test_join_query_count(self):
+        """The happy path is the conditional UPDATE plus the INSERT"""
+        with CaptureQueriesContext(connection) as captured:
+            outcome, room = membership.join(self.room.id, self.guest)
+        assert outcome == membership.JOINED
+        assert (room.title, room.host_name, room.participant_count) == ("Member Room", "MemberHost", 1)
+        statements = [q['sql'].split()[0] for q in captured.captured_queries]
+        assert [s for s in statements if s in ('SELECT', 'UPDATE', 'INSERT')] == ['UPDATE', 'INSERT']
+
+    def test_join_without_update_returning(self, monkeypatch):
+        """Backends without UPDATE ... RETURNING (MariaDB, MySQL) read the row back"""
+        class MariaDB:
+            vendor = 'mysql'
+        assert not dialects.can_update_returning(MariaDB())
+
+        monkeypatch.setattr(dialects, 'can_update_returning', lambda connection: False)
+        outcome, room = membership.join(self.room.id, self.guest)
+        assert outcome == membership.JOINED
+        assert (room.title, room.host_name, room.participant_count) == ("Member Room", "MemberHost", 1)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_joiners_respect_capacity():
+    """Many users joining at once never take more seats than max_participants"""
+    host = User.objects.create_user(username='RaceHost', email='racehost@example.com', password='RacePass@123')
+    room = Room.objects.create(host=host, title="Race Room", max_participants=3)
+    joiners = [
+        User.objects.create_user(username=f'Racer{i}', email=f'racer{i}@example.com', password='RacePass@123')
+        for i in range(12)
+    ]
+    barrier = threading.Barrier(len(joiners))
+
+    def join(user):
+        barrier.wait()
+        try:
+            while True:
+                try:
+                    return membership.join(room.id, user)[0]
+                except OperationalError:
+                    # SQLite's shared-cache test database reports lock
+                    # contention instead of waiting; the join was rolled back
+                    time.sleep(0.005)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(joiners)) as pool:
+        outcomes = list(pool.map(join, joiners))
+
+    room.refresh_from_db()
+    assert outcomes.count(membership.JOINED) == 3
+    assert outcomes.count(membership.ROOM_FULL) == 9
+    assert room.participant_count == 3
+    assert RoomMembership.objects.active().filter(room=room).count() == 3
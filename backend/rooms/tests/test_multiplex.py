@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+from rooms import frames, tickets
+
+
+@pytest.mark.django_db
+class TestMultiplexedSocket:
+
+    @pytest.fixture(autouse=True)
+    def setup_rooms(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_MULTIPLEX = {'MAX_ROOMS': 2}
+        self.host = User.objects.create_user(
+            username='MuxHost',
+            email='muxhost@example.com',
+            password='MuxPass@123'
+        )
+        self.first = Room.objects.create(host=self.host, title="First")
+        self.second = Room.objects.create(host=self.host, title="Second")
+        self.third = Room.objects.create(host=self.host, title="Third")
+
+    def communicator(self, path):
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+
+    def test_requires_ticket(self):
+        """Sockets authenticate with a ticket from ws-ticket/, which works once"""
+        client = APIClient()
+        client.force_authenticate(user=self.host)
+        ticket = client.post(reverse('room-ws-ticket')).data['ticket']
+
+        async def scenario():
+            for path, accepted in (("/ws/rooms/", False), (f"/ws/rooms/?ticket={ticket}", True),
+                                   (f"/ws/rooms/?ticket={ticket}", False)):
+                client = self.communicator(path)
+                connected, code = await client.connect()
+                assert connected == accepted
+                if connected:
+                    await client.disconnect()
+                else:
+                    assert code == 4001
+
+        async_to_sync(scenario)()
+
+    def test_one_socket_many_rooms(self):
+        """Frames are routed per room both ways through the shared handlers"""
+        async def scenario():
+            mux = self.communicator(f"/ws/rooms/?ticket={tickets.issue(self.host.id)}")
+            connected, _ = await mux.connect()
+            assert connected
+
+            for room in (self.first, self.second):
+                await mux.send_json_to({'type': 'subscribe', 'room': str(room.id)})
+                established = await mux.receive_json_from()
+                assert established['type'] == 'connection_established'
+                assert established['room'] == str(room.id)
+                assert (await mux.receive_json_from())['type'] == 'participant_update'
+
+            await mux.send_json_to({'type': 'subscribe', 'room': str(self.third.id)})
+            assert await mux.receive_json_from() == {
+                'type': 'error', 'code': frames.TOO_MANY_ROOMS, 'room': str(self.third.id)
+            }
+
+            # A plain single-room socket in the first room
+            peer = self.communicator(f"/ws/room/{self.first.id}/")
+            await peer.connect()
+            peer_id = (await peer.receive_json_from())['userId']
+            await peer.receive_json_from()  # participant_update
+
+            update = await mux.receive_json_from()
+            assert (update['room'], update['type']) == (str(self.first.id), 'participant_update')
+            joined = await mux.receive_json_from()
+            assert (joined['room'], joined['type'], joined['userId']) == (str(self.first.id), 'user_joined', peer_id)
+
+            await peer.send_to(text_data=json.dumps({'type': 'chat_message', 'message': 'hi', 'username': 'Peer'}))
+            chat = await mux.receive_json_from()
+            assert (chat['room'], chat['message']) == (str(self.first.id), 'hi')
+            await peer.receive_json_from()
+            assert await mux.receive_nothing(timeout=0.1)  # nothing leaks into the second room
+
+            await mux.send_json_to({'type': 'offer', 'room': str(self.first.id), 'targetUserId': peer_id,
+                                    'offer': {'type': 'offer', 'sdp': 'v=0'}})
+            offer = await peer.receive_json_from()
+            assert offer['type'] == 'offer' and offer['offer']['sdp'] == 'v=0'
+
+            await mux.send_json_to({'type': 'unsubscribe', 'room': str(self.first.id)})
+            left = await peer.receive_json_from()
+            assert left['type'] == 'user_left'
+            assert await mux.receive_json_from() == {'type': 'unsubscribed', 'room': str(self.first.id)}
+
+            await mux.send_json_to({'type': 'chat_message', 'room': str(self.first.id), 'message': 'gone'})
+            assert await mux.receive_json_from() == {
+                'type': 'error', 'code': frames.NOT_SUBSCRIBED, 'room': str(self.first.id)
+            }
+
+            await mux.disconnect()
+            await peer.disconnect()
+
+        async_to_sync(scenario)()
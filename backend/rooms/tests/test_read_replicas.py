@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room
+from rooms import versioning
+from config import replicas
+
+
+@pytest.fixture(scope='module', autouse=True)
+def replica_alias(django_db_setup):
+    """A second alias on the test database, standing in for a replica"""
+    connections.settings['replica'] = dict(connections['default'].settings_dict)
+    yield
+    connections['replica'].close()
+    del connections['replica']
+    del connections.settings['replica']
+
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = {'ALIASES': ['replica'], 'PIN_SECONDS': 5}
+    cache.clear()
+    return connections['replica']
+
+
+def queries(capture):
+    return [query['sql'] for query in capture.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_router_rules(replica):
+    """Room reads go to the replica unless a transaction or pin says otherwise"""
+    router = replicas.PrimaryReplicaRouter()
+
+    assert router.db_for_read(Room) == 'replica'
+    assert router.db_for_read(User) is None
+    assert router.db_for_write(Room) == 'default'
+    assert not router.allow_migrate('replica', 'rooms')
+
+    with transaction.atomic():
+        assert router.db_for_read(Room) == 'default'
+
+    token = replicas._state.set(replicas.RoutingState())
+    try:
+        router.db_for_write(Room)
+        assert router.db_for_read(Room) == 'default'
+    finally:
+        replicas._state.reset(token)
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_reads_use_replica_until_user_writes(replica):
+    """List reads hit the replica, except right after the user's own join"""
+    client = APIClient()
+    user = User.objects.create_user(username='ReplicaUser', email='replica@example.com', password='ReplicaPass@123')
+    other = User.objects.create_user(username='OtherUser', email='other@example.com', password='ReplicaPass@123')
+    room = Room.objects.create(host=other, title="Replica Room")
+    client.force_authenticate(user=user)
+
+    with CaptureQueriesContext(replica) as on_replica:
+        assert client.get(reverse('room-list')).status_code == 200
+    assert any('rooms_room' in sql for sql in queries(on_replica))
+
+    assert client.post(reverse('room-join', kwargs={'room_id': room.id})).status_code == 200
+
+    with CaptureQueriesContext(replica) as on_replica, CaptureQueriesContext(connections['default']) as on_primary:
+        response = client.get(reverse('room-detail', kwargs={'id': room.id}))
+    assert response.data['participant_count'] == 1
+    assert not queries(on_replica)
+    assert any('rooms_room' in sql for sql in queries(on_primary))
+
+    # Another user isn't pinned by someone else's write
+    client.force_authenticate(user=other)
+    with CaptureQueriesContext(replica) as on_replica:
+        response = client.get(reverse('room-detail', kwargs={'id': room.id}))
+    assert response.data['participant_count'] == 1
+    assert any('rooms_room' in sql for sql in queries(on_replica))
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+def test_replica_reads_tagged_by_content(replica):
+    """A replica-served body carries a tag of its own content, not the cached version"""
+    client = APIClient()
+    user = User.objects.create_user(username='TagUser', email='tag@example.com', password='ReplicaPass@123')
+    room = Room.objects.create(host=user, title="Tagged Room")
+    client.force_authenticate(user=user)
+    url = reverse('room-detail', kwargs={'id': room.id})
+
+    response = client.get(url)
+    assert response['ETag'] == versioning.content_etag(response.data)
+    assert response['ETag'] != versioning.room_etag(room.id)
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    # A bumped version alone doesn't change the tag of the same rows
+    versioning.bump_room(room.id)
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    Room.objects.filter(pk=room.pk).update(title="Renamed")
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
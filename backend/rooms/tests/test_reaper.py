@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import ArchivedRoom, Room, RoomMembership
+from rooms import chat, membership, reaper
+
+
+@pytest.mark.django_db
+class TestRoomReaper:
+
+    @pytest.fixture(autouse=True)
+    def setup_reaper(self, settings):
+        settings.ROOM_REAPER = {'IDLE_SECONDS': 60, 'ARCHIVE_AFTER_SECONDS': 3600, 'BATCH_SIZE': 2}
+        self.host = User.objects.create_user(
+            username='ReaperHost',
+            email='reaperhost@example.com',
+            password='ReaperPass@123'
+        )
+        self.now = timezone.now()
+
+    def make_room(self, title, idle_for, is_active=True):
+        room = Room.objects.create(host=self.host, title=title, is_active=is_active)
+        Room.objects.filter(pk=room.pk).update(last_activity_at=self.now - idle_for)
+        return room
+
+    def test_closes_idle_rooms_only(self):
+        """Rooms idle past IDLE_SECONDS are closed, in batches; busy ones stay open"""
+        idle = [self.make_room(f"Idle {i}", timedelta(minutes=5)) for i in range(3)]
+        busy = self.make_room("Busy", timedelta(seconds=10))
+        membership.join(idle[0].id, self.host)
+        Room.objects.filter(pk=idle[0].pk).update(last_activity_at=self.now - timedelta(minutes=5))
+
+        assert reaper.close_idle_rooms(now=self.now) == 3
+
+        assert not Room.objects.filter(pk__in=[room.pk for room in idle], is_active=True).exists()
+        assert Room.objects.get(pk=busy.pk).is_active
+        assert not RoomMembership.objects.active().filter(room=idle[0]).exists()
+        assert Room.objects.get(pk=idle[0].pk).participant_count == 0
+
+    def test_closed_rooms_leave_the_list(self):
+        """The room list no longer returns reaped rooms"""
+        idle = self.make_room("Idle", timedelta(minutes=5))
+        client = APIClient()
+        client.force_authenticate(user=self.host)
+
+        reaper.close_idle_rooms(now=self.now)
+
+        ids = [room['id'] for room in client.get(reverse('room-list')).data]
+        assert str(idle.id) not in ids
+
+    def test_touch_keeps_room_open(self):
+        """A heartbeat from a connected socket resets the idle clock"""
+        room = self.make_room("Watched", timedelta(minutes=5))
+        reaper.touch([room.pk])
+        assert reaper.close_idle_rooms(now=self.now + timedelta(seconds=1)) == 0
+
+    def test_archives_old_closed_rooms(self):
+        """Closed rooms past ARCHIVE_AFTER_SECONDS move to ArchivedRoom with their memberships"""
+        guest = User.objects.create_user(username='ReaperGuest', email='reaperguest@example.com', password='ReaperPass@123')
+        old = [self.make_room(f"Old {i}", timedelta(hours=2), is_active=False) for i in range(3)]
+        recent = self.make_room("Recently closed", timedelta(minutes=5), is_active=False)
+        RoomMembership.objects.create(room=old[0], user=guest, left_at=self.now - timedelta(hours=2))
+        chat.post(old[0].pk, 'socket-1', 'bye', username='Guest')
+
+        assert reaper.archive_closed_rooms(now=self.now) == 3
+
+        assert set(ArchivedRoom.objects.values_list('id', flat=True)) == {room.pk for room in old}
+        assert list(Room.objects.values_list('pk', flat=True)) == [recent.pk]
+        archived = ArchivedRoom.objects.get(pk=old[0].pk)
+        assert archived.title == "Old 0"
+        assert [entry[0] for entry in archived.data['memberships']] == [guest.pk]
+        assert [entry[:3] for entry in archived.data['chat']] == [[1, 'Guest', 'bye']]
+        assert not RoomMembership.objects.exists()
+
+    def test_command(self):
+        """reap_rooms runs both passes"""
+        self.make_room("Idle", timedelta(minutes=5))
+        self.make_room("Old", timedelta(hours=2), is_active=False)
+
+        call_command('reap_rooms')
+
+        assert ArchivedRoom.objects.count() == 1
+        assert not Room.objects.filter(is_active=True).exists()
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import User
+from rooms.models import Room
+from rooms import chat, membership, reaper, search
+
+
+def indexed_count():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {search.FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestChatSearch:
+
+    @pytest.fixture(autouse=True)
+    def setup_rooms(self, settings, monkeypatch):
+        settings.ROOM_CHAT_SEARCH = {'INDEX_BATCH': 3, 'INDEX_SECONDS': 3600}
+        monkeypatch.setattr(search, '_pending', search._Pending())
+        self.host = User.objects.create_user(
+            username='SearchHost',
+            email='searchhost@example.com',
+            password='SearchPass@123'
+        )
+        self.room = Room.objects.create(host=self.host, title="Search Room")
+        self.other = Room.objects.create(host=self.host, title="Other Room")
+
+    def post(self, room, text):
+        return chat.post(room.id, 'socket-a', text, username='Ann')[0]
+
+    def test_indexed_in_batches_from_write_path(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post(self.room, 'first')
+            self.post(self.room, 'second')
+        assert indexed_count() == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post(self.room, 'third')
+        assert indexed_count() == 3
+
+    def test_search_matches(self):
+        self.post(self.room, 'Meeting notes are in the café doc')
+        self.post(self.room, 'notes later')
+        self.post(self.room, 'unrelated')
+        self.post(self.other, 'meeting notes for another room')
+
+        def texts(query, **kwargs):
+            return [m.message for m in search.search(self.room.id, query, **kwargs)]
+
+        # Searching indexes whatever is pending first
+        assert texts('notes') == ['notes later', 'Meeting notes are in the café doc']
+        assert texts('meeting NOTES') == ['Meeting notes are in the café doc']
+        assert texts('cafe') == ['Meeting notes are in the café doc']
+        assert texts('unrel') == []  # whole words only
+        assert texts('"notes*" :(') == texts('notes')  # FTS syntax in the query is ignored
+        assert texts('notes', before=2) == ['Meeting notes are in the café doc']
+        assert texts('!!!') == []
+
+    def test_endpoint_pages(self):
+        for n in range(5):
+            self.post(self.room, f'standup {n}')
+
+        membership.join(self.room.id, self.host)
+        client = APIClient()
+        client.force_authenticate(user=self.host)
+        url = reverse('room-chat-search', kwargs={'room_id': self.room.id})
+
+        response = client.get(url, {'q': 'standup', 'limit': 3})
+        assert response.status_code == status.HTTP_200_OK
+        assert [m['seq'] for m in response.data['results']] == [5, 4, 3]
+        assert response.data['next_before'] == 3
+
+        response = client.get(url, {'q': 'standup', 'limit': 3, 'before': 3})
+        assert [m['seq'] for m in response.data['results']] == [2, 1]
+        assert response.data['next_before'] is None
+
+        assert client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get(url, {'q': 'x', 'limit': 'many'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_members_only(self):
+        self.post(self.room, 'private plans')
+        outsider = User.objects.create_user(username='Outsider', email='out@example.com', password='SearchPass@123')
+        client = APIClient()
+        client.force_authenticate(user=outsider)
+        url = reverse('room-chat-search', kwargs={'room_id': self.room.id})
+
+        response = client.get(url, {'q': 'plans'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response.data == {"error": "Not in room"}
+
+    def test_archived_rooms_leave_index(self):
+        self.post(self.room, 'goodbye')
+        self.post(self.other, 'still here')
+        call_command('index_chat', '--optimize')
+        assert indexed_count() == 2
+
+        Room.objects.filter(pk=self.room.pk).update(
+            is_active=False, last_activity_at=timezone.now() - timedelta(days=30)
+        )
+        assert reaper.archive_closed_rooms() == 1
+        assert indexed_count() == 1
+
+        # Indexing carries on past the removed rows
+        self.post(self.other, 'still talking')
+        assert [m.message for m in search.search(self.other.id, 'still')] == ['still talking', 'still here']
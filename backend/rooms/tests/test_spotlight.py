@@ -0,0 +1,159 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+from rooms import frames, spotlight, tickets
+
+
+class TestSpotlight:
+
+    @pytest.fixture(autouse=True)
+    def tuning(self, settings):
+        settings.ROOM_SPOTLIGHT = {'SIZE': 2, 'SMOOTHING': 1.0, 'MARGIN': 0.1, 'HOLD_SECONDS': 3.0}
+
+    def test_free_seats_then_loudest_with_hysteresis(self):
+        room = spotlight.Spotlight()
+        assert room.add('a', now=0) and room.add('b', now=0)
+        assert not room.add('c', now=0)
+        assert room.pair_allowed('a', 'c') and not room.pair_allowed('c', 'd')
+
+        room.report('a', 0.5, now=1)
+        room.report('b', 0.2, now=1)
+        # Louder than b, but b still holds its seat
+        assert not room.report('c', 0.9, now=2)
+        # Within the margin of b: no churn
+        room.report('a', 0.5, now=4)
+        room.report('b', 0.2, now=4)
+        assert not room.report('c', 0.25, now=4)
+        assert room.report('c', 0.9, now=4)
+        assert room.active == ['a', 'c']
+
+    def test_stale_levels_count_as_silent(self):
+        room = spotlight.Spotlight()
+        room.add('a', now=0)
+        room.add('b', now=0)
+        room.report('a', 1.0, now=0)
+        room.report('b', 0.5, now=9)
+        # a last spoke long ago, so c only has to beat silence
+        assert room.report('c', 0.2, now=10)
+        assert room.active == ['b', 'c']
+
+    def test_pins_hold_seats(self):
+        room = spotlight.Spotlight()
+        room.add('a', now=0)
+        room.add('b', now=0)
+        room.report('b', 0.8, now=0)
+        assert room.pin('c', True, now=1)
+        assert room.active == ['b', 'c']
+        # a can only take b's seat, never the pinned one
+        assert room.report('a', 1.0, now=10)
+        assert room.active == ['c', 'a']
+
+    def test_leaving_frees_seat_for_loudest(self):
+        room = spotlight.Spotlight()
+        room.add('a', now=0)
+        room.add('b', now=0)
+        room.report('c', 0.1, now=0)
+        room.report('d', 0.6, now=0)
+        assert room.remove('a', candidates=['b', 'c', 'd'], now=1)
+        assert room.active == ['b', 'd']
+        assert not room.remove('c', candidates=['b', 'd'], now=1)
+
+    def test_changes(self):
+        connect, disconnect = spotlight.changes('c', ['a', 'b', 'd'], ['a', 'b'], ['b', 'd'])
+        assert disconnect == ['a']
+        assert connect == ['d']
+        # The higher id of the new pair waits for the offer
+        assert spotlight.changes('d', ['a', 'b', 'c'], ['a', 'b'], ['b', 'd']) == ([], [])
+
+
+@pytest.mark.django_db
+class TestSpotlightConsumer:
+
+    @pytest.fixture(autouse=True)
+    def setup_room(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        settings.ROOM_SPOTLIGHT = {'SIZE': 2, 'SMOOTHING': 1.0, 'HOLD_SECONDS': 0}
+        self.host = User.objects.create_user(
+            username='SpotlightHost',
+            email='spotlighthost@example.com',
+            password='SpotlightPass@123'
+        )
+        self.room = Room.objects.create(host=self.host, title="Town Hall", topology='spotlight')
+
+    async def join(self, ticket=None):
+        path = f"/ws/room/{self.room.id}/" + (f"?ticket={ticket}" if ticket else "")
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+        connected, _ = await client.connect()
+        assert connected
+        established = await client.receive_json_from()
+        return client, established
+
+    async def pending(self, client):
+        messages = []
+        while not await client.receive_nothing(timeout=0.05):
+            messages.append(await client.receive_json_from())
+        return messages
+
+    def test_signaling_steered_to_active_set(self):
+        """Listeners only connect to speakers, and a new speaker renegotiates"""
+        async def scenario():
+            a, a_info = await self.join()
+            b, b_info = await self.join()
+            c, c_info = await self.join()
+            d, d_info = await self.join()
+            ids = {name: info['userId'] for name, info in zip('abcd', (a_info, b_info, c_info, d_info))}
+
+            assert d_info['topology'] == 'spotlight'
+            assert d_info['active'] == [ids['a'], ids['b']]
+            assert sorted(d_info['existing_users']) == sorted([ids['a'], ids['b']])
+            # c is not told about d: two listeners don't connect
+            joined = [m['userId'] for m in await self.pending(c) if m['type'] == 'user_joined']
+            assert joined == []
+            for client in (a, b):
+                await self.pending(client)
+            await self.pending(d)
+
+            await d.send_to(text_data=json.dumps({'type': 'offer', 'offer': {'type': 'offer', 'sdp': 'v=0'},
+                                                  'targetUserId': ids['c']}))
+            assert await d.receive_json_from() == {'type': 'error', 'code': frames.FORBIDDEN, 'field': 'targetUserId'}
+
+            # d speaks up and takes a's seat
+            await d.send_to(text_data=json.dumps({'type': 'audio_level', 'level': 0.9}))
+            updates = {name: (await client.receive_json_from()) for name, client in zip('abcd', (a, b, c, d))}
+            assert all(update['active'] == [ids['b'], ids['d']] for update in updates.values())
+            assert updates['a']['disconnect'] == [ids['c']]
+            assert updates['c']['disconnect'] == [ids['a']]
+            # Exactly one side of the new c-d pair makes the offer
+            offers = updates['c']['connect'] + updates['d']['connect']
+            assert offers in ([ids['d']], [ids['c']])
+
+            for client in (a, b, c, d):
+                await client.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_only_host_pins(self):
+        async def scenario():
+            guest, guest_info = await self.join()
+            host, _ = await self.join(ticket=tickets.issue(self.host.id))
+            await self.pending(guest)
+            await self.pending(host)
+
+            pin = {'type': 'pin', 'userId': guest_info['userId'], 'pinned': True}
+            await guest.send_to(text_data=json.dumps(pin))
+            assert await guest.receive_json_from() == {'type': 'error', 'code': frames.FORBIDDEN}
+
+            await host.send_to(text_data=json.dumps(pin))
+            assert await host.receive_nothing(timeout=0.1)  # already seated, nothing moves
+            assert spotlight.get(str(self.room.id)).pinned == [guest_info['userId']]
+
+            await guest.disconnect()
+            await host.disconnect()
+
+        async_to_sync(scenario)()
@@ -0,0 +1,93 @@
+import json
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from config import metrics
+from users.models import User
+from rooms.models import Room
+from rooms.routing import websocket_urlpatterns
+
+OFFER = {'type': 'offer', 'sdp': 'v=0'}
+ANSWER = {'type': 'answer', 'sdp': 'v=0'}
+
+
+@pytest.mark.django_db
+class TestSignalingTraces:
+
+    @pytest.fixture(autouse=True)
+    def setup_room(self, settings):
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        self.host = User.objects.create_user(
+            username='TraceHost',
+            email='tracehost@example.com',
+            password='TracePass@123',
+            is_staff=True
+        )
+        self.room = Room.objects.create(host=self.host, title="Trace Room")
+
+    async def join(self):
+        client = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/room/{self.room.id}/")
+        await client.connect()
+        established = await client.receive_json_from()
+        await client.receive_json_from()  # participant_update
+        return client, established['userId']
+
+    def test_negotiation_traced_end_to_end(self):
+        negotiations = metrics.histogram('signaling.negotiation_seconds').count
+        client_hops = metrics.histogram('signaling.client_seconds').count
+
+        async def scenario():
+            caller, caller_id = await self.join()
+            callee, callee_id = await self.join()
+            await caller.receive_json_from()  # participant_update
+            await caller.receive_json_from()  # user_joined
+
+            await caller.send_to(text_data=json.dumps({
+                'type': 'offer', 'targetUserId': callee_id, 'offer': OFFER,
+                'traceId': 'call-1', 'sentAt': time.time() * 1000,
+            }))
+            offer = await callee.receive_json_from()
+            assert offer['trace']['id'] == 'call-1'
+            assert offer['trace']['received'] <= offer['trace']['forwarded'] <= offer['trace']['delivering']
+
+            await callee.send_to(text_data=json.dumps({
+                'type': 'answer', 'targetUserId': caller_id, 'answer': ANSWER,
+            }))
+            answer = await caller.receive_json_from()
+            assert answer['type'] == 'answer' and answer['trace']['id'] != 'call-1'
+
+            await caller.disconnect()
+            await callee.disconnect()
+            return caller_id, callee_id
+
+        caller_id, callee_id = async_to_sync(scenario)()
+        assert metrics.histogram('signaling.negotiation_seconds').count == negotiations + 1
+        assert metrics.histogram('signaling.client_seconds').count == client_hops + 1
+
+        client = APIClient()
+        client.force_authenticate(user=self.host)
+        response = client.get(reverse('room-signaling-traces'), {'room': str(self.room.id)})
+        assert response.status_code == status.HTTP_200_OK
+        [record] = response.data['rooms'][str(self.room.id)]
+        assert (record['traceId'], record['offerer'], record['answerer']) == ('call-1', caller_id, callee_id)
+        assert record['total_ms'] >= record['hops_ms']['answerer']
+        assert response.data['histograms']['signaling.layer_seconds']['count'] >= 2
+
+    def test_admin_only(self):
+        guest = User.objects.create_user(username='TraceGuest', email='traceguest@example.com', password='TracePass@123')
+        client = APIClient()
+        client.force_authenticate(user=guest)
+        assert client.get(reverse('room-signaling-traces')).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_limit_must_be_positive(self):
+        client = APIClient()
+        client.force_authenticate(user=self.host)
+        for limit in ('0', '-5', 'many'):
+            response = client.get(reverse('room-signaling-traces'), {'limit': limit})
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,46 @@
+"""
+Single-use tickets that authenticate room WebSockets.
+
+Browsers can't set headers on a WebSocket handshake, so whatever identifies
+the user has to travel in the URL, where proxies and access logs may keep
+it. Sockets are therefore never given the access token: the client POSTs to
+rooms/ws-ticket/ (authenticated as usual) and connects with ?ticket=<ticket>,
+a random value that names the user for TTL_SECONDS and is spent by the
+first socket that presents it.
+
+Tickets live in the cache, which must be shared between the processes
+serving HTTP and WebSockets when they are not the same.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULTS = {
+    'TTL_SECONDS': 30,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_TICKETS', {}).get(name, DEFAULTS[name])
+
+
+def ticket_key(ticket):
+    return f'rooms:ws_ticket:{ticket}'
+
+
+def issue(user_id):
+    """A new ticket for user_id"""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(ticket_key(ticket), str(user_id), get_setting('TTL_SECONDS'))
+    return ticket
+
+
+def redeem(ticket):
+    """The user id a ticket names, or None; a ticket redeems once"""
+    user_id = cache.get(ticket_key(ticket))
+    # Of two sockets racing with one ticket, only the one whose delete
+    # removed the key gets the user
+    if user_id is None or not cache.delete(ticket_key(ticket)):
+        return None
+    return user_id
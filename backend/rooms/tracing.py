@@ -0,0 +1,144 @@
+"""
+Signaling latency tracing.
+
+Offer, answer and ICE frames get a trace as they pass through
+VideoRoomConsumer: an id (the client's traceId, or a new one) and server
+timestamps, carried in the group event to the target socket. Each hop goes
+into a config.metrics histogram, signaling.<hop>_seconds:
+
+client      client sentAt -> frame received (only if the client sends sentAt;
+            includes clock skew, so hops outside 0..MAX_CLIENT_SECONDS are dropped)
+receive     frame received -> group_send called (validation, checks)
+group_send  the group_send call itself (the channel layer, e.g. Redis)
+layer       group_send called -> target consumer handling the event
+send        the target consumer's send() of the frame
+negotiation offer received -> answer delivered back to the offerer
+
+The frame delivered to the target carries the trace id and the server
+timestamps (ms), so the client can add its side. An offer's trace is kept
+by the answering socket and travels back with its answer; when the answer
+is delivered, the whole negotiation is recorded for the room, and
+slowest() returns the slowest of the last RECENT per room.
+
+Timestamps are wall-clock, since the hops can cross processes. Records
+and histograms are per worker process: the debug view shows the
+negotiations whose answer was delivered by the worker that serves it.
+"""
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from config import metrics
+
+DEFAULTS = {
+    'ENABLED': True,
+    'RECENT': 50,  # negotiations kept per room
+    'ROOMS': 500,  # rooms kept, least recently traced dropped first
+    'MAX_CLIENT_SECONDS': 60,
+}
+
+_negotiations = OrderedDict()  # room_id -> deque of records
+
+
+def get_setting(name):
+    return getattr(settings, 'ROOM_TRACING', {}).get(name, DEFAULTS[name])
+
+
+def _observe(hop, seconds):
+    metrics.histogram(f'signaling.{hop}_seconds').observe(max(seconds, 0.0))
+
+
+def start(data):
+    """A trace for a client frame that just arrived, or None when tracing is off"""
+    if not get_setting('ENABLED'):
+        return None
+    received = time.time()
+    sent_at = data.get('sentAt')
+    if sent_at is not None:
+        hop = received - sent_at / 1000
+        if 0 <= hop <= get_setting('MAX_CLIENT_SECONDS'):
+            _observe('client', hop)
+    return {'id': data.get('traceId') or uuid.uuid4().hex, 'received': received}
+
+
+def forwarding(trace):
+    """Stamp a trace just before group_send"""
+    trace['forwarded'] = time.time()
+    _observe('receive', trace['forwarded'] - trace['received'])
+
+
+def forwarded(trace):
+    """group_send returned"""
+    _observe('group_send', time.time() - trace['forwarded'])
+
+
+def delivering(trace):
+    """The target consumer got the event; returns the trace with that stamped"""
+    trace = {**trace, 'delivering': time.time()}
+    _observe('layer', trace['delivering'] - trace['forwarded'])
+    return trace
+
+
+def delivered(trace):
+    """The target consumer sent the frame"""
+    trace['delivered'] = time.time()
+    _observe('send', trace['delivered'] - trace['delivering'])
+
+
+def for_client(trace):
+    """The trace as put in the frame to the target: id and server times in ms"""
+    return {
+        'id': trace['id'],
+        'received': round(trace['received'] * 1000),
+        'forwarded': round(trace['forwarded'] * 1000),
+        'delivering': round(trace['delivering'] * 1000),
+    }
+
+
+def negotiated(room_id, offerer, answerer, offer, answer):
+    """Record a completed offer/answer exchange, given both delivered traces"""
+    total = answer['delivered'] - offer['received']
+    _observe('negotiation', total)
+
+    def ms(start, end):
+        return round((end - start) * 1000, 1)
+
+    record = {
+        'traceId': offer['id'],
+        'answerTraceId': answer['id'],
+        'offerer': offerer,
+        'answerer': answerer,
+        'at': datetime.fromtimestamp(offer['received'], timezone.utc).isoformat(),
+        'total_ms': ms(offer['received'], answer['delivered']),
+        'hops_ms': {
+            'offer_receive': ms(offer['received'], offer['forwarded']),
+            'offer_layer': ms(offer['forwarded'], offer['delivering']),
+            'offer_send': ms(offer['delivering'], offer['delivered']),
+            'answerer': ms(offer['delivered'], answer['received']),  # the answering client and its network
+            'answer_receive': ms(answer['received'], answer['forwarded']),
+            'answer_layer': ms(answer['forwarded'], answer['delivering']),
+            'answer_send': ms(answer['delivering'], answer['delivered']),
+        },
+    }
+    room_id = str(room_id)
+    recent = _negotiations.pop(room_id, None) or deque(maxlen=get_setting('RECENT'))
+    recent.append(record)
+    _negotiations[room_id] = recent
+    while len(_negotiations) > get_setting('ROOMS'):
+        _negotiations.popitem(last=False)
+    return record
+
+
+def slowest(room_id=None, limit=10):
+    """{room_id: slowest recent negotiations, slowest first}, for one room or all"""
+    if room_id is not None:
+        rooms = {str(room_id): _negotiations.get(str(room_id), ())}
+    else:
+        rooms = dict(_negotiations)
+    return {
+        room: sorted(records, key=lambda record: record['total_ms'], reverse=True)[:limit]
+        for room, records in rooms.items()
+    }
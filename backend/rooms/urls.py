@@ -1,9 +1,27 @@
 from django.urls import path
-from .views import RoomCreateView, RoomListView, RoomDetailView, RoomJoinView
+from .views import (
+    RoomCreateView, RoomListView, RoomDetailView, RoomJoinView, RoomLeaveView, MyRoomsView, ChatSearchView,
+    RoomFilesView, RoomFileUploadView, RoomFileDownloadView, SignalingTraceView, WebSocketTicketView,
+)
+from .async_views import AsyncRoomCreateView, AsyncRoomListView, AsyncRoomDetailView, AsyncRoomJoinView
 
 urlpatterns = [
     path('create/', RoomCreateView.as_view(), name='room-create'),
     path('list/', RoomListView.as_view(), name='room-list'),
     path('<uuid:id>/', RoomDetailView.as_view(), name='room-detail'),
     path('<uuid:room_id>/join/', RoomJoinView.as_view(), name='room-join'),
+    path('<uuid:room_id>/leave/', RoomLeaveView.as_view(), name='room-leave'),
+    path('mine/', MyRoomsView.as_view(), name='room-mine'),
+    path('ws-ticket/', WebSocketTicketView.as_view(), name='room-ws-ticket'),
+    path('<uuid:room_id>/chat/search/', ChatSearchView.as_view(), name='room-chat-search'),
+    path('<uuid:room_id>/files/', RoomFilesView.as_view(), name='room-files'),
+    path('<uuid:room_id>/files/<uuid:file_id>/', RoomFileUploadView.as_view(), name='room-file-upload'),
+    path('<uuid:room_id>/files/<uuid:file_id>/download/', RoomFileDownloadView.as_view(), name='room-file-download'),
+    path('debug/signaling/', SignalingTraceView.as_view(), name='room-signaling-traces'),
+
+    # Async-native variants (no sync thread hop under ASGI)
+    path('async/create/', AsyncRoomCreateView.as_view(), name='room-create-async'),
+    path('async/list/', AsyncRoomListView.as_view(), name='room-list-async'),
+    path('async/<uuid:id>/', AsyncRoomDetailView.as_view(), name='room-detail-async'),
+    path('async/<uuid:room_id>/join/', AsyncRoomJoinView.as_view(), name='room-join-async'),
 ]
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Version counters for conditional GETs on the room endpoints.
+
+Every room has a counter that is bumped whenever the row or its participants
+change, and the room list has one counter bumped on any of those changes.
+The counters live in the cache so a conditional request can be answered
+with a 304 without touching the database or the serializer.
+
+The counters are bumped on writes to the primary, so they only describe
+what the primary holds. A body read from a replica that is behind could be
+older than the counter; those bodies are tagged by their content instead
+(content_etag()), which costs the query but never pairs a new tag with
+old data.
+"""
+import hashlib
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+LIST_KEY = 'rooms:version:list'
+
+
+def room_key(room_id):
+    return f'rooms:version:{room_id}'
+
+
+def _initial_version():
+    # Seeded from the clock so a counter lost to eviction never reissues
+    # a version a client may still hold
+    return time.time_ns()
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_room(room_id):
+    """Invalidate the ETags of one room and of the room list"""
+    bump(room_key(room_id))
+    bump(LIST_KEY)
+
+
+def room_etag(room_id):
+    return f'"room-{room_id}-{get_version(room_key(room_id))}"'
+
+
+def list_etag():
+    return f'"rooms-{get_version(LIST_KEY)}"'
+
+
+def content_etag(data):
+    """A tag for a response body, derived from the data itself"""
+    body = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return f'"body-{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(request, etag, exists=False):
+    """
+    Whether If-None-Match names etag. "*" matches any current version, so
+    it only counts once the resource is known to exist (exists=True).
+    """
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return etag in etags or (exists and '*' in etags)
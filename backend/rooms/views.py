@@ -1,10 +1,43 @@
 from rest_framework import generics, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from .models import Room
+from config import metrics, replicas
+from config.replicas import ReplicaPinMixin
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import content_disposition_header
+from . import chat, fastpath, files, lobby, membership, search, tickets, tracing, versioning
+from .models import Room, RoomFile
 from .serializers import RoomSerializer, RoomCreateSerializer
 
-class RoomCreateView(generics.CreateAPIView):
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match with 304 before any query or serialization runs,
+    when the body would be read from the primary. Replica reads may lag the
+    cached version, so their body is built and tagged by its content.
+    Views define get_etag() returning the cached version's tag.
+    """
+
+    def get(self, request, *args, **kwargs):
+        from_replica = replicas.reads_from_replica(self.get_queryset().model)
+        if not from_replica:
+            # Read the version before building the body: a concurrent change
+            # then yields a newer body under an older tag, never the reverse
+            etag = self.get_etag()
+            if versioning.etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = super().get(request, *args, **kwargs)
+        if from_replica:
+            etag = versioning.content_etag(response.data)
+        # The body was found, so "*" can match now
+        if versioning.etag_matches(request, etag, exists=True):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response['ETag'] = etag
+        return response
+
+class RoomCreateView(ReplicaPinMixin, generics.CreateAPIView):
     queryset = Room.objects.all()
     serializer_class = RoomCreateSerializer
     permission_classes = [IsAuthenticated]
@@ -19,61 +52,300 @@ class RoomCreateView(generics.CreateAPIView):
         
         # Return the full room data including ID
         response_serializer = RoomSerializer(room)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        data = response_serializer.data
+        transaction.on_commit(lambda: lobby.publish([lobby.created_delta(data)]))
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
         return serializer.save(host=self.request.user)
 
-class RoomListView(generics.ListAPIView):
+class RoomListView(ReplicaPinMixin, ConditionalGetMixin, generics.ListAPIView):
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_etag(self):
+        return versioning.list_etag()
+
     def get_queryset(self):
         return Room.objects.filter(is_active=True)
 
-class RoomDetailView(generics.RetrieveAPIView):
+    def list(self, request, *args, **kwargs):
+        # Same payload as RoomSerializer(many=True), in one query
+        return Response(fastpath.encode_rooms(self.get_queryset()))
+
+class RoomDetailView(ReplicaPinMixin, ConditionalGetMixin, generics.RetrieveAPIView):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'
 
-class RoomJoinView(generics.GenericAPIView):
+    def get_etag(self):
+        return versioning.room_etag(self.kwargs[self.lookup_field])
+
+    def retrieve(self, request, *args, **kwargs):
+        data = fastpath.encode_room(self.get_queryset().filter(id=self.kwargs[self.lookup_field]))
+        if data is None:
+            raise NotFound()
+        return Response(data)
+
+class RoomJoinView(ReplicaPinMixin, generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, room_id):
-        try:
-            room = Room.objects.get(id=room_id, is_active=True)
-            
-            # Check if room is full using the participant_count field
-            if room.participant_count >= room.max_participants:
-                return Response(
-                    {"error": "Room is full"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Check if user is already in the room
-            if room.participants.filter(id=request.user.id).exists():
-                return Response(
-                    {"message": "Already in room", "room_id": str(room.id)},
-                    status=status.HTTP_200_OK
-                )
-            
-            # Add user to participants and update count
-            room.participants.add(request.user)
-            room.participant_count = room.participants.count()  # Update the count
-            room.save()
-            
-            return Response({
-                "message": "Joined room successfully", 
-                "room_id": str(room.id),
-                "room_title": room.title,
-                "host_name": room.host.username,
-                "participant_count": room.participant_count,
-                "max_participants": room.max_participants
-            })
-            
-        except Room.DoesNotExist:
+        # Capacity, membership and the increment are one conditional UPDATE
+        outcome, room = membership.join(room_id, request.user)
+
+        if outcome == membership.NOT_FOUND:
             return Response(
                 {"error": "Room not found or inactive"}, 
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+        if outcome == membership.ALREADY_JOINED:
+            return Response(
+                {"message": "Already in room", "room_id": str(room_id)},
+                status=status.HTTP_200_OK
+            )
+        if outcome == membership.ROOM_FULL:
+            return Response(
+                {"error": "Room is full"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            "message": "Joined room successfully", 
+            "room_id": str(room.id),
+            "room_title": room.title,
+            "host_name": room.host_name,
+            "participant_count": room.participant_count,
+            "max_participants": room.max_participants
+        })
+
+
+class RoomLeaveView(ReplicaPinMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, room_id):
+        if not membership.leave(room_id, request.user):
+            return Response(
+                {"error": "Not in room"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"message": "Left room successfully", "room_id": str(room_id)})
+
+
+class MyRoomsView(ReplicaPinMixin, generics.GenericAPIView):
+    """Rooms the current user is in right now"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(fastpath.encode_rooms(membership.rooms_for_user(request.user)))
+
+
+class WebSocketTicketView(generics.GenericAPIView):
+    """A single-use ticket to authenticate a room WebSocket with (?ticket=)"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response(
+            {"ticket": tickets.issue(request.user.id), "expires_in": tickets.get_setting('TTL_SECONDS')},
+            headers={'Cache-Control': 'no-store'},
+        )
+
+
+class ChatSearchView(ReplicaPinMixin, generics.GenericAPIView):
+    """Full-text search of a room's chat, newest first; page with ?before=<seq>"""
+    permission_classes = [IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request, room_id):
+        if not membership.is_member(room_id, request.user):
+            return Response({"error": "Not in room"}, status=status.HTTP_403_FORBIDDEN)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            before = request.query_params.get('before')
+            before = int(before) if before is not None else None
+            limit = min(int(request.query_params.get('limit', 50)), self.max_limit)
+        except ValueError:
+            return Response({"error": "before and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+
+        messages = search.search(room_id, query, before=before, limit=limit)
+        return Response({
+            "results": [chat.encode(message) for message in messages],
+            "next_before": messages[-1].seq if len(messages) == limit else None
+        })
+
+
+class RoomFilesView(ReplicaPinMixin, generics.GenericAPIView):
+    """
+    GET: files shared in the room, newest first. POST: start an upload;
+    answers with the offset to send from. Files are for the room's current
+    members only, here and for download.
+    """
+    permission_classes = [IsAuthenticated]
+    max_files = 100
+
+    def get(self, request, room_id):
+        if not membership.is_member(room_id, request.user):
+            return Response({"error": "Not in room"}, status=status.HTTP_403_FORBIDDEN)
+        shared = (
+            RoomFile.objects.filter(room_id=room_id, completed_at__isnull=False)
+            .order_by('-completed_at')[:self.max_files]
+        )
+        return Response([files.encode(file) for file in shared])
+
+    def post(self, request, room_id):
+        if not membership.is_member(room_id, request.user):
+            return Response({"error": "Not in room"}, status=status.HTTP_403_FORBIDDEN)
+
+        name = str(request.data.get('name', '')).strip()[:255]
+        sha256 = str(request.data.get('sha256', '')).lower()
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = -1
+        if not name or size < 0:
+            return Response({"error": "name and size are required"}, status=status.HTTP_400_BAD_REQUEST)
+        if sha256 and not files.valid_sha256(sha256):
+            return Response({"error": "sha256 must be 64 hex digits"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                file = files.start(
+                    room_id, request.user, name, size, sha256=sha256,
+                    content_type=str(request.data.get('content_type', ''))[:255],
+                )
+        except files.UploadError as e:
+            return Response({"error": str(e)}, status=e.code)
+        return Response(
+            {"id": str(file.pk), "offset": file.received, "complete": file.completed_at is not None,
+             "chunk_bytes": files.get_setting('MAX_CHUNK_BYTES')},
+            status=status.HTTP_201_CREATED,
+            headers={'Upload-Offset': str(file.received)},
+        )
+
+
+class RoomFileUploadView(ReplicaPinMixin, generics.GenericAPIView):
+    """
+    The uploader's view of an upload. HEAD/GET report the offset to resume
+    from; PATCH appends the request body (Upload-Offset header) at it.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, room_id, file_id):
+        try:
+            return RoomFile.objects.get(pk=file_id, room_id=room_id, uploaded_by=request.user)
+        except RoomFile.DoesNotExist:
+            raise NotFound("Upload not found")
+
+    def get(self, request, room_id, file_id):
+        file = self.get_upload(request, room_id, file_id)
+        return Response(
+            {"id": str(file.pk), "offset": file.received, "size": file.size,
+             "complete": file.completed_at is not None},
+            headers={'Upload-Offset': str(file.received), 'Cache-Control': 'no-store'},
+        )
+
+    def patch(self, request, room_id, file_id):
+        file = self.get_upload(request, room_id, file_id)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "Upload-Offset and Content-Length headers are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            # Read the raw stream; request.data would parse the whole body into memory
+            offset = files.append(file, offset, request.stream, length)
+        except files.UploadError as e:
+            headers = {'Upload-Offset': str(e.offset)} if e.offset is not None else {}
+            return Response({"error": str(e), "offset": e.offset}, status=e.code, headers=headers)
+        return Response(
+            {"offset": offset, "complete": file.completed_at is not None},
+            headers={'Upload-Offset': str(offset)},
+        )
+
+
+class RoomFileDownloadView(ReplicaPinMixin, generics.GenericAPIView):
+    """A shared file's content, with Range requests; the ETag is the SHA-256"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, room_id, file_id):
+        if not membership.is_member(room_id, request.user):
+            return Response({"error": "Not in room"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            file = RoomFile.objects.get(pk=file_id, room_id=room_id, completed_at__isnull=False)
+        except RoomFile.DoesNotExist:
+            raise NotFound("File not found")
+        path = files.blob_path(file.sha256)
+        if not path.exists():
+            raise NotFound("File not found")
+
+        etag = f'"{file.sha256}"'
+        headers = {'ETag': etag, 'Accept-Ranges': 'bytes', 'Cache-Control': 'private, max-age=31536000, immutable'}
+        if versioning.etag_matches(request, etag, exists=True):
+            return HttpResponseNotModified(headers=headers)
+
+        if files.get_setting('SENDFILE'):
+            # The web server sends the bytes, ranges included
+            response = HttpResponse(content_type=file.content_type or 'application/octet-stream', headers=headers)
+            response['Content-Disposition'] = content_disposition_header(True, file.name)
+            if files.get_setting('SENDFILE') == 'X-Accel-Redirect':
+                response['X-Accel-Redirect'] = files.get_setting('SENDFILE_URL') + str(path.relative_to(files.root()))
+            else:
+                response[files.get_setting('SENDFILE')] = str(path)
+            return response
+
+        if_range = request.headers.get('If-Range')
+        try:
+            byte_range = files.parse_range(request.headers.get('Range'), file.size) if if_range in (None, etag) else None
+        except files.UploadError:
+            return HttpResponse(
+                status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, 'Content-Range': f'bytes */{file.size}'},
+            )
+
+        if byte_range is None:
+            # Whole file: a real file object, so the server can use sendfile()
+            response = FileResponse(
+                open(path, 'rb'), as_attachment=True, filename=file.name,
+                content_type=file.content_type or 'application/octet-stream',
+            )
+        else:
+            start, end = byte_range
+            response = FileResponse(
+                files.FileSlice(path, start, end), as_attachment=True, filename=file.name,
+                content_type=file.content_type or 'application/octet-stream',
+                status=status.HTTP_206_PARTIAL_CONTENT,
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{file.size}'
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
+class SignalingTraceView(generics.GenericAPIView):
+    """
+    Admin debug view: signaling hop histograms and the slowest recent
+    negotiations per room (?room=<id> for one), as seen by this worker
+    """
+    permission_classes = [IsAdminUser]
+    max_limit = 100
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), self.max_limit)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "histograms": metrics.snapshot('signaling.'),
+            "rooms": tracing.slowest(request.query_params.get('room'), limit=limit)
+        })
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+from .hashing import hash_executor
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend that verifies passwords on the bounded hashing pool"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown accounts take as long as known ones
+            hash_executor.run(make_password, password)
+            return None
+
+        needs_upgrade = []
+        # The setter only records the upgrade; saving happens on this thread
+        if not hash_executor.run(check_password, password, user.password, needs_upgrade.append):
+            return None
+
+        if needs_upgrade:
+            user.password = hash_executor.run(make_password, password)
+            user.save(update_fields=['password'])
+
+        return user if self.user_can_authenticate(user) else None
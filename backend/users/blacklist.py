@@ -0,0 +1,144 @@
+"""
+Bloom filter front for refresh-token blacklist checks.
+
+simplejwt checks every refresh token against BlacklistedToken with a join on
+OutstandingToken. Almost every token presented is *not* blacklisted, so a
+per-process Bloom filter of blacklisted jtis answers those without touching
+the database; only possible hits fall through to the real query.
+
+The filter is loaded incrementally (rows with an id above the last one seen)
+whenever the generation counter in the cache moves, and at least every
+SYNC_INTERVAL seconds. Other processes learn of a blacklisted token only
+through that counter, so the filter is used only when the cache is shared
+between processes (SHARED_CACHE, by default any backend but LocMem and
+Dummy) and the counter is there; otherwise every check goes to the
+database, as simplejwt's own does.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+GENERATION_KEY = 'token_blacklist:generation'
+
+DEFAULTS = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.01,
+    'SYNC_INTERVAL': 5,
+    'SHARED_CACHE': None,  # None: decide from the default cache backend
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'TOKEN_BLACKLIST_FILTER', {}).get(name, DEFAULTS[name])
+
+
+def shared_cache():
+    """Whether the generation counter is seen by every process"""
+    shared = get_setting('SHARED_CACHE')
+    if shared is None:
+        shared = not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+    return shared
+
+
+def _initial_generation():
+    # Seeded from the clock so a counter lost to eviction never comes back
+    # with a value a process has already synced to
+    return time.time_ns()
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    """Keeps a BloomFilter in step with the BlacklistedToken table"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._bloom = None
+        self._last_id = 0
+        self._generation = None
+        self._synced_at = 0.0
+
+    def _new_bloom(self):
+        return BloomFilter(get_setting('CAPACITY'), get_setting('ERROR_RATE'))
+
+    def sync(self, force=False):
+        """Catch up with the table; returns the generation synced to (None if unknown)"""
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, _initial_generation(), None)
+            generation = cache.get(GENERATION_KEY)
+        now = time.monotonic()
+        if (not force and self._bloom is not None and generation == self._generation
+                and now - self._synced_at < get_setting('SYNC_INTERVAL')):
+            return generation
+
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                # First load, or the filter is saturated: rebuild from scratch
+                self._bloom = self._new_bloom()
+                self._last_id = 0
+
+            rows = (
+                BlacklistedToken.objects
+                .filter(id__gt=self._last_id)
+                .order_by('id')
+                .values_list('id', 'token__jti')
+            )
+            for row_id, jti in rows.iterator(chunk_size=2000):
+                self._bloom.add(jti)
+                self._last_id = row_id
+
+            self._generation = generation
+            self._synced_at = now
+        return generation
+
+    def is_blacklisted(self, jti):
+        # A miss in the filter is only trusted when it is known to be current
+        if shared_cache() and self.sync() is not None and jti not in self._bloom:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def note_blacklisted(self, jti):
+        """Record a jti blacklisted by this process and tell the others"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, _initial_generation(), None)
+
+
+blacklist_filter = BlacklistFilter()
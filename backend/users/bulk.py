@@ -0,0 +1,177 @@
+"""
+Bulk user provisioning.
+
+Rows are read lazily from a CSV or JSONL stream and handled in chunks: each
+row is validated like RegisterSerializer (uniqueness is checked once per
+chunk instead of once per row), passwords are hashed on a process pool and
+the chunk is inserted with bulk_create. Bad rows are reported with their row
+number and never abort the rest of the import.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.settings import api_settings
+
+from .hashing import get_process_pool
+from .models import User
+from .serializers import RegisterSerializer
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 500
+
+
+class BulkRowSerializer(RegisterSerializer):
+    """RegisterSerializer rules for one import row; uniqueness is checked per chunk"""
+
+    def check_unique(self, username, email):
+        pass
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (row number, dict or None, parse error) from a text stream. Text
+    that doesn't decode ends the file: the rows decoded before it are still
+    imported, and the first row not read is reported as an error.
+    """
+    number = 0
+    try:
+        for number, row, error in _parse_rows(stream, fmt):
+            yield number, row, error
+    except UnicodeDecodeError:
+        yield number + 1, None, "Not UTF-8 text; the rest of the file was not read"
+
+
+def _parse_rows(stream, fmt):
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row, None
+    elif fmt == 'jsonl':
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, None, "Invalid JSON"
+                continue
+            if not isinstance(row, dict):
+                yield number, None, "Expected a JSON object"
+                continue
+            yield number, row, None
+    else:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+
+
+def text_stream(binary):
+    """Wrap an uploaded or opened binary file for read_rows without loading it"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        if not isinstance(errors, dict):
+            errors = {api_settings.NON_FIELD_ERRORS_KEY: errors if isinstance(errors, list) else [errors]}
+        self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+
+def import_users(rows, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Create users from read_rows() output; returns an ImportResult"""
+    result = ImportResult()
+    seen_usernames = set()
+    seen_emails = set()
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for number, row, error in chunk:
+            if error:
+                result.add_error(number, error)
+                continue
+            row = {key: value for key, value in row.items() if key is not None}
+            row.setdefault('confirm_password', row.get('password'))
+            serializer = BulkRowSerializer(data=row)
+            if not serializer.is_valid():
+                result.add_error(number, serializer.errors)
+                continue
+            data = serializer.validated_data
+            username = User.normalize_username(data['username'])
+            if username in seen_usernames or data['email'] in seen_emails:
+                result.add_error(number, RegisterSerializer.DUPLICATE_MESSAGE)
+                continue
+            seen_usernames.add(username)
+            seen_emails.add(data['email'])
+            valid.append((number, username, data['email'], data['password']))
+
+        valid = _drop_existing(valid, result)
+        if valid:
+            _insert_chunk(valid, result, workers)
+
+    return result
+
+
+def _drop_existing(valid, result):
+    """One query per chunk for rows clashing with existing users"""
+    if not valid:
+        return valid
+    usernames = [username for _, username, _, _ in valid]
+    emails = [email for _, _, email, _ in valid]
+    taken_usernames = set()
+    taken_emails = set()
+    for username, email in User.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list('username', 'email'):
+        taken_usernames.add(username)
+        taken_emails.add(email)
+
+    kept = []
+    for entry in valid:
+        number, username, email, _ = entry
+        if username in taken_usernames or email in taken_emails:
+            result.add_error(number, RegisterSerializer.DUPLICATE_MESSAGE)
+        else:
+            kept.append(entry)
+    return kept
+
+
+def _insert_chunk(valid, result, workers):
+    passwords = [password for _, _, _, password in valid]
+    hashes = list(get_process_pool(workers).map(make_password, passwords, chunksize=16))
+    users = [
+        User(username=username, email=email, password=hashed)
+        for (_, username, email, _), hashed in zip(valid, hashes)
+    ]
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        result.created += len(users)
+        return
+    except IntegrityError:
+        pass
+
+    # Someone registered one of these names meanwhile: insert one by one so
+    # only the clashing rows fail
+    for (number, _, _, _), user in zip(valid, users):
+        try:
+            with transaction.atomic():
+                user.save()
+            result.created += 1
+        except IntegrityError:
+            result.add_error(number, RegisterSerializer.DUPLICATE_MESSAGE)
@@ -0,0 +1,119 @@
+"""
+Bounded executor for password hashing.
+
+PBKDF2 runs for hundreds of milliseconds per call. Running it inline lets a
+login burst occupy every request thread, so hashing goes through a small
+dedicated thread pool instead (hashlib.pbkdf2_hmac releases the GIL, so the
+pool hashes in parallel). At most WORKERS + QUEUE_DEPTH hashes may be in
+flight; past that, callers get a 503 with Retry-After rather than queueing.
+
+Bulk work (users/bulk.py) hashes on a separate process pool instead, so a
+large import can use every core without touching the request-path pool.
+This module must stay importable before django.setup(): spawned pool
+workers unpickle _init_worker from here.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from config import metrics
+
+DEFAULTS = {
+    'WORKERS': 4,
+    'QUEUE_DEPTH': 16,
+    'RETRY_AFTER': 2,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many sign-in attempts right now, please retry shortly."
+    default_code = 'hashing_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = wait
+
+
+class HashExecutor:
+
+    def __init__(self):
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    workers = get_setting('WORKERS')
+                    self._slots = threading.BoundedSemaphore(workers + get_setting('QUEUE_DEPTH'))
+                    self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def run(self, func, *args):
+        """Run func(*args) on the pool and wait for it, or raise HashingBusy"""
+        self._ensure_pool()
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(wait=get_setting('RETRY_AFTER'))
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            metrics.histogram('auth.hash_wait_seconds').observe(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                metrics.histogram('auth.hash_seconds').observe(time.perf_counter() - started)
+
+        try:
+            future = self._pool.submit(timed)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+hash_executor = HashExecutor()
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+_process_pool = None
+
+
+def get_process_pool(workers=None):
+    """Process pool for bulk hashing, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        # spawn rather than fork: callers may be multi-threaded servers
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),),
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk import DEFAULT_CHUNK_SIZE, FORMATS, import_users, read_rows, text_stream
+from users.hashing import shutdown_process_pool
+
+
+class Command(BaseCommand):
+    help = "Create users in bulk from a CSV or JSONL file with username, email and password columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help="Hashing processes (default: CPU count)")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Can't tell the format of {path}; pass --format")
+
+        try:
+            with open(path, 'rb') as binary:
+                result = import_users(
+                    read_rows(text_stream(binary), fmt),
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                )
+        finally:
+            shutdown_process_pool()
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"Created {result.created} users, {len(result.errors)} rows failed"))
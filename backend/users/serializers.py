@@ -1,8 +1,15 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from .models import User
 from django.core.validators import RegexValidator
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .tokens import UserRefreshToken
+from .hashing import hash_executor
 
 class RegisterSerializer(serializers.ModelSerializer):
     username = serializers.CharField(max_length=150, validators = [RegexValidator(regex=r'^(?=.*[A-Za-z])[A-Za-z0-9_]+$', message='Username is not valid', code='invalid_username')])
@@ -10,27 +17,47 @@ class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password,RegexValidator(regex=r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]{8,}$',message='Password must be at least 8 characters long and contain one uppercase, one lowercase, one number, and one special character.')])
     confirm_password = serializers.CharField(write_only = True)
 
+    DUPLICATE_MESSAGE = "Email or username already taken."
+
     class Meta:
         model = User
         fields = ['username', 'email', 'password', 'confirm_password']
 
     def validate(self, attrs):
         username = attrs.get('username')
-        email = attrs.get('email')
+        email = attrs['email'] = User.objects.normalize_email(attrs.get('email'))
         password = attrs.get('password')
         confirm_password = attrs.get('confirm_password')
 
-        if User.objects.filter(username=username).exists() or User.objects.filter(email=email).exists():
-            raise serializers.ValidationError("Email or username already taken.")
+        self.check_unique(username, email)
         
         if password != confirm_password:
             raise serializers.ValidationError({"password": "Passwords do not match."})
 
         return attrs
 
+    def check_unique(self, username, email):
+        # One indexed lookup (username and email are both unique); the
+        # constraints stay authoritative, see create()
+        if User.objects.filter(Q(username=username) | Q(email=email)).exists():
+            raise serializers.ValidationError(self.DUPLICATE_MESSAGE)
+
     def create(self, validated_data):
         validated_data.pop('confirm_password')  
-        return User.objects.create_user(**validated_data)
+        # Hash on the bounded pool, then insert the row with the hash in place
+        password = hash_executor.run(make_password, validated_data.pop('password'))
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=validated_data['email'],
+            password=password,
+        )
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:
+            # Lost a race with a concurrent signup for the same name or email
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [self.DUPLICATE_MESSAGE]})
+        return user
 
 
 class LoginSerializer(serializers.Serializer):
@@ -49,4 +76,8 @@ class LoginSerializer(serializers.Serializer):
                 raise serializers.ValidationError("Invalid email or password")
         else:
             raise serializers.ValidationError("Both email and password are required")
-        return data
\ No newline at end of file
+        return data
+
+
+class RefreshSerializer(TokenRefreshSerializer):
+    token_class = UserRefreshToken
@@ -0,0 +1,74 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.models import User
+from users.tokens import UserRefreshToken
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    def setup_method(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username='CachedUser',
+            email='cached@example.com',
+            password='CachedPass@123'
+        )
+        self.token = str(UserRefreshToken.for_user(self.user).access_token)
+        self.factory = APIRequestFactory()
+
+    def authenticate(self):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_loaded_once(self, django_assert_num_queries):
+        """Repeated requests resolve the user from the cache"""
+        with django_assert_num_queries(1):
+            self.authenticate()
+        with django_assert_num_queries(0):
+            user = self.authenticate()
+        assert user.pk == self.user.pk
+
+    def test_save_invalidates_cache(self):
+        """Changes to the user are visible on the next request"""
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with pytest.raises(Exception):
+            self.authenticate()
+
+    def test_password_change_invalidates_cache(self):
+        """A password change drops the cached row"""
+        self.authenticate()
+        self.user.set_password('OtherPass@123')
+        self.user.save()
+        assert user_cache.get(self.user.pk) is None
+
+    def test_cache_is_bounded(self, settings):
+        """The least recently used entries are evicted past MAX_SIZE"""
+        settings.USER_CACHE = {'MAX_SIZE': 1}
+        other = User.objects.create_user(
+            username='OtherUser',
+            email='other@example.com',
+            password='OtherPass@123'
+        )
+        user_cache.set(self.user)
+        user_cache.set(other)
+        assert len(user_cache) == 1
+        assert user_cache.get(self.user.pk) is None
+
+    def test_room_list_with_login_token(self):
+        """Room reads accept login tokens and stop once the user is deactivated"""
+        client = APIClient()
+        login = client.post(reverse('login'), {
+            "email": "cached@example.com",
+            "password": "CachedPass@123"
+        })
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {login.data["access"]}')
+        assert client.get(reverse('room-list')).status_code == 200
+
+        self.user.is_active = False
+        self.user.save()
+        assert client.get(reverse('room-list')).status_code == 401
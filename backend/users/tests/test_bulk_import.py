@@ -0,0 +1,97 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import User
+
+
+@pytest.fixture(autouse=True)
+def existing_user(db):
+    return User.objects.create_user(
+        username='Existing',
+        email='existing@example.com',
+        password='Existing@123'
+    )
+
+
+@pytest.mark.django_db
+def test_import_command_reports_bad_rows(tmp_path, capsys):
+    """Valid rows are created, bad ones reported without aborting the batch"""
+    path = tmp_path / 'users.csv'
+    path.write_text(
+        "username,email,password\n"
+        "Alice,alice@example.com,AlicePass@123\n"
+        "Bob,not-an-email,BobPass@123\n"
+        "Existing,taken@example.com,Taken@1234\n"
+        "Carol,carol@example.com,CarolPass@123\n"
+        "Alice,alice2@example.com,AlicePass@123\n"
+    )
+
+    call_command('import_users', str(path), chunk_size=2, workers=1)
+
+    assert set(User.objects.values_list('username', flat=True)) == {'Existing', 'Alice', 'Carol'}
+    assert User.objects.get(username='Carol').check_password('CarolPass@123')
+    err = capsys.readouterr().err
+    assert "row 2:" in err and "row 3:" in err and "row 5:" in err
+
+
+@pytest.mark.django_db
+def test_admin_api_import_jsonl(existing_user):
+    """Admins can upload JSONL and get per-row results back"""
+    existing_user.is_staff = True
+    existing_user.save()
+    client = APIClient()
+    client.force_authenticate(user=existing_user)
+
+    lines = [
+        json.dumps({"username": "Dave", "email": "dave@example.com", "password": "DavePass@123"}),
+        "{broken",
+        json.dumps({"username": "Erin", "email": "erin@example.com", "password": "short"}),
+    ]
+    upload = SimpleUploadedFile('users.jsonl', "\n".join(lines).encode())
+    response = client.post(reverse('bulk-user-import'), {'file': upload}, format='multipart')
+
+    assert response.status_code == 200
+    assert response.data['created'] == 1
+    assert [error['row'] for error in response.data['errors']] == [2, 3]
+    assert "password" in response.data['errors'][1]['errors']
+    assert User.objects.filter(username='Dave').exists()
+
+
+@pytest.mark.django_db
+def test_bulk_import_requires_admin(existing_user):
+    client = APIClient()
+    client.force_authenticate(user=existing_user)
+    response = client.post(reverse('bulk-user-import'), {}, format='multipart')
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_admin_api_import_not_utf8(existing_user):
+    """Text that isn't UTF-8 is a row error, also when it comes past the first read"""
+    existing_user.is_staff = True
+    existing_user.save()
+    client = APIClient()
+    client.force_authenticate(user=existing_user)
+
+    padding = "".join(f"pad{n},not-an-email,PadPass@123\n" for n in range(400))
+    content = (
+        "username,email,password\n"
+        "Frank,frank@example.com,FrankPass@123\n"
+        + padding
+        + "Zoé,zoe@example.com,ZoePass@123\n"
+    ).encode('latin-1')
+    assert content.index('é'.encode('latin-1')) > 8192  # decoded after rows were already read
+    upload = SimpleUploadedFile('users.csv', content)
+    response = client.post(reverse('bulk-user-import'), {'file': upload}, format='multipart')
+
+    assert response.status_code == 200
+    assert response.data['created'] == 1
+    last = response.data['errors'][-1]
+    assert last['errors'] == {'non_field_errors': ["Not UTF-8 text; the rest of the file was not read"]}
+    # Rows decoded before the bad read were each handled
+    assert [error['row'] for error in response.data['errors'][:-1]] == list(range(2, last['row']))
+    assert User.objects.filter(username='Frank').exists()
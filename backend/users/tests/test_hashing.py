@@ -0,0 +1,61 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from config import metrics
+from users.hashing import hash_executor
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestPasswordHashingPool:
+
+    def setup_method(self):
+        self.client = APIClient()
+        User.objects.create_user(
+            username='HashUser',
+            email='hash@example.com',
+            password='HashPass@123'
+        )
+
+    def test_login_records_hash_and_request_time(self):
+        """Hash time and request time are tracked separately"""
+        hashes = metrics.histogram('auth.hash_seconds').count
+        logins = metrics.histogram('auth.login_seconds').count
+
+        response = self.client.post(reverse('login'), {
+            "email": "hash@example.com",
+            "password": "HashPass@123"
+        })
+
+        assert response.status_code == 200
+        assert metrics.histogram('auth.hash_seconds').count == hashes + 1
+        assert metrics.histogram('auth.login_seconds').count == logins + 1
+
+    def test_register_hashes_on_pool(self):
+        """Registered users can log in with the pool-hashed password"""
+        response = self.client.post(reverse('register'), {
+            "username": "PooledUser",
+            "email": "pooled@example.com",
+            "password": "PooledPass@123",
+            "confirm_password": "PooledPass@123"
+        }, format='json')
+        assert response.status_code == 201
+        assert User.objects.get(email='pooled@example.com').check_password('PooledPass@123')
+
+    def test_full_queue_returns_503(self):
+        """With every slot taken, logins are shed with Retry-After"""
+        hash_executor._ensure_pool()
+        held = 0
+        while hash_executor._slots.acquire(blocking=False):
+            held += 1
+        try:
+            response = self.client.post(reverse('login'), {
+                "email": "hash@example.com",
+                "password": "HashPass@123"
+            })
+        finally:
+            for _ in range(held):
+                hash_executor._slots.release()
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '2'
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import User
+from users.serializers import RegisterSerializer
+
+
+@pytest.mark.django_db
+def test_duplicate_check_is_one_query(django_assert_num_queries):
+    """Username and email are checked together"""
+    serializer = RegisterSerializer(data={
+        "username": "OneQuery",
+        "email": "onequery@example.com",
+        "password": "OneQuery@123",
+        "confirm_password": "OneQuery@123"
+    })
+    with django_assert_num_queries(1):
+        assert serializer.is_valid(), serializer.errors
+
+
+@pytest.mark.django_db
+def test_integrity_error_maps_to_validation_error():
+    """A row inserted after validation still yields the duplicate error"""
+    serializer = RegisterSerializer(data={
+        "username": "RaceUser",
+        "email": "race@example.com",
+        "password": "RacePass@123",
+        "confirm_password": "RacePass@123"
+    })
+    assert serializer.is_valid()
+    User.objects.create_user(username='RaceUser', email='other@example.com', password='x')
+
+    with pytest.raises(Exception) as excinfo:
+        serializer.save()
+    assert excinfo.value.detail == {"non_field_errors": [RegisterSerializer.DUPLICATE_MESSAGE]}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_registrations_create_one_user():
+    """Concurrent signups for one username: exactly one wins, the rest get 400"""
+    attempts = 6
+    barrier = threading.Barrier(attempts)
+    statuses = []
+
+    def register(index):
+        try:
+            barrier.wait()
+            response = APIClient().post(reverse('register'), {
+                "username": "ParallelUser",
+                "email": f"parallel{index}@example.com",
+                "password": "Parallel@123",
+                "confirm_password": "Parallel@123"
+            }, format='json')
+            statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201] + [400] * (attempts - 1)
+    assert User.objects.filter(username="ParallelUser").count() == 1
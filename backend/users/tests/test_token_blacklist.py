@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from users.blacklist import GENERATION_KEY, BloomFilter, blacklist_filter
+from users.models import User
+from users.tokens import UserRefreshToken
+
+
+@pytest.mark.django_db
+class TestTokenBlacklist:
+
+    def setup_method(self):
+        blacklist_filter.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='RefreshUser',
+            email='refresh@example.com',
+            password='RefreshPass@123'
+        )
+
+    def test_refresh_rotates_and_blacklists(self):
+        """A rotated refresh token can't be used again"""
+        refresh = str(UserRefreshToken.for_user(self.user))
+        url = reverse('token-refresh')
+
+        response = self.client.post(url, {"refresh": refresh}, format='json')
+        assert response.status_code == 200
+        assert response.data["refresh"] != refresh
+
+        response = self.client.post(url, {"refresh": refresh}, format='json')
+        assert response.status_code == 401
+
+    def test_clean_token_check_skips_database(self, settings, django_assert_num_queries):
+        """Tokens that were never blacklisted are cleared by the filter alone"""
+        settings.TOKEN_BLACKLIST_FILTER = {'SYNC_INTERVAL': 3600, 'SHARED_CACHE': True}
+        UserRefreshToken.for_user(self.user).blacklist()
+        blacklist_filter.sync(force=True)
+
+        with django_assert_num_queries(0):
+            assert not blacklist_filter.is_blacklisted('never-issued-jti')
+
+    def test_filter_not_trusted_unless_current(self, settings):
+        """A token blacklisted elsewhere is caught when the filter can't know it's current"""
+        settings.TOKEN_BLACKLIST_FILTER = {'SYNC_INTERVAL': 3600, 'SHARED_CACHE': True}
+        blacklist_filter.sync(force=True)
+
+        def blacklisted_elsewhere():
+            # As another worker would: the row, but no note to this process
+            refresh = UserRefreshToken.for_user(self.user)
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+            return refresh['jti']
+
+        # Per-process cache: the generation another worker bumps is never seen here
+        settings.TOKEN_BLACKLIST_FILTER = {'SYNC_INTERVAL': 3600, 'SHARED_CACHE': False}
+        assert blacklist_filter.is_blacklisted(blacklisted_elsewhere())
+
+        # Shared cache that lost the counter: reseeded, so the filter resyncs
+        settings.TOKEN_BLACKLIST_FILTER = {'SYNC_INTERVAL': 3600, 'SHARED_CACHE': True}
+        cache.delete(GENERATION_KEY)
+        assert blacklist_filter.is_blacklisted(blacklisted_elsewhere())
+
+    def test_logout_updates_filter(self):
+        """Logging out blacklists the refresh token through the filter"""
+        refresh = UserRefreshToken.for_user(self.user)
+        refresh.blacklist()
+        assert blacklist_filter.is_blacklisted(refresh['jti'])
+
+    def test_purge_expired_tokens_in_chunks(self):
+        """Expired outstanding and blacklisted rows are deleted, live ones kept"""
+        past = timezone.now() - timedelta(days=1)
+        for i in range(3):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f'expired-{i}', token='x', expires_at=past
+            )
+            BlacklistedToken.objects.create(token=token)
+        live = UserRefreshToken.for_user(self.user)
+
+        call_command('purge_tokens', chunk_size=2, stdout=None)
+
+        assert list(OutstandingToken.objects.values_list('jti', flat=True)) == [live['jti']]
+        assert not BlacklistedToken.objects.exists()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'jti-{i}' for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
@@ -1,21 +1,29 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
+from .tokens import UserRefreshToken
+from config import metrics
 from .models import User
-from .serializers import RegisterSerializer, LoginSerializer
+from .serializers import RegisterSerializer, LoginSerializer, RefreshSerializer
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser
+from .bulk import FORMATS, import_users, read_rows, text_stream
 
 class RegisterView(generics.GenericAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
 
     def post(self, request):
+        with metrics.histogram('auth.register_seconds').time():
+            return self.register(request)
+
+    def register(self, request):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             return Response({
                 "user": {
                     "id": user.id,
@@ -33,10 +41,14 @@ class LoginView(generics.GenericAPIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
+        with metrics.histogram('auth.login_seconds').time():
+            return self.login(request)
+
+    def login(self, request):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             return Response({
                 "user": {
                     "id": user.id,
@@ -48,6 +60,10 @@ class LoginView(generics.GenericAPIView):
             }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
     
+class TokenRefreshView(BaseTokenRefreshView):
+    serializer_class = RefreshSerializer
+
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -61,7 +77,7 @@ class LogoutView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            token = RefreshToken(refresh_token)
+            token = UserRefreshToken(refresh_token)
             token.blacklist()
             
             return Response(
@@ -72,4 +88,25 @@ class LogoutView(APIView):
             return Response(
                 {"error": f"Invalid token: {str(e)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
-            )
\ No newline at end of file
+            )
+
+
+class BulkUserImportView(APIView):
+    """Admin upload of a CSV/JSONL file of users; reports per-row errors"""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "A file upload is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+        if fmt not in FORMATS:
+            return Response(
+                {"error": f"Unsupported format, expected one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = import_users(read_rows(text_stream(upload.file), fmt))
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
@@ -1,7 +1,8 @@
 import { useState, useRef, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useSelector, useDispatch } from 'react-redux';
-import { joinRoom } from './roomSlice';
+import { joinRoom, leaveRoom as leaveRoomRequest } from './roomSlice';
+import axiosInstance from '../../app/axios';
 import { ToastContainer, toast } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
 
@@ -24,6 +25,9 @@ export default function VideoRoom() {
     const offerRetryTimers = useRef(new Map());
     const pendingIceCandidates = useRef(new Map());
     const isRemoteDescSet = useRef(new Map());
+    // Spotlight rooms: periodic microphone level reports
+    const audioLevelTimer = useRef(null);
+    const audioContext = useRef(null);
 
     const [localStream, setLocalStream] = useState(null);
     const [remoteStreamsList, setRemoteStreamsList] = useState([]);
@@ -78,16 +82,32 @@ export default function VideoRoom() {
         }
     };
 
-    const connectWebSocket = () => {
-        if (ws.current?.readyState === WebSocket.OPEN || ws.current?.readyState === WebSocket.CONNECTING) {
+    const isSocketOpen = () =>
+        ws.current?.readyState === WebSocket.OPEN || ws.current?.readyState === WebSocket.CONNECTING;
+
+    const connectWebSocket = async () => {
+        if (isSocketOpen()) {
             return;
         }
 
+        // Identifies the host (for pinning in spotlight rooms). The socket URL
+        // can end up in logs, so it carries a single-use ticket, never the token
+        let ticket = null;
+        if (localStorage.getItem('access')) {
+            try {
+                ticket = (await axiosInstance.post('/rooms/ws-ticket/')).data.ticket;
+            } catch (error) {
+                console.error('❌ Could not get a socket ticket:', error);
+            }
+        }
+        if (isSocketOpen()) {
+            return;
+        }
         const wsUrl = `${import.meta.env.VITE_WS_URL || 'ws://localhost:8000'}/ws/room/${roomId}/`;
         console.log('🔌 Connecting to WebSocket:', wsUrl);
 
         shouldReconnect.current = true;
-        ws.current = new WebSocket(wsUrl);
+        ws.current = new WebSocket(ticket ? `${wsUrl}?ticket=${encodeURIComponent(ticket)}` : wsUrl);
 
         ws.current.onopen = () => {
             console.log('✅ WebSocket connected');
@@ -138,6 +158,9 @@ export default function VideoRoom() {
                 setParticipantCount(data.participant_count || 1);
                 setConnectionStatus('Ready');
                 dispatch(joinRoom(roomId)).catch(console.error);
+                if (data.topology === 'spotlight') {
+                    startAudioLevelReports();
+                }
 
                 // Connect to existing users
                 if (data.existing_users && data.existing_users.length > 0) {
@@ -202,6 +225,15 @@ export default function VideoRoom() {
                 closeConnection(data.userId);
                 break;
 
+            case 'spotlight':
+                // Active speakers changed: hang up pairs without a speaker, offer to new ones
+                console.log('🔦 Active speakers:', data.active);
+                data.disconnect.forEach(peerId => closeConnection(peerId));
+                if (localStreamRef.current) {
+                    data.connect.forEach(peerId => createPeerConnection(peerId, true));
+                }
+                break;
+
             case 'offer':
                 console.log('📨 Received offer from:', data.userId);
                 handleOffer(data.offer, data.userId);
@@ -501,6 +533,30 @@ export default function VideoRoom() {
         }
     };
 
+    const startAudioLevelReports = () => {
+        const stream = localStreamRef.current;
+        if (!stream || audioLevelTimer.current || !stream.getAudioTracks().length) {
+            return;
+        }
+
+        audioContext.current = new AudioContext();
+        const analyser = audioContext.current.createAnalyser();
+        analyser.fftSize = 512;
+        audioContext.current.createMediaStreamSource(stream).connect(analyser);
+        const samples = new Float32Array(analyser.fftSize);
+
+        audioLevelTimer.current = setInterval(() => {
+            analyser.getFloatTimeDomainData(samples);
+            let sum = 0;
+            samples.forEach(sample => { sum += sample * sample; });
+            const muted = !stream.getAudioTracks()[0]?.enabled;
+            const level = muted ? 0 : Math.min(1, Math.sqrt(sum / samples.length) * 4);
+            if (ws.current?.readyState === WebSocket.OPEN) {
+                ws.current.send(JSON.stringify({ type: 'audio_level', level }));
+            }
+        }, 500);
+    };
+
     const closeConnection = (userId) => {
         console.log('🗑️ Closing connection for:', userId);
 
@@ -533,6 +589,11 @@ export default function VideoRoom() {
         offerRetryTimers.current.forEach((timer) => clearInterval(timer));
         offerRetryTimers.current.clear();
 
+        clearInterval(audioLevelTimer.current);
+        audioLevelTimer.current = null;
+        audioContext.current?.close();
+        audioContext.current = null;
+
         peerConnections.current.forEach(pc => pc.close());
         peerConnections.current.clear();
         remoteStreams.current.clear();
@@ -586,6 +647,7 @@ export default function VideoRoom() {
 
     const leaveRoom = () => {
         cleanup();
+        dispatch(leaveRoomRequest(roomId)).catch(console.error);
         navigate('/');
     };
 
@@ -38,6 +38,18 @@ export const joinRoom = createAsyncThunk(
   }
 );
 
+export const leaveRoom = createAsyncThunk(
+  "rooms/leave",
+  async (roomId, { rejectWithValue }) => {
+    try {
+      const res = await axiosInstance.post(`/rooms/${roomId}/leave/`);
+      return { roomId, data: res.data };
+    } catch (err) {
+      return rejectWithValue(err.response.data);
+    }
+  }
+);
+
 const roomSlice = createSlice({
   name: "rooms",
   initialState: {
@@ -74,6 +86,9 @@ const roomSlice = createSlice({
       .addCase(joinRoom.fulfilled, (state, action) => {
         // Handle successful room join
         state.currentRoom = action.payload.roomId;
+      })
+      .addCase(leaveRoom.fulfilled, (state) => {
+        state.currentRoom = null;
       });
   },
 });